@@ -3,6 +3,12 @@
 from __future__ import annotations
 
 import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.code_extractor import extract_code
+from core.code_units import split_units, splice_units, extract_unit_code
+from core import tracing
 
 # GraphRAG: import optionnel (fallback si le module n'existe pas)
 try:
@@ -17,6 +23,9 @@ class BaseAgent:
     + GraphRAG (optionnel) pour enrichir le contexte.
 
     GraphRAG est activé uniquement pour les agents de refactoring structurel/sémantique.
+
+    En mode "hunk" (Python), seules les fonctions/classes signalées par `analyze`
+    sont envoyées au LLM, puis recollées dans le fichier par plage de lignes.
     """
 
     # ✅ RAG seulement pour ces 5 agents
@@ -28,10 +37,20 @@ class BaseAgent:
         "LongFunctionAgent",
     }
 
+    # Mode hunk : l'agent peut-il traiter les unités indépendamment ?
+    SUPPORTS_HUNKS = True
+    # Nombre max d'unités envoyées au LLM en parallèle
+    MAX_UNIT_WORKERS = 4
+
     def __init__(self, llm, name: str = "Agent inconnu", use_graphrag: bool = True):
         self.llm = llm
         self.name = name
         self.use_graphrag = use_graphrag
+        self.hunk_mode = False
+        # Compteurs d'appels LLM (effectués / évités grâce à l'analyse statique)
+        self.llm_calls = 0
+        self.llm_calls_avoided = 0
+        self._stats_lock = threading.Lock()
 
     def analyze(self, code, language):
         """
@@ -40,10 +59,42 @@ class BaseAgent:
         """
         return []
 
-    def build_prompt(self, code, language):
+    def build_prompt(self, code, language, analysis=None):
         """Méthode par défaut pour construire le prompt (peut être surchargée)"""
         return f"Refactor the following {language} code for {self.name} improvements."
 
+    def unit_analysis(self, unit, analysis):
+        """
+        Retourne les éléments de l'analyse qui concernent une unité (mode hunk).
+        Une unité sans élément n'est pas envoyée au LLM.
+        """
+        matched = []
+        for item in analysis or []:
+            if isinstance(item, dict):
+                # Finding statique : recouvrement de plages de lignes
+                spans = item.get("locations") or [(item.get("lineno"), item.get("end_lineno"))]
+                if any(
+                    start is not None and start <= unit.end and (end or start) >= unit.start
+                    for start, end in spans
+                ):
+                    matched.append(item)
+                continue
+            if not isinstance(item, str):
+                continue
+            text = item.strip()
+            if text and (text == unit.name or text in unit.source):
+                matched.append(item)
+        return matched
+
+    @staticmethod
+    def format_findings(analysis) -> str:
+        """Liste lisible des problèmes détectés, pour les prompts"""
+        lines = []
+        for item in analysis or []:
+            note = item.get("note", "") if isinstance(item, dict) else str(item)
+            lines.append(f"- {note}")
+        return "\n".join(lines)
+
     def _should_use_graphrag(self) -> bool:
         """
         Décide automatiquement si GraphRAG doit être utilisé pour cet agent.
@@ -63,6 +114,10 @@ class BaseAgent:
         if not self._should_use_graphrag():
             return system_prompt
 
+        with tracing.span("graphrag", agent=self.name):
+            return self._retrieve_graphrag_context(system_prompt, code, language)
+
+    def _retrieve_graphrag_context(self, system_prompt: str, code: str, language: str) -> str:
         try:
             retriever = GraphRAGRetriever()
             query = (
@@ -95,6 +150,80 @@ class BaseAgent:
             print(f"⚠️ GraphRAG ignoré pour {self.name}: {e}")
             return system_prompt
 
+    def _ask_llm(self, system_prompt, user_prompt, temperature=None):
+        """Appelle le LLM en passant la température seulement si elle est supportée"""
+        with self._stats_lock:
+            self.llm_calls += 1
+        with tracing.span("llm", agent=self.name, prompt_chars=len(system_prompt) + len(user_prompt)):
+            if temperature is not None and "temperature" in inspect.signature(self.llm.ask).parameters:
+                return self.llm.ask(
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    temperature=temperature
+                )
+            # Fallback sans température
+            return self.llm.ask(system_prompt=system_prompt, user_prompt=user_prompt)
+
+    def _generate(self, code, language, analysis, temperature=None, graphrag=False):
+        """
+        Produit la proposition de l'agent : fichier entier, ou unités signalées en mode hunk.
+
+        Returns:
+            tuple: (proposition, appel LLM effectué ?) ; en mode hunk, aucune
+            unité signalée signifie aucun appel
+        """
+        if self.hunk_mode and self.SUPPORTS_HUNKS and language == "Python":
+            units = split_units(code)
+            if units:
+                return self._refactor_units(code, units, language, analysis, temperature, graphrag)
+
+        with tracing.span("prompt_build", agent=self.name):
+            prompt = self.build_prompt(code, language, analysis)
+        if graphrag:
+            prompt = self._inject_graphrag(prompt, code, language)
+        response = self._ask_llm(prompt, code, temperature)
+        # Code seul (sans markdown ni explications) ; réponse brute si aucun bloc de code
+        return extract_code(response, language, default=response), True
+
+    def _refactor_units(self, code, units, language, analysis, temperature=None, graphrag=False):
+        """
+        Mode hunk : envoie chaque unité signalée séparément (en parallèle)
+        et recolle les résultats valides dans le fichier.
+        """
+        flagged = []
+        for unit in units:
+            unit_items = self.unit_analysis(unit, analysis)
+            if unit_items:
+                flagged.append((unit, unit_items))
+
+        if not flagged:
+            return self._skip_llm(code), False
+
+        def refactor_unit(unit, unit_items):
+            with tracing.span("prompt_build", agent=self.name, unit=unit.name):
+                prompt = self.build_prompt(unit.source, language, unit_items)
+            if graphrag:
+                prompt = self._inject_graphrag(prompt, unit.source, language)
+            response = self._ask_llm(prompt, unit.source, temperature)
+            return unit.start, extract_unit_code(response, unit.source)
+
+        print(f"   ✂️  {self.name}: {len(flagged)}/{len(units)} unités envoyées au LLM")
+
+        workers = min(self.MAX_UNIT_WORKERS, len(flagged))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Contexte capturé par tâche : les spans des threads restent rattachés à l'agent
+            jobs = [(tracing.bind_context(refactor_unit), unit, items) for unit, items in flagged]
+            replacements = dict(pool.map(lambda job: job[0](*job[1:]), jobs))
+
+        return splice_units(code, replacements, units), True
+
+    def _skip_llm(self, code):
+        """Aucun problème détecté par l'analyse statique : pas d'appel LLM"""
+        with self._stats_lock:
+            self.llm_calls_avoided += 1
+        print(f"   ⏭️  {self.name}: rien à corriger, appel LLM évité")
+        return code
+
     def apply(self, code, language, temperature=None):
         """
         Applique l'analyse sur le code.
@@ -107,51 +236,33 @@ class BaseAgent:
         Returns:
             dict: Résultat standardisé
         """
-        analysis = self.analyze(code, language)
+        with tracing.span("analysis", agent=self.name):
+            analysis = self.analyze(code, language)
 
+        llm_called = False
         if analysis:
-            # Vérifier si la méthode llm.ask supporte temperature
+            # Vérifier que le client LLM expose bien ask()
             llm_method = getattr(self.llm, "ask", None)
             if not callable(llm_method):
                 raise AttributeError(f"LLM client {self.llm} n'a pas de méthode 'ask'")
 
-            # Construire le prompt (peut être surchargé)
-            prompt = self.build_prompt(code, language)
-
-            # ✅ Injecter GraphRAG seulement pour les agents autorisés
-            prompt = self._inject_graphrag(prompt, code, language)
-
             try:
-                # Essayer d'appeler avec température si supporté
-                if temperature is not None:
-                    sig = inspect.signature(self.llm.ask)
-                    params = sig.parameters
-
-                    if "temperature" in params:
-                        proposal = self.llm.ask(
-                            system_prompt=prompt,
-                            user_prompt=code,
-                            temperature=temperature
-                        )
-                    else:
-                        # Fallback sans température
-                        proposal = self.llm.ask(system_prompt=prompt, user_prompt=code)
-                else:
-                    proposal = self.llm.ask(system_prompt=prompt, user_prompt=code)
-
+                # ✅ GraphRAG injecté seulement pour les agents autorisés
+                proposal, llm_called = self._generate(code, language, analysis, temperature, graphrag=True)
             except Exception as e:
                 print(f"⚠️ Erreur LLM pour {self.name}: {e}")
-                proposal = code
+                proposal, llm_called = code, True
         else:
-            proposal = code
+            proposal = self._skip_llm(code)
 
         result = {
             "name": self.name,
             "analysis": analysis,
-            "proposal": proposal
+            "proposal": proposal,
+            "llm_calls_avoided": 0 if llm_called else 1
         }
 
         if temperature is not None:
             result["temperature_used"] = temperature
 
-        return result
\ No newline at end of file
+        return result
@@ -0,0 +1,176 @@
+# ==================== agents/batch_validation.py ====================
+# Validation de N fichiers Python en un seul lancement par outil
+
+"""
+ruff, mypy et pytest paient surtout leur démarrage : lancés une fois sur
+tout un lot de fichiers (même espace de travail), leur coût par fichier
+devient marginal. Chaque fichier du lot reçoit un nom unique
+(test_code_0001.py...) ; la sortie de chaque outil est redécoupée par
+chemin puis réécrite avec le nom canonique (test_code.py), pour que le
+rapport d'un fichier soit identique à celui d'une validation isolée.
+
+Chaque résultat est le triplet (code_retour, sortie, erreur) de StaticTools.run.
+"""
+
+from collections import defaultdict
+import json
+import re
+
+from . import type_check
+
+
+# Temps alloué à un lancement groupé : base + part par fichier
+BATCH_TIMEOUT_BASE = 30
+BATCH_TIMEOUT_PER_FILE = 5
+
+_PYTEST_LINE = re.compile(r"^(PASSED|FAILED|ERROR|SKIPPED|XFAIL|XPASS) (\S+?\.py)(?:::|\s|$)")
+
+
+def batch_name(index, canonical="test_code.py"):
+    stem, ext = canonical.rsplit(".", 1)
+    return f"{stem}_{index:04d}.{ext}"
+
+
+def batch_timeout(count):
+    return BATCH_TIMEOUT_BASE + BATCH_TIMEOUT_PER_FILE * count
+
+
+def _plural(count, word):
+    return f"{count} {word}{'s' if count != 1 else ''}"
+
+
+def _unavailable(names, result):
+    """Outil absent ou lancement en échec : même résultat pour tout le lot"""
+    return {name: result for name in names}
+
+
+def ruff_batch(tools, names):
+    """`ruff check` sur tout le lot (json-lines), sortie rendue par fichier"""
+    ret, out, err = tools.run(
+        ["ruff", "check", "--output-format=json-lines", "--exit-zero", *names],
+        "ruff",
+        timeout=batch_timeout(len(names))
+    )
+    if err:
+        return _unavailable(names, (ret, out, err))
+
+    by_file = defaultdict(list)
+    for line in out.splitlines():
+        try:
+            item = json.loads(line)
+        except ValueError:
+            continue
+        filename = item.get("filename", "").replace("\\", "/").rsplit("/", 1)[-1]
+        location = item.get("location") or {}
+        by_file[filename].append(
+            f"{filename}:{location.get('row')}:{location.get('column')}: "
+            f"{item.get('code') or 'invalid-syntax'} {item.get('message')}"
+        )
+
+    results = {}
+    for name in names:
+        lines = by_file.get(name, [])
+        if lines:
+            output = "\n".join(lines + [f"Found {_plural(len(lines), 'error')}."])
+        else:
+            output = "All checks passed!"
+        results[name] = (ret, output, "")
+    return results
+
+
+def mypy_batch(tools, names):
+    """Un seul mypy (cache persistant) sur tout le lot ; erreurs réparties par fichier"""
+    ret, out, err = tools.run(
+        ["mypy", *type_check.cache_args(), "--no-error-summary", *names],
+        "mypy",
+        timeout=batch_timeout(len(names))
+    )
+    if err or ret not in (0, 1):
+        # Échec de mypy lui-même (code 2) : pas de découpage possible
+        return _unavailable(names, (ret, out, err))
+
+    by_file = defaultdict(list)
+    for line in out.splitlines():
+        filename = line.split(":", 1)[0]
+        if filename in names:
+            by_file[filename].append(line)
+
+    results = {}
+    for name in names:
+        lines = by_file.get(name, [])
+        errors = sum(1 for line in lines if ": error:" in line)
+        if errors:
+            summary = f"Found {_plural(errors, 'error')} in 1 file (checked 1 source file)"
+            results[name] = (1, "\n".join(lines + [summary]), "")
+        else:
+            results[name] = (0, "\n".join(lines + ["Success: no issues found in 1 source file"]), "")
+    return results
+
+
+def pytest_batch(tools, names):
+    """
+    Un seul pytest sur tout le lot, résultat par fichier d'après le résumé -rA.
+    Codes retour par fichier comme pytest : 0 succès, 1 échec, 2 erreur de
+    collecte, 5 aucun test.
+    """
+    ret, out, err = tools.run(
+        ["pytest", "-q", "-rA", "--disable-warnings", "-p", "no:cacheprovider",
+         "--continue-on-collection-errors", *names],
+        "pytest",
+        timeout=batch_timeout(len(names))
+    )
+    if err:
+        return _unavailable(names, (ret, out, err))
+
+    by_file = defaultdict(list)
+    for line in out.splitlines():
+        match = _PYTEST_LINE.match(line)
+        if match:
+            by_file[match.group(2)].append((match.group(1), line))
+
+    results = {}
+    for name in names:
+        entries = by_file.get(name, [])
+        outcomes = [outcome for outcome, _ in entries]
+        if "ERROR" in outcomes and not any(o in outcomes for o in ("PASSED", "FAILED")):
+            code = 2
+        elif "FAILED" in outcomes or "ERROR" in outcomes:
+            code = 1
+        elif entries:
+            code = 0
+        else:
+            code = 5
+        counts = ", ".join(
+            f"{outcomes.count(o)} {o.lower()}" for o in ("FAILED", "PASSED", "ERROR", "SKIPPED") if o in outcomes
+        )
+        lines = [line for _, line in entries] + [counts or "no tests ran"]
+        results[name] = (code, "\n".join(lines), "")
+    return results
+
+
+def run_batch_checks(tools, names, run_checks=None):
+    """
+    ruff, mypy et pytest, un lancement chacun pour tout le lot.
+
+    Args:
+        run_checks: Exécuteur des vérifications indépendantes (ex.
+            TestAgent._run_checks, concurrent) ; séquentiel par défaut
+
+    Returns:
+        dict: {nom: {"ruff": triplet, "mypy": triplet, "pytest": triplet}}
+    """
+    if not names:
+        return {}
+    checks = [
+        ("ruff", lambda: ruff_batch(tools, names)),
+        ("mypy", lambda: mypy_batch(tools, names)),
+        ("pytest", lambda: pytest_batch(tools, names)),
+    ]
+    per_tool = run_checks(checks) if run_checks else {tool: check() for tool, check in checks}
+    return {name: {tool: results[name] for tool, results in per_tool.items()} for name in names}
+
+
+def canonicalize(result, name, canonical="test_code.py"):
+    """Remplace le nom unique du lot par le nom canonique dans un triplet"""
+    ret, out, err = result
+    return ret, out.replace(name, canonical), err.replace(name, canonical)
@@ -1,7 +1,13 @@
 from agents.base_agent import BaseAgent
+from core.static_analysis import complexity_findings, loop_lines
 
 
 class ComplexityAgent(BaseAgent):
+    # Seuils au-delà desquels une fonction est envoyée au LLM
+    MAX_CYCLOMATIC = 5
+    MAX_LOOP_DEPTH = 1
+    MAX_BLOCK_DEPTH = 2
+
     def __init__(self, llm):
         super().__init__(llm, name="ComplexityAgent")
 
@@ -12,7 +18,7 @@ class ComplexityAgent(BaseAgent):
     #         "Retourne uniquement le code refactoré."
     #     )
 
-    def build_prompt(self, code, language):
+    def build_prompt(self, code, language, analysis=None):
         return f"""You are an autonomous AI code-refactoring agent specialized in Python. Given Python source code, detect complexity-related code smells and refactor the code to reduce complexity while preserving identical semantics.
 
 ### Complexity Smells to Detect
@@ -36,12 +42,19 @@ class ComplexityAgent(BaseAgent):
 1. Detected complexity code smells with location and brief rationale
 2. Fully refactored Python code in a single code block
 3. Short justification explaining why semantics are unchanged
-"""
+""" + (f"\n### Detected by static analysis\n{self.format_findings(analysis)}\n" if analysis else "")
 
     def analyze(self, code, language):
-        # Analyse simplifiée: détecte les boucles imbriquées
-        nested_loops = [line for line in code.splitlines() if "for" in line or "while" in line]
-        return nested_loops
+        # Python : complexité cyclomatique et imbrication via l'AST
+        if language == "Python":
+            return complexity_findings(
+                code,
+                max_cyclomatic=self.MAX_CYCLOMATIC,
+                max_loop_depth=self.MAX_LOOP_DEPTH,
+                max_block_depth=self.MAX_BLOCK_DEPTH
+            )
+        # Autres langages : lignes avec un vrai mot-clé de boucle
+        return loop_lines(code)
 
     def apply(self, code, language, temperature=None):
         return super().apply(code, language, temperature)
@@ -1,37 +1,83 @@
+import textwrap
+
 from agents.base_agent import BaseAgent
+from core import tracing
+from core.code_units import covering_region, extract_unit_code, splice_units
+from core.static_analysis import duplicate_findings, duplicate_line_windows
 
 class DuplicationAgent(BaseAgent):
     """
     Agent qui détecte le code dupliqué et propose de le factoriser.
+
+    En mode hunk (Python), seule la plus petite région couvrant tous les
+    clones est envoyée au LLM, puis recollée dans le fichier.
     """
+    # Les duplications traversent plusieurs unités : pas de découpage par fonction
+    SUPPORTS_HUNKS = False
+    # Taille minimale d'un bloc dupliqué (en statements / lignes)
+    MIN_STATEMENTS = 3
+    MIN_LINES = 4
+
     def __init__(self, llm):
         super().__init__(llm, name="DuplicationAgent")
 
     def analyze(self, code, language):
-        # Ici, on laisse le LLM détecter les duplications complexes
-        prompt = (
-            f"Analyze the following {language} code and find duplicated code blocks "
-            "that can be refactored into functions or loops."
-        )
-        return [prompt]  # On retourne le prompt comme analyse initiale
+        # Python : classes de clones par hash des sous-arbres AST normalisés
+        if language == "Python":
+            return duplicate_findings(code, min_statements=self.MIN_STATEMENTS)
+        # Autres langages : fenêtres de lignes normalisées
+        return duplicate_line_windows(code, window=self.MIN_LINES)
 
-    def apply(self, code, language, temperature=None):
-        analysis = self.analyze(code, language)
-        prompt = (
+    def build_prompt(self, code, language, analysis=None):
+        return (
             f"Refactor the following {language} code by reducing duplication. "
-            "Keep functionality unchanged."
+            "Only rewrite the duplicated blocks listed below; leave the rest of the code unchanged. "
+            "Keep functionality unchanged.\n"
+            f"Duplicated blocks:\n{self.format_findings(analysis)}"
         )
-        if temperature is not None:
-            proposal = self.llm.ask(
-                system_prompt=prompt,
-                user_prompt=code,
-                temperature=temperature
-            )
+
+    def _generate(self, code, language, analysis, temperature=None, graphrag=False):
+        region = None
+        if self.hunk_mode and language == "Python":
+            spans = [span for item in analysis if isinstance(item, dict) for span in item.get("locations", [])]
+            region = covering_region(code, spans)
+
+        if region is None or (region.start == 1 and region.end >= len(code.splitlines())):
+            return super()._generate(code, language, analysis, temperature, graphrag)
+
+        # Région seule : désindentée, lignes renumérotées par rapport à son début
+        indent = region.source[:len(region.source) - len(region.source.lstrip())].rsplit("\n", 1)[-1]
+        excerpt = textwrap.dedent(region.source)
+        offset = region.start - 1
+        local_analysis = [
+            {
+                "note": "Bloc dupliqué aux lignes " + ", ".join(f"{a - offset}-{b - offset}" for a, b in item["locations"]),
+                "locations": [(a - offset, b - offset) for a, b in item["locations"]],
+            }
+            for item in analysis if isinstance(item, dict) and item.get("locations")
+        ]
+
+        print(f"   ✂️  {self.name}: région {region.name} envoyée au LLM")
+        with tracing.span("prompt_build", agent=self.name, unit=region.name):
+            prompt = self.build_prompt(excerpt, language, local_analysis)
+        if graphrag:
+            prompt = self._inject_graphrag(prompt, excerpt, language)
+        response = self._ask_llm(prompt, excerpt, temperature)
+        new_source = textwrap.indent(extract_unit_code(response, excerpt), indent)
+        return splice_units(code, {region.start: new_source}, [region]), True
+
+    def apply(self, code, language, temperature=None):
+        with tracing.span("analysis", agent=self.name):
+            analysis = self.analyze(code, language)
+        llm_called = False
+        if analysis:
+            proposal, llm_called = self._generate(code, language, analysis, temperature)
         else:
-            proposal = self.llm.ask(system_prompt=prompt, user_prompt=code)
+            proposal = self._skip_llm(code)
         return {
             "name": self.name, 
             "analysis": analysis, 
             "proposal": proposal,
-            "temperature_used": temperature
-        }
\ No newline at end of file
+            "temperature_used": temperature,
+            "llm_calls_avoided": 0 if llm_called else 1
+        }
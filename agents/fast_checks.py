@@ -0,0 +1,78 @@
+# ==================== agents/fast_checks.py ====================
+# Validation Python rapide, sans démarrer d'interpréteur par vérification
+
+"""
+Chemin rapide de TestAgent pour Python :
+
+- syntaxe : compile() dans le processus (au lieu de `python -m py_compile`)
+- formatage : black.format_str (bibliothèque) au lieu de `black --check`
+- style : ruff (binaire natif) lu sur stdin, sans fichier ni répertoire à scanner
+
+Chaque méthode renvoie le même triplet (code_retour, sortie, erreur) que
+StaticTools.run, avec des sorties proches de celles des commandes, pour que
+le rapport de TestAgent garde exactement la même structure.
+"""
+
+import subprocess
+import time
+import traceback
+
+from core import process_control, tracing, tool_discovery
+
+try:
+    import black
+except ImportError:
+    black = None
+
+
+class FastPythonChecks:
+    """Vérifications Python en mémoire sur le code d'un fichier"""
+
+    def __init__(self, filename="test_code.py"):
+        self.filename = filename
+
+    def python_syntax(self, code):
+        """Équivalent de `python -m py_compile` : (0, "", "") ou (1, trace SyntaxError, "")"""
+        with tracing.span("fast:python_syntax", "validation"):
+            try:
+                compile(code, self.filename, "exec", dont_inherit=True)
+            except (SyntaxError, ValueError) as e:
+                # Même format que py_compile : File "...", line N / code / ^ / SyntaxError: ...
+                return 1, "".join(traceback.format_exception_only(type(e), e)).strip(), ""
+        return 0, "", ""
+
+    def black_check(self, code):
+        """Équivalent de `black --check` (codes 0 / 1 / 123) ; None si black n'est pas importable"""
+        if black is None:
+            return None
+        with tracing.span("fast:black", "validation"):
+            try:
+                formatted = black.format_str(code, mode=black.Mode())
+            except Exception as e:
+                return 123, f"error: cannot format {self.filename}: {e}\n\nOh no! 💥 💔 💥\n1 file would fail to reformat.", ""
+        if formatted != code:
+            return 1, f"would reformat {self.filename}\n\nOh no! 💥 💔 💥\n1 file would be reformatted.", ""
+        return 0, "All done! ✨ 🍰 ✨\n1 file would be left unchanged.", ""
+
+    def ruff(self, code):
+        """`ruff check` sur stdin (même sortie que sur le fichier, sans relecture disque)"""
+        if not tool_discovery.is_available("ruff"):
+            return -1, "", "Outil 'ruff' non disponible. Installez-le d'abord."
+        cmd = ["ruff", "check", "--stdin-filename", self.filename, "--exit-zero", "-"]
+        timeout = process_control.timeout_for("ruff")
+        start = time.perf_counter()
+        try:
+            with tracing.span("tool:ruff", "subprocess", cmd=" ".join(cmd), timeout=round(timeout, 1)):
+                returncode, stdout, stderr = process_control.run_in_group(
+                    cmd, input=code, timeout=timeout, limits=process_control.tool_limits()
+                )
+            process_control.record("ruff", time.perf_counter() - start)
+            output = stdout + "\n" + stderr
+            return returncode, output.strip(), ""
+        except FileNotFoundError:
+            return -1, "", "Commande introuvable : ruff"
+        except subprocess.TimeoutExpired:
+            process_control.record("ruff", timeout)
+            return -1, "", f"Timeout : commande ruff trop longue ({timeout:.0f}s)"
+        except Exception as e:
+            return -1, "", f"Erreur d'exécution : {str(e)}"
@@ -1,47 +1,64 @@
 from agents.base_agent import BaseAgent
-import re
+from core import tracing
+from core.import_cleanup import clean_imports
+from core.static_analysis import unparsable_finding
 
 class ImportAgent(BaseAgent):
     """
-    Agent qui détecte et propose d'optimiser les imports inutilisés ou dupliqués.
+    Agent qui détecte et optimise les imports inutilisés ou dupliqués.
+
+    En Python, le nettoyage (suppression, dédoublonnage, tri) est fait par
+    réécriture déterministe du source : aucun appel LLM, sauf pour les
+    corrections que la réécriture ne peut appliquer sans risque.
     """
+    # Les imports sont au niveau module : pas de découpage par unité
+    SUPPORTS_HUNKS = False
+
     def __init__(self, llm):
         super().__init__(llm, name="ImportAgent")
 
     def analyze(self, code, language):
         if language == "Python":
-            imports = re.findall(r'^\s*(import .+|from .+ import .+)', code, flags=re.MULTILINE)
-            used_imports = []
-            for imp in imports:
-                name_match = re.findall(r'import (\w+)', imp)
-                for name in name_match:
-                    if name in code:
-                        used_imports.append(imp)
-            unused_imports = list(set(imports) - set(used_imports))
-            return unused_imports
+            # Noms réellement utilisés (AST), y compris __all__ et attributs
+            _, findings = clean_imports(code)
+            return unparsable_finding(code) if findings is None else findings
         else:
             return ["LLM import analysis needed"]
 
+    def build_prompt(self, code, language, analysis=None):
+        return (
+            f"Refactor the following {language} code by removing unused imports:\n"
+            f"{self.format_findings(analysis)}\n"
+            "Keep functionality unchanged."
+        )
+
     def apply(self, code, language, temperature=None):
-        analysis = self.analyze(code, language)
-        if analysis:
-            prompt = (
-                f"Refactor the following {language} code by removing unused imports: {analysis}. "
-                "Keep functionality unchanged."
-            )
-            if temperature is not None:
-                proposal = self.llm.ask(
-                    system_prompt=prompt,
-                    user_prompt=code,
-                    temperature=temperature
-                )
-            else:
-                proposal = self.llm.ask(system_prompt=prompt, user_prompt=code)
+        cleaned, findings = clean_imports(code) if language == "Python" else (code, None)
+        pending = [finding for finding in findings or [] if not finding.get("applied", True)]
+        if findings and not pending:
+            # Réécriture déterministe complète : l'appel LLM est évité
+            analysis, proposal, llm_called = findings, cleaned, False
+            with self._stats_lock:
+                self.llm_calls_avoided += 1
+            print(f"   🧹 {self.name}: {len(findings)} corrections d'imports appliquées sans LLM")
+        elif findings is not None and not findings:
+            analysis, proposal, llm_called = [], self._skip_llm(code), False
+        elif pending:
+            # Corrections non applicables sans risque (import commenté, enregistrement) :
+            # le LLM part du code déjà nettoyé et ne traite que celles-ci
+            applied = len(findings) - len(pending)
+            print(f"   🧹 {self.name}: {applied}/{len(findings)} corrections d'imports appliquées sans LLM")
+            analysis = pending
+            proposal, llm_called = self._generate(cleaned, language, analysis, temperature)
         else:
-            proposal = code
+            # Autre langage ou code non analysable : le LLM traite les imports
+            with tracing.span("analysis", agent=self.name):
+                analysis = self.analyze(code, language)
+            proposal, llm_called = self._generate(code, language, analysis, temperature)
         return {
             "name": self.name, 
             "analysis": analysis, 
             "proposal": proposal,
-            "temperature_used": temperature
-        }
\ No newline at end of file
+            "temperature_used": temperature,
+            "llm_calls_avoided": 0 if llm_called else 1
+        }
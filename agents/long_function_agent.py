@@ -1,49 +1,51 @@
 from agents.base_agent import BaseAgent
-import re
+from core import tracing
+from core.static_analysis import brace_long_function_findings, long_function_findings
+
 
 class LongFunctionAgent(BaseAgent):
     """
     Agent qui détecte les fonctions trop longues et propose des refactorings.
     """
-    def __init__(self, llm):
+    # Seuils par langage (lignes, statements, profondeur d'imbrication)
+    THRESHOLDS = {
+        "Python": {"max_lines": 20, "max_statements": 15, "max_depth": 3},
+        "default": {"max_lines": 30},
+    }
+    # Langages dont les fonctions sont délimitées par des accolades
+    BRACE_LANGUAGES = {"JavaScript", "TypeScript", "Java", "C++", "C", "C#", "Go"}
+
+    def __init__(self, llm, thresholds=None):
         super().__init__(llm, name="LongFunctionAgent")
+        self.thresholds = {**self.THRESHOLDS, **(thresholds or {})}
 
     def analyze(self, code, language):
+        limits = self.thresholds.get(language, self.thresholds["default"])
         if language == "Python":
-            functions = re.findall(r'def (\w+)\(.*\):', code)
-            long_functions = []
-            lines = code.splitlines()
-            for func in functions:
-                start = next((i for i, line in enumerate(lines) if f'def {func}' in line), None)
-                if start is not None:
-                    # On compte les lignes jusqu'à la prochaine fonction ou fin du code
-                    end = next((i for i, line in enumerate(lines[start+1:], start+start+1) if line.strip().startswith("def ")), len(lines))
-                    if end - start > 20:  # seuil de 20 lignes pour considérer "long"
-                        long_functions.append(func)
-            return long_functions
-        else:
-            return ["LLM long function analysis needed"]
+            return long_function_findings(code, **limits)
+        if language in self.BRACE_LANGUAGES:
+            return brace_long_function_findings(code, max_lines=limits["max_lines"])
+        return ["LLM long function analysis needed"]
+
+    def build_prompt(self, code, language, analysis=None):
+        return (
+            f"Refactor the following {language} code. These functions are too long:\n"
+            f"{self.format_findings(analysis)}\n"
+            "Split them into smaller functions without changing behavior."
+        )
 
     def apply(self, code, language, temperature=None):
-        analysis = self.analyze(code, language)
+        with tracing.span("analysis", agent=self.name):
+            analysis = self.analyze(code, language)
+        llm_called = False
         if analysis:
-            prompt = (
-                f"Refactor the following {language} code. Functions {analysis} are too long. "
-                "Split them into smaller functions without changing behavior."
-            )
-            if temperature is not None:
-                proposal = self.llm.ask(
-                    system_prompt=prompt,
-                    user_prompt=code,
-                    temperature=temperature
-                )
-            else:
-                proposal = self.llm.ask(system_prompt=prompt, user_prompt=code)
+            proposal, llm_called = self._generate(code, language, analysis, temperature)
         else:
-            proposal = code
+            proposal = self._skip_llm(code)
         return {
             "name": self.name, 
             "analysis": analysis, 
             "proposal": proposal,
-            "temperature_used": temperature
-        }
\ No newline at end of file
+            "temperature_used": temperature,
+            "llm_calls_avoided": 0 if llm_called else 1
+        }
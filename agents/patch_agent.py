@@ -1,7 +1,8 @@
 # ==================== agents/patch_agent.py (version corrigée) ====================
 
 from .base_agent import BaseAgent
-import re
+from core import tracing
+from core.code_extractor import extract_code
 
 class PatchAgent(BaseAgent):
     """
@@ -49,28 +50,8 @@ class PatchAgent(BaseAgent):
         Nettoie le code sans utiliser le LLM pour éviter les erreurs de syntaxe.
         Retourne uniquement du code syntaxiquement valide.
         """
-        cleaned_lines = []
-        in_code_block = False
-        
-        for line in code.splitlines():
-            stripped = line.strip()
-            
-            # Gestion des blocs markdown
-            if stripped.startswith("```"):
-                in_code_block = not in_code_block
-                continue
-            
-            # Enlever le texte explicatif avant le code
-            if not in_code_block:
-                # Vérifier si c'est une ligne de code valide
-                if (stripped.startswith(("import", "from", "def", "class", "@")) or
-                    (stripped and not stripped.startswith(("# ", "// ", "/*", "* ")))):
-                    cleaned_lines.append(line)
-            else:
-                # À l'intérieur d'un bloc de code, tout garder
-                cleaned_lines.append(line)
-        
-        cleaned_code = "\n".join(cleaned_lines)
+        # Texte explicatif et markdown : meilleur bloc de code de la réponse
+        cleaned_code = extract_code(code, language, default=code)
         
         # Nettoyer les commentaires inline en excès (Python)
         if language.lower() == "python":
@@ -92,12 +73,15 @@ class PatchAgent(BaseAgent):
     
     def apply(self, code, language, temperature=None):
         """Applique le nettoyage avec validation syntaxique"""
-        analysis = self.analyze(code, language)
-        self.changes_applied = []
+        with tracing.span("analysis", agent=self.name):
+            analysis = self.analyze(code, language)
+        # Liste locale : l'agent peut être appelé depuis plusieurs threads (mode projet)
+        changes_applied = []
+        self.changes_applied = changes_applied
         
         # Nettoyer le code (sans LLM pour éviter les erreurs)
         cleaned_code = self.clean_code(code, language)
-        self.changes_applied.append("Texte explicatif et markdown supprimés")
+        changes_applied.append("Texte explicatif et markdown supprimés")
         
         # VALIDATION CRITIQUE : Vérifier la syntaxe Python
         if language.lower() == "python":
@@ -105,7 +89,7 @@ class PatchAgent(BaseAgent):
                 # Essayer de compiler le code
                 import ast
                 ast.parse(cleaned_code)
-                self.changes_applied.append("Syntaxe Python validée")
+                changes_applied.append("Syntaxe Python validée")
             except SyntaxError as e:
                 # En cas d'erreur, essayer de récupérer le code original
                 print(f"⚠️ Erreur de syntaxe après nettoyage: {e}")
@@ -117,12 +101,12 @@ class PatchAgent(BaseAgent):
                     if stripped and not stripped.startswith("# "):
                         valid_lines.append(line)
                 cleaned_code = "\n".join(valid_lines)
-                self.changes_applied.append(f"Erreur de syntaxe corrigée: {e}")
+                changes_applied.append(f"Erreur de syntaxe corrigée: {e}")
         
         return {
             "name": self.name,
             "analysis": analysis,
             "proposal": cleaned_code,
-            "changes_applied": self.changes_applied,
+            "changes_applied": changes_applied,
             "temperature_used": temperature if temperature is not None else "N/A"
         }
\ No newline at end of file
@@ -1,36 +1,42 @@
 # agents/rename_agent.py - Version corrigée
 
 from agents.base_agent import BaseAgent
-import re
+from core import tracing
+from core.rename_analysis import apply_renames, rename_candidates
+from core.static_analysis import unparsable_finding
 
 class RenameAgent(BaseAgent):
     """
     Agent spécialisé dans le renommage des variables pour améliorer la lisibilité.
+
+    En mode déterministe (Python), les renommages déductibles sont appliqués
+    par réécriture AST, sans appel au LLM.
     """
-    def __init__(self, llm):
+    def __init__(self, llm, deterministic=False):
         super().__init__(llm, name="RenameAgent")
+        self.deterministic = deterministic
 
     def analyze(self, code, language):
         """
-        Trouve toutes les variables simples dans le code Python.
+        Python : identifiants locaux courts ou peu parlants (symtable + ast),
+        avec leur portée et leur nombre d'usages.
         Pour d'autres langages, le prompt sera adapté automatiquement.
         """
         if language == "Python":
-            # Regex pour trouver les noms de variables simples
-            pattern = r'\b([a-zA-Z_][a-zA-Z0-9_]*)\b'
-            tokens = set(re.findall(pattern, code))
-            # On filtre les mots-clés Python
-            keywords = {
-                "def","return","if","elif","else","for","while","in","import","from","as",
-                "print","break","continue","class","with","try","except","pass","and","or","not",
-                "is","lambda","True","False","None"
-            }
-            variables = [tok for tok in tokens if tok not in keywords]
-            return variables
+            candidates = rename_candidates(code)
+            return unparsable_finding(code) if candidates is None else candidates
         else:
             # Pour d'autres langages, on laisse le LLM analyser
             return ["LLM variable analysis needed"]
 
+    def build_prompt(self, code, language, analysis=None):
+        """Prompt très précis pour le renommage"""
+        return (
+            f"Refactor the following {language} code by renaming variables "
+            f"to meaningful names. Keep functionality unchanged. "
+            f"Only rename these identifiers:\n{self.format_findings(analysis)}"
+        )
+
     def apply(self, code, language, temperature=None):
         """
         Applique le renommage avec contrôle de température optionnel.
@@ -40,29 +46,28 @@ class RenameAgent(BaseAgent):
             language: Langage de programmation
             temperature: Température pour le LLM (optionnel)
         """
-        analysis = self.analyze(code, language)
-        if analysis:
-            # Prompt très précis pour le renommage
-            prompt = (
-                f"Refactor the following {language} code by renaming variables "
-                f"to meaningful names. Keep functionality unchanged. Variables: {analysis}"
-            )
-            
-            # Appel LLM avec ou sans température
-            if temperature is not None:
-                proposal = self.llm.ask(
-                    system_prompt=prompt, 
-                    user_prompt=code,
-                    temperature=temperature
-                )
-            else:
-                proposal = self.llm.ask(system_prompt=prompt, user_prompt=code)
+        with tracing.span("analysis", agent=self.name):
+            analysis = self.analyze(code, language)
+        if analysis and self.deterministic and language == "Python":
+            # Réécriture AST : aucun appel LLM
+            proposal, renames = apply_renames(code)
+            for rename in renames:
+                print(f"   🏷️  {rename['scope']}: {rename['old']} → {rename['new']} ({rename['uses']} usages)")
+            with self._stats_lock:
+                self.llm_calls_avoided += 1
+            avoided = 1
+        elif analysis:
+            # Appel LLM (fichier entier ou unités en mode hunk)
+            proposal, llm_called = self._generate(code, language, analysis, temperature)
+            avoided = 0 if llm_called else 1
         else:
-            proposal = code
+            proposal = self._skip_llm(code)
+            avoided = 1
         
         return {
             "name": self.name, 
             "analysis": analysis, 
             "proposal": proposal,
-            "temperature_used": temperature
-        }
\ No newline at end of file
+            "temperature_used": temperature,
+            "llm_calls_avoided": avoided
+        }
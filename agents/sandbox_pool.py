@@ -0,0 +1,263 @@
+# ==================== agents/sandbox_pool.py ====================
+# Espaces de travail TestAgent pré-initialisés, réutilisés par bail
+
+"""
+Sans pool, chaque validation crée un répertoire vide : `npx jest`
+télécharge jest, Maven résout un projet de zéro, `go test` n'a pas de
+module. Ici :
+
+- un gabarit par langage (package.json + node_modules avec jest, pom.xml
+  + dépôt Maven local préchauffé, go.mod) est initialisé une fois et
+  conservé entre les exécutions (checkpoints/sandboxes/templates)
+- les espaces de travail sont des copies du gabarit (les gros répertoires
+  comme node_modules sont liés, pas copiés), prêtés par `lease(langage)`
+  à un seul utilisateur à la fois
+- au retour, l'espace est remis à zéro : tout ce qui n'appartient pas au
+  gabarit (fichier testé, résultats de compilation) est supprimé
+
+L'initialisation est best-effort : sans réseau, le gabarit garde au moins
+sa structure (package.json, pom.xml, go.mod). Supprimer le répertoire
+d'un gabarit force sa réinitialisation.
+"""
+
+from contextlib import contextmanager
+from pathlib import Path
+import atexit
+import json
+import os
+import shutil
+import subprocess
+import threading
+import uuid
+
+from core import tracing, tool_discovery
+
+
+DEFAULT_ROOT = "checkpoints/sandboxes"
+# Espaces simultanés par langage (au-delà, lease attend qu'un espace se libère)
+DEFAULT_MAX_PER_LANGUAGE = 8
+INIT_TIMEOUT = 300
+MARKER = ".sandbox.json"
+
+# Répertoires volumineux du gabarit, partagés par lien symbolique
+SHARED_DIRS = {"node_modules"}
+
+_PACKAGE_JSON = {
+    "name": "refactor-sandbox",
+    "version": "1.0.0",
+    "private": True,
+    "scripts": {"test": "jest --passWithNoTests"},
+}
+
+_POM_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <modelVersion>4.0.0</modelVersion>
+  <groupId>sandbox</groupId>
+  <artifactId>refactor-sandbox</artifactId>
+  <version>1.0</version>
+  <properties>
+    <maven.compiler.source>17</maven.compiler.source>
+    <maven.compiler.target>17</maven.compiler.target>
+    <project.build.sourceEncoding>UTF-8</project.build.sourceEncoding>
+  </properties>
+  <dependencies>
+    <dependency>
+      <groupId>junit</groupId>
+      <artifactId>junit</artifactId>
+      <version>4.13.2</version>
+      <scope>test</scope>
+    </dependency>
+  </dependencies>
+</project>
+"""
+
+# Langage -> (fichiers du gabarit, commandes d'initialisation [(outil, commande)])
+TEMPLATES = {
+    "javascript": (
+        {"package.json": json.dumps(_PACKAGE_JSON, indent=2)},
+        [("npm", ["npm", "install", "--no-audit", "--no-fund", "--save-dev", "jest"])],
+    ),
+    "java": (
+        {"pom.xml": _POM_XML},
+        [("mvn", ["mvn", "-q", "-B", "dependency:go-offline", "test-compile"])],
+    ),
+    "go": (
+        {"go.mod": "module sandbox\n\ngo 1.20\n"},
+        [],
+    ),
+}
+TEMPLATES["typescript"] = TEMPLATES["javascript"]
+
+
+class SandboxPool:
+    """Pool d'espaces de travail par langage, prêtés à un utilisateur à la fois"""
+
+    def __init__(self, root=DEFAULT_ROOT, max_per_language=DEFAULT_MAX_PER_LANGUAGE):
+        self.root = Path(root).resolve()
+        self.templates_dir = self.root / "templates"
+        # Espaces propres au processus : supprimés à la sortie
+        self.workspaces_dir = self.root / f"workspaces-{os.getpid()}"
+        self.max_per_language = max_per_language
+        self._cond = threading.Condition()
+        self._idle = {}  # langage -> [chemins libres]
+        self._count = {}  # langage -> espaces créés
+        self._template_locks = {}
+        self.stats = {"created": 0, "reused": 0, "waits": 0}
+
+    # ------------------------------------------------------------------
+    # Gabarits
+    # ------------------------------------------------------------------
+
+    def _maven_repo(self):
+        return self.root / "m2-repository"
+
+    def template(self, language):
+        """Gabarit initialisé du langage (créé au premier appel, conservé sur disque)"""
+        target = self.templates_dir / language
+        with self._cond:
+            lock = self._template_locks.setdefault(language, threading.Lock())
+        with lock:
+            if (target / MARKER).exists():
+                return target
+
+            # Construit à côté puis renommé : un autre processus peut faire de même
+            staging = self.templates_dir / f".{language}-{uuid.uuid4().hex[:8]}"
+            staging.mkdir(parents=True)
+            files, commands = TEMPLATES.get(language, ({}, []))
+            for name, content in files.items():
+                (staging / name).write_text(content, encoding="utf-8")
+            if language == "java":
+                # Dépôt Maven local partagé par tous les espaces (lu par mvn via .mvn/maven.config)
+                (staging / ".mvn").mkdir()
+                (staging / ".mvn" / "maven.config").write_text(
+                    f"-Dmaven.repo.local={self._maven_repo()}\n", encoding="utf-8"
+                )
+
+            initialised = self._initialise(language, staging, commands)
+            (staging / MARKER).write_text(
+                json.dumps({"language": language, "initialised": initialised}), encoding="utf-8"
+            )
+            try:
+                os.replace(staging, target)
+            except OSError:
+                shutil.rmtree(staging, ignore_errors=True)  # gabarit déjà publié par un autre processus
+            return target
+
+    def _initialise(self, language, path, commands):
+        ok = True
+        for tool, cmd in commands:
+            if not tool_discovery.is_available(tool):
+                ok = False
+                continue
+            print(f"🧰 Initialisation du gabarit {language}: {' '.join(cmd)}")
+            try:
+                with tracing.span(f"sandbox_init:{language}", "subprocess", cmd=" ".join(cmd)):
+                    p = subprocess.run(cmd, cwd=path, capture_output=True, text=True,
+                                       errors="ignore", timeout=INIT_TIMEOUT)
+                ok = ok and p.returncode == 0
+            except (OSError, subprocess.TimeoutExpired):
+                ok = False
+        if not ok:
+            print(f"⚠️ Gabarit {language} partiellement initialisé (outil absent ou hors ligne)")
+        return ok
+
+    # ------------------------------------------------------------------
+    # Espaces de travail
+    # ------------------------------------------------------------------
+
+    def _create(self, language):
+        template = self.template(language)
+        workspace = self.workspaces_dir / f"{language}-{uuid.uuid4().hex[:8]}"
+        workspace.mkdir(parents=True)
+        for entry in template.iterdir():
+            target = workspace / entry.name
+            if entry.name in SHARED_DIRS:
+                target.symlink_to(entry, target_is_directory=True)
+            elif entry.is_dir():
+                shutil.copytree(entry, target, symlinks=True)
+            else:
+                shutil.copy2(entry, target)
+        return workspace
+
+    def _reset(self, language, workspace):
+        """Supprime tout ce qui n'appartient pas au gabarit"""
+        baseline = {entry.name for entry in self.template(language).iterdir()}
+        for entry in workspace.iterdir():
+            if entry.name in baseline:
+                continue
+            if entry.is_dir() and not entry.is_symlink():
+                shutil.rmtree(entry, ignore_errors=True)
+            else:
+                entry.unlink(missing_ok=True)
+
+    @contextmanager
+    def lease(self, language):
+        """Prête un espace de travail du langage, remis à zéro à la restitution"""
+        language = language.lower()
+        with self._cond:
+            while True:
+                idle = self._idle.setdefault(language, [])
+                if idle:
+                    workspace = idle.pop()
+                    self.stats["reused"] += 1
+                    break
+                if self._count.get(language, 0) < self.max_per_language:
+                    self._count[language] = self._count.get(language, 0) + 1
+                    workspace = None
+                    break
+                self.stats["waits"] += 1
+                self._cond.wait()
+
+        if workspace is None:
+            try:
+                workspace = self._create(language)
+            except Exception:
+                with self._cond:
+                    self._count[language] -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self.stats["created"] += 1
+
+        try:
+            yield workspace
+        finally:
+            try:
+                self._reset(language, workspace)
+                reusable = True
+            except OSError:
+                reusable = False
+            with self._cond:
+                if reusable:
+                    self._idle[language].append(workspace)
+                else:
+                    self._count[language] -= 1
+                    shutil.rmtree(workspace, ignore_errors=True)
+                self._cond.notify()
+
+    def warm(self, languages):
+        """Prépare les gabarits en arrière-plan (ex. au lancement d'un batch)"""
+        def run():
+            for language in languages:
+                try:
+                    self.template(language.lower())
+                except Exception as e:
+                    print(f"⚠️ Préparation du gabarit {language} échouée: {e}")
+        threading.Thread(target=run, name="sandbox-warmup", daemon=True).start()
+
+    def close(self):
+        shutil.rmtree(self.workspaces_dir, ignore_errors=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Pool du processus (espaces supprimés à la sortie, gabarits conservés)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SandboxPool()
+            atexit.register(_pool.close)
+        return _pool
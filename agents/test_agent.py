@@ -1,12 +1,37 @@
 # ==================== agents/test_agent.py (version ULTRA-ROBUSTE) ====================
 
 from .base_agent import BaseAgent
+from core import process_control, tracing, tool_discovery
+from core.code_extractor import extract
+from .fast_checks import FastPythonChecks
+from . import batch_validation, sandbox_pool, type_check, validation_cache
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import subprocess
-import tempfile
 import os
 import sys
 import re
+import time
+
+
+_JAVA_PACKAGE_RE = re.compile(r"^\s*package\s+([\w.]+)\s*;", re.MULTILINE)
+_JAVA_TYPE_RE = re.compile(
+    r"^\s*(public\s+)?(?:(?:abstract|final|sealed|static|strictfp)\s+)*(?:class|interface|enum|record)\s+(\w+)",
+    re.MULTILINE
+)
+
+
+def java_source_path(code):
+    """
+    Chemin Maven d'un source Java : src/main/java/<package>/<ClassePublique>.java
+    (javac exige que le fichier porte le nom de la classe publique).
+    """
+    package = _JAVA_PACKAGE_RE.search(code)
+    types = _JAVA_TYPE_RE.findall(code)
+    public = [name for is_public, name in types if is_public]
+    name = (public or [name for _, name in types] or ["TestCode"])[0]
+    parts = package.group(1).split(".") if package else []
+    return Path("src", "main", "java", *parts, f"{name}.java")
 
 
 class StaticTools:
@@ -16,67 +41,55 @@ class StaticTools:
     def __init__(self, repo_path: Path, language: str):
         self.repo_path = repo_path
         self.language = language.lower()
-        self.available_tools = self._detect_available_tools()
-
-    def _detect_available_tools(self):
-        """Détecte les outils disponibles sur le système"""
-        available = {}
-        tools = [
-            # Python
-            "python", "ruff", "black", "mypy", "pytest", "coverage",
-            # JS
-            "npm", "npx", "node",
-            # Java
-            "javac", "mvn", "gradle",
-            # C/C++
-            "gcc", "g++", "make",
-            # Go
-            "go",
-            # Ruby
-            "ruby", "rspec"
-        ]
-
-        for tool in tools:
-            try:
-                subprocess.run(
-                    [tool, "--version"],
-                    capture_output=True,
-                    check=False,
-                    timeout=5
-                )
-                available[tool] = True
-            except (FileNotFoundError, OSError, subprocess.TimeoutExpired):
-                available[tool] = False
+        # Outils du seul langage analysé, découverts une fois par processus
+        # (shutil.which + sondage --version mis en cache sur disque)
+        self.available_tools = tool_discovery.available_tools(self.language)
 
-        return available
+    def is_available(self, tool):
+        """Disponibilité d'un outil (hors langage : recherche à la demande)"""
+        if tool not in self.available_tools:
+            self.available_tools[tool] = tool_discovery.is_available(tool)
+        return self.available_tools[tool]
 
-    def run(self, cmd, tool_name=None):
+    def run(self, cmd, tool_name=None, timeout=None, input=None):
         """
         Exécute une commande avec gestion d'erreur améliorée.
+
+        La commande tourne dans son propre groupe de processus (tué en entier
+        au timeout) avec les limites de process_control. timeout=None : délai
+        adaptatif déduit des durées passées de l'outil.
         
         Returns:
             tuple: (status_code, output, error_message)
         """
         # Vérifier si l'outil est disponible
-        if tool_name and not self.available_tools.get(tool_name, False):
+        if tool_name and not self.is_available(tool_name):
             return -1, "", f"Outil '{tool_name}' non disponible. Installez-le d'abord."
-        
+
+        tool = tool_name or cmd[0]
+        adaptive = timeout is None
+        if adaptive:
+            timeout = process_control.timeout_for(tool)
+        start = time.perf_counter()
         try:
-            p = subprocess.run(
-                cmd,
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                encoding="utf-8",
-                errors="ignore",
-                timeout=30
-            )
-            output = (p.stdout or "") + "\n" + (p.stderr or "")
-            return p.returncode, output.strip(), ""
+            with tracing.span(f"tool:{tool}", "subprocess", cmd=" ".join(cmd), timeout=round(timeout, 1)):
+                code, stdout, stderr = process_control.run_in_group(
+                    cmd,
+                    cwd=self.repo_path,
+                    timeout=timeout,
+                    input=input,
+                    limits=process_control.tool_limits()
+                )
+            if adaptive:
+                process_control.record(tool, time.perf_counter() - start)
+            output = stdout + "\n" + stderr
+            return code, output.strip(), ""
         except FileNotFoundError:
             return -1, "", f"Commande introuvable : {cmd[0]}"
         except subprocess.TimeoutExpired:
-            return -1, "", f"Timeout : commande {cmd[0]} trop longue"
+            if adaptive:
+                process_control.record(tool, timeout)
+            return -1, "", f"Timeout : commande {cmd[0]} trop longue ({timeout:.0f}s)"
         except Exception as e:
             return -1, "", f"Erreur d'exécution : {str(e)}"
 
@@ -93,8 +106,11 @@ class StaticTools:
     def black_check(self):
         return self.run(["black", "--check", "."], "black")
 
-    def mypy(self):
-        return self.run(["mypy", "."], "mypy")
+    def mypy(self, filename=None):
+        # Démon dmypy ou cache persistant selon agents.type_check (typeshed chargé une fois)
+        if filename and type_check.daemon_available():
+            return type_check.get_daemon().check(Path(self.repo_path) / filename)
+        return self.run(["mypy", *type_check.cache_args(), "."], "mypy")
 
     def pytest(self):
         return self.run(
@@ -103,7 +119,7 @@ class StaticTools:
         )
 
     def coverage_pytest(self):
-        if not self.available_tools.get("coverage", False):
+        if not self.is_available("coverage"):
             return -1, "", "coverage non installé"
         return self.run(
             ["coverage", "run", "-m", "pytest"],
@@ -144,12 +160,136 @@ class TestAgent(BaseAgent):
     Agent de validation avec gestion des outils manquants et extraction ultra-robuste.
     """
 
+    # Outils de vérification exécutés simultanément au plus
+    MAX_PARALLEL_CHECKS = 4
+
     def __init__(self, llm):
         super().__init__(llm, name="TestAgent")
 
+    def _run_checks(self, checks):
+        """
+        Exécute des vérifications indépendantes en parallèle (bornées par
+        MAX_PARALLEL_CHECKS et le nombre de CPU : mypy et pytest sont coûteux
+        en calcul) : la plus lente fixe la latence totale.
+
+        Returns:
+            dict: {nom: (status_code, output, error_message)} dans l'ordre de checks
+        """
+        workers = max(1, min(self.MAX_PARALLEL_CHECKS, len(checks), os.cpu_count() or 1))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [(name, pool.submit(tracing.bind_context(check))) for name, check in checks]
+            return {name: future.result() for name, future in futures}
+
+    def _cache_key(self, lang_key, code):
+        return validation_cache.cache_key(lang_key, code, {"mypy_mode": type_check.mypy_mode()})
+
     def analyze(self, code, language):
+        """
+        Analyse le code, en réutilisant le rapport d'un code identique déjà validé
+        avec la même chaîne d'outils (voir agents.validation_cache).
+        """
+        cache = validation_cache.get_cache()
+        if cache is None:
+            return self._analyze_uncached(code, language)
+
+        key = self._cache_key(language.lower(), code)
+        report, tier = cache.get(key)
+        if report is not None:
+            print(f"   ♻️  Validation en cache ({tier})")
+            report["cache"] = {"hit": True, "tier": tier, "key": key[:16]}
+            return report
+
+        report = self._analyze_uncached(code, language)
+        if validation_cache.is_cacheable(report):
+            cache.put(key, report)
+        report["cache"] = {"hit": False, "tier": None, "key": key[:16]}
+        return report
+
+    def analyze_batch(self, items):
+        """
+        Valide un lot de codes en un seul lancement de ruff, mypy et pytest
+        pour tous les fichiers Python (voir agents.batch_validation). Les
+        codes identiques ne sont validés qu'une fois.
+
+        Args:
+            items: Liste de (code, language)
+
+        Returns:
+            list: Rapports identiques à ceux d'analyze, dans l'ordre des items
+        """
+        cache = validation_cache.get_cache()
+        reports = [None] * len(items)
+        keys = [None] * len(items)
+        pending = {}  # code Python -> index des items qui le contiennent
+
+        for i, (code, language) in enumerate(items):
+            lang_key = language.lower()
+            if cache is not None:
+                keys[i] = self._cache_key(lang_key, code)
+                report, tier = cache.get(keys[i])
+                if report is not None:
+                    report["cache"] = {"hit": True, "tier": tier, "key": keys[i][:16]}
+                    reports[i] = report
+                    continue
+            if lang_key == "python":
+                pending.setdefault(code, []).append(i)
+            else:
+                reports[i] = self._analyze_uncached(code, language)
+
+        if pending:
+            codes = list(pending)
+            print(f"   📦 Validation groupée de {len(codes)} fichiers Python")
+            for code, checks in zip(codes, self._batch_checks(codes)):
+                for i in pending[code]:
+                    reports[i] = self._analyze_uncached(code, items[i][1], checks)
+
+        hits = 0
+        for i, report in enumerate(reports):
+            if report.get("cache", {}).get("hit"):
+                hits += 1
+                continue
+            if cache is not None:
+                if validation_cache.is_cacheable(report):
+                    cache.put(keys[i], report)
+                report["cache"] = {"hit": False, "tier": None, "key": keys[i][:16]}
+        if hits:
+            print(f"   ♻️  {hits}/{len(items)} validations en cache")
+        return reports
+
+    def _batch_checks(self, codes, canonical="test_code.py"):
+        """
+        Résultats Python ({outil: triplet}) de chaque code, avec un seul
+        espace de travail et un lancement par outil pour tout le lot.
+        """
+        fast = FastPythonChecks(canonical)
+        with sandbox_pool.get_pool().lease("python") as path:
+            tools = StaticTools(path, "python")
+            names = [batch_validation.batch_name(i, canonical) for i in range(1, len(codes) + 1)]
+            checks = []
+            for name, code in zip(names, codes):
+                (path / name).write_text(code, encoding="utf-8")
+                checks.append({"python_syntax": fast.python_syntax(code)})
+
+            # Erreur de syntaxe : fichier exclu du lot (mêmes annulations qu'analyze)
+            valid = [name for name, c in zip(names, checks) if c["python_syntax"][0] == 0]
+            batch = batch_validation.run_batch_checks(tools, valid, self._run_checks)
+
+            for name, code, c in zip(names, codes, checks):
+                if name not in batch:
+                    continue
+                black_result = fast.black_check(code) or tools.run(["black", "--check", name], "black")
+                c["black"] = batch_validation.canonicalize(black_result, name, canonical)
+                for tool, result in batch[name].items():
+                    c[tool] = batch_validation.canonicalize(result, name, canonical)
+        return checks
+
+    def _analyze_uncached(self, code, language, checks=None):
         """
         Analyse le code avec gestion élégante des outils manquants.
+
+        Args:
+            checks: Résultats Python déjà calculés ({outil: triplet}, voir
+                analyze_batch) ; les outils ne sont alors pas relancés
         """
         lang_key = language.lower()
         report = {
@@ -161,8 +301,8 @@ class TestAgent(BaseAgent):
             "tools_available": True
         }
 
-        with tempfile.TemporaryDirectory() as tmp:
-            path = Path(tmp)
+        # Espace de travail pré-initialisé du langage (package.json, pom.xml, go.mod...)
+        with sandbox_pool.get_pool().lease(lang_key) as path:
             
             # Déterminer l'extension
             extensions = {
@@ -179,6 +319,11 @@ class TestAgent(BaseAgent):
             ext = extensions.get(lang_key, ".py")
             filename = f"test_code{ext}"
             file_path = path / filename
+            if lang_key == "java":
+                # Maven ne compile que src/main/java, fichier nommé comme la classe publique
+                file_path = path / java_source_path(code)
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                filename = str(file_path.relative_to(path))
             
             # Écrire le code
             file_path.write_text(code, encoding="utf-8")
@@ -188,9 +333,11 @@ class TestAgent(BaseAgent):
 
             # ================= PYTHON =================
             if lang_key == "python":
+                # Syntaxe, Ruff et Black en mémoire (pas de démarrage d'interpréteur)
+                fast = FastPythonChecks(filename)
 
                 # -------- Syntaxe Python --------
-                ret, out, err = tools.python_syntax(filename)
+                ret, out, err = checks["python_syntax"] if checks else fast.python_syntax(code)
                 status = "SUCCESS" if ret == 0 else "FAILED"
 
                 detail = {
@@ -215,77 +362,90 @@ class TestAgent(BaseAgent):
                             if line.strip():
                                 report["summary"].append(f"   → {line.strip()}")
 
-                # -------- Ruff --------
-                ret, out, err = tools.ruff()
-                if err and "non disponible" in err:
-                    report["warnings"].append("⚠️ Ruff non installé - impossible de vérifier le style")
-                    report["tools_available"] = False
-                else:
-                    status = "SUCCESS" if ret == 0 else "WARNING"
-                    report["details"].append({
-                        "tool": "ruff",
-                        "status": status,
-                        "return_code": ret,
-                        "output": out or "✅ Aucun problème de style détecté",
-                        "error": err
-                    })
-                    if ret != 0:
-                        report["summary"].append("⚠️ Problèmes de style détectés (Ruff)")
-                        if report["status"] == "SUCCESS":
-                            report["status"] = "WARNING"
-
-                # -------- Black --------
-                ret, out, err = tools.black_check()
-                if err and "non disponible" in err:
-                    report["warnings"].append("⚠️ Black non installé - impossible de vérifier le formatage")
-                else:
-                    status = "SUCCESS" if ret == 0 else "WARNING"
-                    report["details"].append({
-                        "tool": "black",
-                        "status": status,
-                        "return_code": ret,
-                        "output": out or "✅ Formatage correct (Black)",
-                        "error": err
-                    })
-                    if ret != 0:
-                        report["warnings"].append("Code nécessite un reformatage avec Black")
-                        if report["status"] == "SUCCESS":
-                            report["status"] = "WARNING"
-
-                # -------- mypy --------
-                ret, out, err = tools.mypy()
-                if err and "non disponible" in err:
-                    report["warnings"].append("⚠️ mypy non installé - impossible de vérifier les types")
-                else:
-                    status = "SUCCESS" if ret == 0 else "WARNING"
-                    report["details"].append({
-                        "tool": "mypy",
-                        "status": status,
-                        "return_code": ret,
-                        "output": out or "✅ Aucune erreur de type",
-                        "error": err
-                    })
-                    if ret != 0:
-                        report["warnings"].append("Problèmes de typage détectés")
-                        if report["status"] == "SUCCESS":
-                            report["status"] = "WARNING"
-
-                # -------- Pytest --------
-                ret, out, err = tools.pytest()
-                if err and "non disponible" in err:
-                    report["warnings"].append("⚠️ pytest non installé - tests unitaires ignorés")
+                # Erreur de syntaxe : les autres outils échoueraient aussi, on les annule
+                if ret != 0:
+                    report["warnings"].append("Vérifications Ruff/Black/mypy/pytest annulées (erreur de syntaxe)")
                 else:
-                    status = "SUCCESS" if ret == 0 else "FAILED"
-                    report["details"].append({
-                        "tool": "pytest",
-                        "status": status,
-                        "return_code": ret,
-                        "output": out or "✅ Tous les tests pytest passent",
-                        "error": err
-                    })
-                    if ret != 0:
-                        report["status"] = "FAILED"
-                        report["summary"].append("❌ Tests pytest échoués")
+                    # Outils indépendants (lecture seule du même fichier) : exécution
+                    # concurrente, résultats intégrés dans un ordre fixe
+                    results = checks or self._run_checks([
+                        ("ruff", lambda: fast.ruff(code)),
+                        ("black", lambda: fast.black_check(code) or tools.black_check()),
+                        ("mypy", lambda: tools.mypy(filename)),
+                        ("pytest", tools.pytest),
+                    ])
+
+                    # -------- Ruff --------
+                    ret, out, err = results["ruff"]
+                    if err and "non disponible" in err:
+                        report["warnings"].append("⚠️ Ruff non installé - impossible de vérifier le style")
+                        report["tools_available"] = False
+                    else:
+                        status = "SUCCESS" if ret == 0 else "WARNING"
+                        report["details"].append({
+                            "tool": "ruff",
+                            "status": status,
+                            "return_code": ret,
+                            "output": out or "✅ Aucun problème de style détecté",
+                            "error": err
+                        })
+                        if ret != 0:
+                            report["summary"].append("⚠️ Problèmes de style détectés (Ruff)")
+                            if report["status"] == "SUCCESS":
+                                report["status"] = "WARNING"
+
+                    # -------- Black --------
+                    ret, out, err = results["black"]
+                    if err and "non disponible" in err:
+                        report["warnings"].append("⚠️ Black non installé - impossible de vérifier le formatage")
+                    else:
+                        status = "SUCCESS" if ret == 0 else "WARNING"
+                        report["details"].append({
+                            "tool": "black",
+                            "status": status,
+                            "return_code": ret,
+                            "output": out or "✅ Formatage correct (Black)",
+                            "error": err
+                        })
+                        if ret != 0:
+                            report["warnings"].append("Code nécessite un reformatage avec Black")
+                            if report["status"] == "SUCCESS":
+                                report["status"] = "WARNING"
+
+                    # -------- mypy --------
+                    ret, out, err = results["mypy"]
+                    if err and "non disponible" in err:
+                        report["warnings"].append("⚠️ mypy non installé - impossible de vérifier les types")
+                    else:
+                        status = "SUCCESS" if ret == 0 else "WARNING"
+                        report["details"].append({
+                            "tool": "mypy",
+                            "status": status,
+                            "return_code": ret,
+                            "output": out or "✅ Aucune erreur de type",
+                            "error": err
+                        })
+                        if ret != 0:
+                            report["warnings"].append("Problèmes de typage détectés")
+                            if report["status"] == "SUCCESS":
+                                report["status"] = "WARNING"
+
+                    # -------- Pytest --------
+                    ret, out, err = results["pytest"]
+                    if err and "non disponible" in err:
+                        report["warnings"].append("⚠️ pytest non installé - tests unitaires ignorés")
+                    else:
+                        status = "SUCCESS" if ret == 0 else "FAILED"
+                        report["details"].append({
+                            "tool": "pytest",
+                            "status": status,
+                            "return_code": ret,
+                            "output": out or "✅ Tous les tests pytest passent",
+                            "error": err
+                        })
+                        if ret != 0:
+                            report["status"] = "FAILED"
+                            report["summary"].append("❌ Tests pytest échoués")
 
             # ================= JAVASCRIPT / TYPESCRIPT =================
             elif lang_key in ["javascript", "typescript"]:
@@ -310,6 +470,9 @@ class TestAgent(BaseAgent):
             elif lang_key == "java":
 
                 ret, out, err = tools.maven_test()
+                if ret == 0 and "No sources to compile" in out:
+                    # Garde-fou : un BUILD SUCCESS sans compilation ne valide rien
+                    ret, err = 1, "Aucune source Java compilée par Maven"
                 if err and "non disponible" in err:
                     report["warnings"].append("⚠️ Maven non installé - tests ignorés")
                 else:
@@ -407,7 +570,8 @@ class TestAgent(BaseAgent):
         """
         Applique l'analyse avec correction automatique si erreurs de syntaxe.
         """
-        analysis = self.analyze(code, language)
+        with tracing.span("analysis", agent=self.name):
+            analysis = self.analyze(code, language)
         
         # Si erreur de syntaxe et LLM disponible, essayer de corriger
         if analysis["status"] == "FAILED" and hasattr(self.llm, 'ask'):
@@ -450,12 +614,13 @@ RETOURNEZ UNIQUEMENT LE CODE PYTHON CORRIGÉ (première ligne doit être du code
                         temperature=0.05  # Ultra-bas
                     )
                     
-                    # EXTRACTION ULTRA-ROBUSTE
-                    corrected_code = self._extract_pure_code(corrected_code)
+                    # Extraction en une passe (blocs ```, prose avant/après le code)
+                    extracted = extract(corrected_code, language)
+                    corrected_code = extracted.code if extracted else ""
                     
                     if corrected_code and corrected_code != code:
                         # Vérifier que c'est du vrai code
-                        if self._is_valid_python_code(corrected_code):
+                        if extracted.valid:
                             corrected_analysis = self.analyze(corrected_code, language)
                             if corrected_analysis["status"] != "FAILED":
                                 code = corrected_code
@@ -480,159 +645,7 @@ RETOURNEZ UNIQUEMENT LE CODE PYTHON CORRIGÉ (première ligne doit être du code
             "warnings": analysis.get("warnings", []),
             "metrics": analysis.get("metrics", {}),
             "tools_available": analysis.get("tools_available", True),
+            "cache": analysis.get("cache"),
             "proposal": code,
             "temperature_used": temperature if temperature is not None else "N/A"
         }
-    
-    def _extract_pure_code(self, response):
-        """
-        EXTRACTION ULTRA-ROBUSTE avec 5 méthodes successives.
-        """
-        original_response = response
-        
-        # MÉTHODE 1: Enlever tout le texte explicatif ligne par ligne
-        lines = response.split("\n")
-        code_lines = []
-        code_started = False
-        
-        # Patterns à ignorer (AUGMENTÉS)
-        ignore_patterns = [
-            r"^here'?s?\s+",
-            r"^voici\s+",
-            r"^le code",
-            r"^the code",
-            r"^corrected",
-            r"^corrigé",
-            r"^refactored",
-            r"^improved",
-            r"^\d+\.",  # Numéros de liste
-            r"^[-*]\s+",  # Puces
-            r"^this\s+",
-            r"^note:",
-            r"^explanation",
-            r"^i've",
-            r"^addresses",
-            r"^variable names",
-        ]
-        
-        for line in lines:
-            stripped = line.strip()
-            stripped_lower = stripped.lower()
-            
-            # Ignorer les lignes vides au début
-            if not code_started and not stripped:
-                continue
-            
-            # Ignorer les lignes markdown
-            if stripped in ["```python", "```py", "```", "python", "py"]:
-                continue
-            
-            # Ignorer les lignes explicatives
-            if not code_started:
-                should_ignore = False
-                for pattern in ignore_patterns:
-                    if re.match(pattern, stripped_lower):
-                        should_ignore = True
-                        break
-                
-                if should_ignore:
-                    continue
-                
-                # Détecter le VRAI début du code
-                if self._line_is_python_code(line):
-                    code_started = True
-                    code_lines.append(line)
-            else:
-                # Une fois commencé, prendre tout SAUF les explications de fin
-                should_stop = False
-                for pattern in ignore_patterns:
-                    if re.match(pattern, stripped_lower):
-                        should_stop = True
-                        break
-                
-                if should_stop:
-                    break
-                
-                code_lines.append(line)
-        
-        result = "\n".join(code_lines).strip()
-        
-        # MÉTHODE 2: Chercher les blocs markdown
-        if not result or not self._is_valid_python_code(result):
-            markdown_match = re.search(r'```(?:python|py)?\n(.*?)```', response, re.DOTALL)
-            if markdown_match:
-                result = markdown_match.group(1).strip()
-        
-        # MÉTHODE 3: Enlever tout avant "import", "def", "class", "from"
-        if not result or not self._is_valid_python_code(result):
-            for keyword in ["import ", "from ", "def ", "class "]:
-                if keyword in response:
-                    idx = response.find(keyword)
-                    result = response[idx:].strip()
-                    break
-        
-        # MÉTHODE 4: Enlever les numéros de lignes si présents
-        if result:
-            result = re.sub(r'^\d+[\.:]\s*', '', result, flags=re.MULTILINE)
-        
-        # MÉTHODE 5: Si tout échoue, retourner l'original
-        if not result or len(result) < 10:
-            print("⚠️ Extraction échouée, retour à l'original")
-            return original_response
-        
-        return result
-    
-    def _line_is_python_code(self, line):
-        """Vérifie si UNE ligne est du code Python"""
-        stripped = line.strip()
-        if not stripped:
-            return False
-        
-        # Mots-clés Python qui commencent du code
-        python_starters = [
-            "import ", "from ", "def ", "class ", "@",
-            "if ", "elif ", "else:", "for ", "while ",
-            "with ", "try:", "except ", "finally:",
-            "return ", "yield ", "raise ", "assert ",
-            "print(", "len(", "str(", "int(", "float(",
-            "#", '"""', "'''",
-        ]
-        
-        # Variables CUSTOMERS, etc.
-        if re.match(r'^[A-Z_]+\s*=', stripped):
-            return True
-        
-        return any(stripped.startswith(starter) for starter in python_starters)
-    
-    def _is_valid_python_code(self, code):
-        """
-        Vérifie si le code est du Python valide (pas juste du texte).
-        """
-        if not code or len(code.strip()) < 5:
-            return False
-        
-        lines = [l.strip() for l in code.split("\n") if l.strip()]
-        if not lines:
-            return False
-        
-        first_line = lines[0]
-        
-        # DOIT commencer par du code Python
-        if not self._line_is_python_code(first_line):
-            return False
-        
-        # NE DOIT PAS contenir de texte explicatif
-        bad_phrases = [
-            "here's", "voici", "refactored", "improved",
-            "addresses the", "i've made", "explanation"
-        ]
-        
-        first_20_chars = first_line[:20].lower()
-        if any(phrase in first_20_chars for phrase in bad_phrases):
-            return False
-        
-        # Au moins 30% des lignes doivent être du code
-        code_line_count = sum(1 for line in lines if self._line_is_python_code(line))
-        code_ratio = code_line_count / len(lines)
-        
-        return code_ratio >= 0.3
\ No newline at end of file
@@ -0,0 +1,149 @@
+# ==================== agents/type_check.py ====================
+# mypy incrémental : cache persistant ou démon dmypy partagé par le processus
+
+"""
+Un `mypy .` à froid dans un nouveau répertoire temporaire recharge typeshed
+à chaque fichier (~1 s). Modes disponibles (réglage par processus) :
+
+- "cold"   : comportement historique, aucun cache réutilisé
+- "cache"  : `mypy --cache-dir <répertoire persistant>` ; typeshed n'est
+             analysé qu'une fois pour tout le batch (défaut)
+- "daemon" : un serveur `dmypy` par processus, sur un espace de travail
+             stable (même chemin de fichier à chaque appel) pour que la
+             vérification reste incrémentale ; appels sérialisés par verrou
+"""
+
+from pathlib import Path
+import atexit
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+from core import process_control, tracing, tool_discovery
+
+
+MYPY_MODES = ("cold", "cache", "daemon")
+DEFAULT_MYPY_MODE = "cache"
+DEFAULT_MYPY_CACHE_DIR = "checkpoints/mypy_cache"
+DEFAULT_DAEMON_ROOT = "checkpoints/mypy_daemon"
+DAEMON_STOP_TIMEOUT = 10
+
+_settings = {"mode": DEFAULT_MYPY_MODE, "cache_dir": DEFAULT_MYPY_CACHE_DIR}
+_daemon = None
+_daemon_lock = threading.Lock()
+
+
+def configure(mode=DEFAULT_MYPY_MODE, cache_dir=DEFAULT_MYPY_CACHE_DIR):
+    """Choisit le mode mypy du processus (voir MYPY_MODES)"""
+    if mode not in MYPY_MODES:
+        raise ValueError(f"Mode mypy inconnu: {mode} (attendu: {', '.join(MYPY_MODES)})")
+    _settings["mode"] = mode
+    _settings["cache_dir"] = cache_dir
+
+
+def mypy_mode():
+    return _settings["mode"]
+
+
+def cache_args():
+    """Arguments mypy du mode courant (cache persistant en chemin absolu)"""
+    if _settings["mode"] == "cold":
+        return []
+    return ["--cache-dir", str(Path(_settings["cache_dir"]).resolve())]
+
+
+class MypyDaemon:
+    """Serveur dmypy sur un espace de travail stable, propre au processus"""
+
+    def __init__(self, root=DEFAULT_DAEMON_ROOT):
+        # Un espace par processus : les workers d'un batch ne partagent pas leur démon
+        self.workspace = Path(root).resolve() / str(os.getpid())
+        self._lock = threading.Lock()
+        self.started = False
+
+    def check(self, source_path: Path):
+        """
+        Vérifie un fichier en le copiant sous le même nom dans l'espace stable.
+
+        Returns:
+            tuple: (status_code, output, error_message) comme StaticTools.run
+        """
+        target = self.workspace / source_path.name
+        cmd = ["dmypy", "run", "--", target.name]
+        timeout = process_control.timeout_for("dmypy")
+        with self._lock:
+            self.workspace.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(source_path, target)
+            start = time.perf_counter()
+            try:
+                with tracing.span("tool:dmypy", "subprocess", cmd=" ".join(cmd), timeout=round(timeout, 1)):
+                    code, stdout, stderr = process_control.run_in_group(
+                        cmd,
+                        cwd=self.workspace,
+                        timeout=timeout,
+                        limits=self._limits()
+                    )
+            except subprocess.TimeoutExpired:
+                process_control.record("dmypy", timeout)
+                # Le démon peut avoir démarré (ou tourner encore) hors du groupe tué
+                self.stop(force=True)
+                return -1, "", f"Timeout : commande dmypy trop longue ({timeout:.0f}s)"
+            except Exception as e:
+                return -1, "", f"Erreur d'exécution : {str(e)}"
+            process_control.record("dmypy", time.perf_counter() - start)
+            self.started = True
+
+        # "Daemon started" / "Restarting: ..." : messages du démon, pas du typage
+        lines = [
+            line for line in (stdout + "\n" + stderr).splitlines()
+            if not line.startswith(("Daemon started", "Restarting:", "Daemon stopped"))
+        ]
+        return code, "\n".join(lines).strip(), ""
+
+    @staticmethod
+    def _limits():
+        """
+        Limites des outils, sans la limite CPU : le démon lancé par le premier
+        appel en hérite et cumule son temps CPU sur tout le batch.
+        """
+        limits = process_control.tool_limits()
+        if not limits:
+            return None
+        limits = {name: value for name, value in limits.items() if name != "cpu_s"}
+        return limits or None
+
+    def stop(self, force=False):
+        """Arrête le démon (force : même s'il n'a jamais répondu, ex. après un timeout)"""
+        if not self.started and not force:
+            return
+        for action in ("stop", "kill"):
+            try:
+                code, _, _ = process_control.run_in_group(
+                    ["dmypy", action], cwd=self.workspace, timeout=DAEMON_STOP_TIMEOUT
+                )
+            except (OSError, subprocess.TimeoutExpired):
+                continue
+            if code == 0:
+                break
+        self.started = False
+
+    def close(self):
+        """Arrête le démon et supprime l'espace de travail du processus"""
+        self.stop()
+        shutil.rmtree(self.workspace, ignore_errors=True)
+
+
+def get_daemon():
+    """Démon du processus (créé au premier usage, arrêté à la sortie)"""
+    global _daemon
+    with _daemon_lock:
+        if _daemon is None:
+            _daemon = MypyDaemon()
+            atexit.register(_daemon.close)
+        return _daemon
+
+
+def daemon_available():
+    return _settings["mode"] == "daemon" and tool_discovery.is_available("dmypy")
@@ -0,0 +1,146 @@
+# ==================== agents/validation_cache.py ====================
+# Cache des rapports TestAgent, adressé par le contenu
+
+"""
+Un même code (proposition inchangée re-testée, batch relancé) produit le
+même rapport tant que la chaîne d'outils ne change pas. Clé :
+(langage, empreinte du code, versions des outils, configuration).
+
+- niveau mémoire : LRU borné (OrderedDict), partagé par le processus
+- niveau disque : un fichier JSON par clé sous checkpoints/validation_cache,
+  partagé entre processus et entre exécutions
+- les rapports touchés par un timeout ne sont pas mis en cache (transitoire)
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+import copy
+import hashlib
+import json
+import os
+import threading
+
+from core import tool_discovery
+
+try:
+    import black
+except ImportError:
+    black = None
+
+
+# À incrémenter quand la structure du rapport TestAgent change
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = "checkpoints/validation_cache"
+DEFAULT_MAX_ENTRIES = 512
+
+
+def toolchain_versions(language):
+    """Versions des outils qui interviennent dans la validation du langage"""
+    registry = tool_discovery.get_registry()
+    versions = {tool: registry.version(tool) for tool in tool_discovery.TOOLS_BY_LANGUAGE.get(language, [])}
+    if language == "python":
+        # Black est appelé en bibliothèque : c'est sa version importée qui compte
+        versions["black"] = getattr(black, "__version__", versions.get("black"))
+    return versions
+
+
+def cache_key(language, code, config=None):
+    payload = {
+        "version": CACHE_VERSION,
+        "language": language,
+        "code": hashlib.sha256(code.encode("utf-8", errors="ignore")).hexdigest(),
+        "tools": toolchain_versions(language),
+        "config": config or {},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def is_cacheable(report):
+    """Un timeout est transitoire : le rapport ne doit pas être réutilisé"""
+    return not any("Timeout" in (detail.get("error") or "") for detail in report.get("details", []))
+
+
+class ValidationCache:
+    """Cache à deux niveaux (LRU mémoire + disque) des rapports de validation"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _remember(self, key, report):
+        self._memory[key] = report
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """
+        Returns:
+            tuple: (copie du rapport, niveau "memory" | "disk") ou (None, None)
+        """
+        with self._lock:
+            report = self._memory.get(key)
+            if report is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return copy.deepcopy(report), "memory"
+
+        if self.cache_dir is not None:
+            try:
+                report = json.loads(self._path(key).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                report = None
+            if report is not None:
+                with self._lock:
+                    self._remember(key, report)
+                    self.stats["disk_hits"] += 1
+                return copy.deepcopy(report), "disk"
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None, None
+
+    def put(self, key, report):
+        report = copy.deepcopy(report)
+        with self._lock:
+            self._remember(key, report)
+        if self.cache_dir is None:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_text(json.dumps(report, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError):
+            pass  # cache best-effort : le rapport reste valide en mémoire
+
+
+_settings = {"enabled": True, "cache_dir": DEFAULT_CACHE_DIR, "max_entries": DEFAULT_MAX_ENTRIES}
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def configure(enabled=True, cache_dir=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES):
+    """Active/désactive le cache du processus (cache_dir=None : mémoire seule)"""
+    global _cache
+    with _cache_lock:
+        _settings.update(enabled=enabled, cache_dir=cache_dir, max_entries=max_entries)
+        _cache = None
+
+
+def get_cache():
+    """Cache du processus, ou None s'il est désactivé"""
+    global _cache
+    with _cache_lock:
+        if not _settings["enabled"]:
+            return None
+        if _cache is None:
+            _cache = ValidationCache(_settings["cache_dir"], _settings["max_entries"])
+        return _cache
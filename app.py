@@ -121,6 +121,13 @@ with st.sidebar:
         index=0
     )
     
+    # Préchargement en arrière-plan du modèle choisi : le premier refactoring
+    # ne paie pas le chargement à froid
+    if st.session_state.get("warmed_model") != model_name:
+        from core.ollama_llm_client import OllamaLLMClient
+        OllamaLLMClient(model_name).warm_up_async()
+        st.session_state.warmed_model = model_name
+    
     st.divider()
     
     # Section : Agents disponibles
@@ -556,7 +563,7 @@ if st.session_state.get('initialized', False):
                             with tab1:
                                 if analysis:
                                     for i, issue in enumerate(analysis, 1):
-                                        st.code(issue)
+                                        st.code(issue.get("note", "") if isinstance(issue, dict) else issue)
                                 else:
                                     st.info("Aucun problème détecté")
                             
@@ -0,0 +1,69 @@
+# ==================== benchmarks/fake_llm.py ====================
+# Client LLM factice et déterministe pour mesurer le coût du framework seul
+
+import threading
+import time
+
+from core.llm_usage import record_usage
+
+
+class FakeLLMClient:
+    """
+    Remplace OllamaLLMClient : même interface (ask, list_models, test_connection),
+    réponses prédéfinies et latence configurable.
+
+    Réponse par défaut : le code reçu, renvoyé dans un bloc ```python (un
+    refactoring "identité"), ce qui garde le pipeline complet (extraction,
+    merge, patch, test) sur du code valide. Pour MergeAgent, seul le code
+    original (avant les propositions) est renvoyé.
+    """
+
+    MERGE_MARKER = "\n\nFusionne les modifications suivantes"
+
+    def __init__(self, latency=0.0, responses=None, model_name="fake-llm"):
+        """
+        Args:
+            latency: Latence simulée par appel (secondes)
+            responses: {fragment du prompt système: réponse} prioritaires sur l'écho
+        """
+        self.latency = latency
+        self.responses = responses or {}
+        self.model_name = model_name
+        self.calls = 0
+        self.prompt_chars = 0
+        self._lock = threading.Lock()
+
+    def ask(self, system_prompt, user_prompt, temperature=None, max_tokens=2000):
+        with self._lock:
+            self.calls += 1
+            self.prompt_chars += len(system_prompt) + len(user_prompt)
+        if self.latency:
+            time.sleep(self.latency)
+
+        response = next(
+            (text for fragment, text in self.responses.items() if fragment in system_prompt),
+            None
+        )
+        if response is None:
+            code = user_prompt.split(self.MERGE_MARKER, 1)[0]
+            response = f"```python\n{code}\n```"
+
+        # Compteurs synthétiques au format Ollama (~4 caractères par token)
+        record_usage({
+            "prompt_tokens": (len(system_prompt) + len(user_prompt)) // 4,
+            "completion_tokens": len(response) // 4,
+            "decode_s": self.latency,
+            "total_s": self.latency,
+        })
+        return response
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.prompt_chars = 0
+
+    def list_models(self):
+        return [self.model_name]
+
+    def test_connection(self):
+        return True
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Benchmarks du pipeline de refactoring, sans modèle.
+
+Le client LLM est remplacé par FakeLLMClient (réponses prédéfinies, latence
+configurable) : seules restent les durées propres au framework
+(orchestration, injection GraphRAG, nettoyage PatchAgent, outillage TestAgent).
+
+Suites :
+- orchestrator : Orchestrator classique, étape par étape (agents, merge, patch, test)
+- langgraph    : LangGraphOrchestrator.run_workflow + durées par nœud
+- graphrag     : chargement du store + GraphRAGRetriever.retrieve
+- test_agent   : TestAgent.analyze
+
+Pour chaque étape : médiane / p95 (ms), pic mémoire (tracemalloc, passe
+séparée pour ne pas fausser les temps), débit en fichiers/s.
+
+Usage:
+    python benchmarks/run_benchmarks.py                    # mesure + comparaison à la baseline
+    python benchmarks/run_benchmarks.py --save-baseline    # (ré)enregistre la baseline
+    python benchmarks/run_benchmarks.py --suites orchestrator,test_agent --repeat 5 --latency 0.05
+
+Code de sortie 1 si une étape régresse au-delà des seuils.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+# Ajouter le répertoire parent au path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from benchmarks.fake_llm import FakeLLMClient
+
+SUITES = ["orchestrator", "langgraph", "graphrag", "test_agent"]
+DEFAULT_BASELINE = Path(current_dir) / "baselines" / "baseline.json"
+DEFAULT_OUTPUT = Path(current_dir) / "results" / "latest.json"
+
+# Seuils de régression : ratio ET écart absolu doivent être dépassés
+# (les étapes de quelques millisecondes sont trop bruitées pour un ratio seul)
+TIME_RATIO = 1.25
+TIME_MIN_DELTA_MS = 5.0
+MEMORY_RATIO = 1.5
+MEMORY_MIN_DELTA_KB = 256
+
+
+class StageRecorder:
+    """Durées (et pics mémoire en passe tracée) par étape nommée"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.peaks = defaultdict(int)
+        self.tracing = False
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        if self.tracing:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.tracing:
+                peak = tracemalloc.get_traced_memory()[1] - base
+                self.peaks[name] = max(self.peaks[name], peak)
+            else:
+                self.samples[name].append(time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        """Durée mesurée ailleurs (ex. durée d'un nœud LangGraph)"""
+        if not self.tracing:
+            self.samples[name].append(seconds)
+
+    def summary(self):
+        stages = {}
+        for name, values in self.samples.items():
+            ordered = sorted(values)
+            stages[name] = {
+                "count": len(values),
+                "mean_ms": statistics.fmean(values) * 1000,
+                "median_ms": statistics.median(values) * 1000,
+                "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                "peak_kb": self.peaks.get(name, 0) / 1024,
+            }
+        return stages
+
+
+# ========== SUITES ==========
+
+def bench_orchestrator(llm, files, recorder, agents):
+    from core.orchestrator import Orchestrator
+
+    orchestrator = Orchestrator(llm)
+    agents = agents or [
+        a for a in orchestrator.agent_instances if a not in ["TestAgent", "PatchAgent"]
+    ]
+
+    def run(code):
+        results = []
+        for name in agents:
+            with recorder.stage(f"orchestrator.{name}"):
+                results.append(orchestrator.agent_instances[name].apply(code, "Python", temperature=0.3))
+        with recorder.stage("orchestrator.merge"):
+            merged = orchestrator.merge_results(code, results)
+        with recorder.stage("orchestrator.PatchAgent"):
+            merged = orchestrator.agent_instances["PatchAgent"].apply(merged, "Python")["proposal"]
+        with recorder.stage("orchestrator.TestAgent"):
+            orchestrator.agent_instances["TestAgent"].apply(merged, "Python")
+
+    return run
+
+
+def bench_langgraph(llm, files, recorder, agents):
+    from core.langgraph_orchestrator import LangGraphOrchestrator
+
+    orchestrator = LangGraphOrchestrator(llm)
+    agents = agents or orchestrator.get_refactoring_agents()
+
+    def run(code):
+        with recorder.stage("langgraph.workflow"):
+            result = orchestrator.run_workflow(code=code, language="Python", selected_agents=agents)
+        if not result.get("success"):
+            raise RuntimeError(result.get("error", "workflow échoué"))
+        for agent_result in result.get("agent_results", []):
+            recorder.add(f"langgraph.{agent_result['name']}", agent_result.get("duration", 0))
+
+    return run
+
+
+def bench_graphrag(llm, files, recorder, agents):
+    from core.graphrag_retriever import GraphRAGRetriever
+
+    with recorder.stage("graphrag.load"):
+        retriever = GraphRAGRetriever()
+
+    def run(code):
+        # Même requête que BaseAgent._inject_graphrag
+        query = f"Language: Python\nAgent: ComplexityAgent\nCode snippet: {code[:600]}"
+        with recorder.stage("graphrag.retrieve"):
+            pack = retriever.retrieve(query=query, k_seeds=4, hops=2, max_chunks=6)
+        with recorder.stage("graphrag.format_context"):
+            retriever.format_context(pack)
+
+    return run
+
+
+def bench_test_agent(llm, files, recorder, agents):
+    from agents.test_agent import TestAgent
+
+    agent = TestAgent(llm)
+
+    def run(code):
+        with recorder.stage("test_agent.analyze"):
+            agent.analyze(code, "Python")
+
+    return run
+
+
+SUITE_BUILDERS = {
+    "orchestrator": bench_orchestrator,
+    "langgraph": bench_langgraph,
+    "graphrag": bench_graphrag,
+    "test_agent": bench_test_agent,
+}
+
+
+def run_suite(name, files, latency, repeat, agents, verbose=False):
+    """Exécute une suite : échauffement, passes chronométrées, passe mémoire"""
+    llm = FakeLLMClient(latency=latency)
+    recorder = StageRecorder()
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+    try:
+        with output:
+            run = SUITE_BUILDERS[name](llm, files, recorder, agents)
+            codes = [path.read_text(encoding="utf-8") for path in files]
+
+            # Échauffement (imports paresseux, détection des outils...) non mesuré
+            recorder.tracing = True
+            run(codes[0])
+            recorder.peaks.clear()
+            recorder.tracing = False
+
+            llm.reset()
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for code in codes:
+                    run(code)
+            elapsed = time.perf_counter() - start
+            llm_calls = llm.calls
+
+            # Passe mémoire séparée : tracemalloc ralentit fortement l'exécution
+            recorder.tracing = True
+            tracemalloc.start()
+            try:
+                for code in codes:
+                    run(code)
+            finally:
+                tracemalloc.stop()
+                recorder.tracing = False
+    except ImportError as e:
+        return {"status": "skipped", "reason": f"dépendance manquante: {e}"}
+    except Exception as e:
+        return {"status": "error", "reason": f"{type(e).__name__}: {e}"}
+
+    processed = repeat * len(files)
+    return {
+        "status": "ok",
+        "files_processed": processed,
+        "duration_s": elapsed,
+        "throughput_files_per_s": processed / elapsed if elapsed else 0.0,
+        "llm_calls_per_file": llm_calls / processed,
+        "stages": recorder.summary(),
+    }
+
+
+# ========== BASELINE ==========
+
+def compare(current, baseline, time_ratio=TIME_RATIO, memory_ratio=MEMORY_RATIO):
+    """Étapes dont la médiane ou le pic mémoire régresse au-delà des seuils"""
+    regressions = []
+    for suite, result in current["suites"].items():
+        base_suite = baseline.get("suites", {}).get(suite, {})
+        if result.get("status") != "ok" or base_suite.get("status") != "ok":
+            continue
+        for stage, stats in result["stages"].items():
+            base = base_suite["stages"].get(stage)
+            if not base:
+                continue
+            delta_ms = stats["median_ms"] - base["median_ms"]
+            if stats["median_ms"] > base["median_ms"] * time_ratio and delta_ms > TIME_MIN_DELTA_MS:
+                regressions.append(
+                    f"{stage}: médiane {base['median_ms']:.1f}ms → {stats['median_ms']:.1f}ms"
+                )
+            delta_kb = stats["peak_kb"] - base["peak_kb"]
+            if stats["peak_kb"] > base["peak_kb"] * memory_ratio and delta_kb > MEMORY_MIN_DELTA_KB:
+                regressions.append(
+                    f"{stage}: mémoire {base['peak_kb']:.0f}KB → {stats['peak_kb']:.0f}KB"
+                )
+    return regressions
+
+
+def print_report(report):
+    print(f"\n{'='*78}")
+    print(f"{'Étape':40s} {'n':>5s} {'médiane':>10s} {'p95':>10s} {'mémoire':>10s}")
+    print(f"{'='*78}")
+    for suite, result in report["suites"].items():
+        if result["status"] != "ok":
+            print(f"⏭️  {suite}: {result['status']} ({result['reason']})")
+            continue
+        print(f"📦 {suite}: {result['throughput_files_per_s']:.2f} fichiers/s, "
+              f"{result['llm_calls_per_file']:.1f} appels LLM/fichier")
+        for stage, stats in sorted(result["stages"].items()):
+            print(f"   {stage:37s} {stats['count']:5d} {stats['median_ms']:8.1f}ms "
+                  f"{stats['p95_ms']:8.1f}ms {stats['peak_kb']:8.0f}KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks du pipeline (LLM factice)")
+    parser.add_argument("--suites", default=",".join(SUITES), help="Suites à exécuter")
+    parser.add_argument("--files", default=os.path.join(parent_dir, "bad_codes", "*.py"), help="Glob des fichiers")
+    parser.add_argument("--agents", default=None, help="Agents de refactoring (défaut: tous)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latence simulée par appel LLM (s)")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes chronométrées par fichier")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Fichier de baseline JSON")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT), help="Rapport JSON de ce run")
+    parser.add_argument("--save-baseline", action="store_true", help="Enregistrer ce run comme baseline")
+    parser.add_argument("--time-threshold", type=float, default=TIME_RATIO, help="Ratio de régression (temps)")
+    parser.add_argument("--memory-threshold", type=float, default=MEMORY_RATIO, help="Ratio de régression (mémoire)")
+    parser.add_argument("--verbose", action="store_true", help="Afficher la sortie des agents")
+    args = parser.parse_args()
+
+    pattern = Path(args.files)
+    files = sorted(pattern.parent.glob(pattern.name))
+    if not files:
+        print(f"❌ Aucun fichier: {args.files}")
+        return 2
+
+    suites = [s.strip() for s in args.suites.split(",") if s.strip()]
+    unknown = [s for s in suites if s not in SUITE_BUILDERS]
+    if unknown:
+        print(f"❌ Suites inconnues: {', '.join(unknown)} (disponibles: {', '.join(SUITES)})")
+        return 2
+    agents = args.agents.split(",") if args.agents else None
+
+    print(f"⏱️  Benchmarks: {len(files)} fichiers × {args.repeat} passes, latence LLM {args.latency * 1000:.0f}ms")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "files": [f.name for f in files],
+            "repeat": args.repeat,
+            "latency": args.latency,
+        },
+        "suites": {},
+    }
+    for suite in suites:
+        print(f"  🚀 {suite}...")
+        report["suites"][suite] = run_suite(suite, files, args.latency, args.repeat, agents, args.verbose)
+
+    print_report(report)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\n📝 Rapport: {output}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"💾 Baseline enregistrée: {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(f"ℹ️  Pas de baseline ({baseline_path}) : relancer avec --save-baseline")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    if baseline["meta"].get("latency") != args.latency:
+        print("⚠️  Latence LLM différente de la baseline : comparaison peu significative")
+    regressions = compare(report, baseline, args.time_threshold, args.memory_threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} régression(s) par rapport à la baseline:")
+        for line in regressions:
+            print(f"   - {line}")
+        return 1
+    print("\n✅ Aucune régression par rapport à la baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
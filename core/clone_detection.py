@@ -0,0 +1,390 @@
+"""
+Détection de clones par hachage de sous-arbres AST normalisés.
+
+Chaque nœud est haché une seule fois, de bas en haut, à partir de son type,
+de ses attributs normalisés (identifiants et littéraux abstraits) et des
+hashes de ses enfants : le coût est linéaire en nombre de nœuds.
+
+Les fragments candidats sont :
+- les statements composés (def, class, if, for, while, with, try...)
+- les fenêtres de statements consécutifs d'un même bloc
+
+Les fragments de même hash forment une classe de clones. Pour un projet,
+les fragments sont stockés dans un index SQLite persistant : seuls les
+fichiers modifiés (mtime/taille) sont re-hachés entre deux passes.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import ast
+import hashlib
+import sqlite3
+
+
+DEFAULT_INDEX_PATH = "checkpoints/clone_index.sqlite"
+
+# Paramètres par défaut des fragments
+MIN_STATEMENTS = 3
+MIN_MASS = 20
+
+# Attributs ignorés : positions et commentaires de type
+_SKIPPED_FIELDS = {"lineno", "col_offset", "end_lineno", "end_col_offset", "type_comment"}
+# Identifiants abstraits (renommer une variable ne change pas le clone)
+_ABSTRACT_FIELDS = {
+    ast.Name: ("id",),
+    ast.arg: ("arg", "annotation"),
+    ast.FunctionDef: ("name",),
+    ast.AsyncFunctionDef: ("name",),
+    ast.ClassDef: ("name",),
+}
+_COMPOUND_NODES = (
+    ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef,
+    ast.If, ast.For, ast.AsyncFor, ast.While,
+    ast.With, ast.AsyncWith, ast.Try,
+)
+
+Location = Tuple[Optional[str], int, int]  # (fichier, ligne début, ligne fin)
+
+
+@dataclass
+class Fragment:
+    """Fragment candidat (statement composé ou fenêtre de statements)"""
+    fingerprint: str
+    path: Optional[str]
+    start: int
+    end: int
+    mass: int  # nombre de nœuds AST
+
+
+@dataclass
+class CloneClass:
+    """Ensemble de fragments de même empreinte normalisée"""
+    fingerprint: str
+    mass: int
+    locations: List[Location]
+
+
+def _digest(data: str) -> str:
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _is_declarative(stmt: ast.stmt) -> bool:
+    """Déclarations sans logique (champs annotés, imports, pass) : jamais des clones utiles"""
+    if isinstance(stmt, ast.AnnAssign) and stmt.value is None:
+        return True
+    return isinstance(stmt, (ast.Import, ast.ImportFrom, ast.Pass))
+
+
+def hash_subtrees(tree: ast.AST) -> Dict[int, Tuple[str, int]]:
+    """
+    Hash normalisé et masse de chaque sous-arbre, en un seul parcours postfixe.
+
+    Returns:
+        {id(nœud): (hash, nombre de nœuds du sous-arbre)}
+    """
+    hashes: Dict[int, Tuple[str, int]] = {}
+    stack = [(tree, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if not children_done:
+            stack.append((node, True))
+            stack.extend((child, False) for child in ast.iter_child_nodes(node))
+            continue
+
+        abstract = _ABSTRACT_FIELDS.get(type(node), ())
+        parts = [type(node).__name__]
+        mass = 1
+        for field, value in ast.iter_fields(node):
+            if field in _SKIPPED_FIELDS or field in abstract:
+                continue
+            if isinstance(value, ast.AST):
+                child_hash, child_mass = hashes[id(value)]
+                parts.append(child_hash)
+                mass += child_mass
+            elif isinstance(value, list):
+                for item in value:
+                    if isinstance(item, ast.AST):
+                        child_hash, child_mass = hashes[id(item)]
+                        parts.append(child_hash)
+                        mass += child_mass
+                    else:
+                        parts.append(repr(item))
+            elif isinstance(node, ast.Constant) and field == "value":
+                # Littéral abstrait : seul son type compte
+                parts.append(type(value).__name__)
+            elif field != "kind":
+                parts.append(repr(value))
+        hashes[id(node)] = (_digest("|".join(parts)), mass)
+    return hashes
+
+
+def _stmt_start(stmt: ast.stmt) -> int:
+    """Première ligne d'un statement (décorateurs inclus)"""
+    decorators = getattr(stmt, "decorator_list", None) or []
+    return min([stmt.lineno] + [d.lineno for d in decorators])
+
+
+def extract_fragments(
+    code: str,
+    path: Optional[str] = None,
+    min_statements: int = MIN_STATEMENTS,
+    min_mass: int = MIN_MASS
+) -> Optional[List[Fragment]]:
+    """
+    Fragments candidats d'un fichier Python.
+    Retourne None si le code n'est pas du Python valide.
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+
+    hashes = hash_subtrees(tree)
+    fragments: List[Fragment] = []
+    for node in ast.walk(tree):
+        if isinstance(node, _COMPOUND_NODES):
+            fingerprint, mass = hashes[id(node)]
+            if mass >= min_mass:
+                fragments.append(Fragment(fingerprint, path, _stmt_start(node), node.end_lineno, mass))
+
+        for field in ("body", "orelse", "finalbody"):
+            body = getattr(node, field, None)
+            if not isinstance(body, list) or len(body) < min_statements:
+                continue
+            for i in range(len(body) - min_statements + 1):
+                window = body[i:i + min_statements]
+                if all(_is_declarative(stmt) for stmt in window):
+                    continue
+                mass = sum(hashes[id(stmt)][1] for stmt in window)
+                if mass < min_mass:
+                    continue
+                fingerprint = _digest("seq:" + ":".join(hashes[id(stmt)][0] for stmt in window))
+                fragments.append(Fragment(fingerprint, path, _stmt_start(window[0]), window[-1].end_lineno, mass))
+    return fragments
+
+
+def _overlaps(a: Location, b: Location) -> bool:
+    return a[0] == b[0] and a[1] <= b[2] and b[1] <= a[2]
+
+
+def _contains(outer: Location, inner: Location) -> bool:
+    return outer[0] == inner[0] and outer[1] <= inner[1] and inner[2] <= outer[2]
+
+
+def _merge_sliding_windows(classes: List[CloneClass]) -> List[CloneClass]:
+    """Fusionne les fenêtres glissantes qui se chevauchent en un seul bloc cloné"""
+    merged: List[CloneClass] = []
+    for clone in sorted(classes, key=lambda c: (str(c.locations[0][0]), c.locations[0][1])):
+        prev = merged[-1] if merged else None
+        if (
+            prev is not None
+            and len(prev.locations) == len(clone.locations)
+            and all(
+                s[0] == p[0] and p[1] <= s[1] <= p[2]
+                for s, p in zip(clone.locations, prev.locations)
+            )
+        ):
+            prev.locations = [(p[0], p[1], max(p[2], s[2])) for s, p in zip(clone.locations, prev.locations)]
+            prev.mass = max(prev.mass, clone.mass)
+        else:
+            merged.append(CloneClass(clone.fingerprint, clone.mass, list(clone.locations)))
+    return merged
+
+
+def group_clones(fragments: Iterable[Fragment]) -> List[CloneClass]:
+    """
+    Regroupe les fragments en classes de clones maximales.
+
+    - une classe doit avoir au moins 2 occurrences qui ne se chevauchent pas
+    - les fenêtres glissantes adjacentes sont fusionnées
+    - une classe entièrement incluse dans une classe plus grande est ignorée
+    """
+    by_hash: Dict[str, List[Fragment]] = {}
+    for fragment in fragments:
+        by_hash.setdefault(fragment.fingerprint, []).append(fragment)
+
+    candidates = []
+    for fingerprint, group in by_hash.items():
+        if len(group) < 2:
+            continue
+        locations: List[Location] = []
+        for frag in sorted(group, key=lambda f: (str(f.path), f.start, -f.end)):
+            loc = (frag.path, frag.start, frag.end)
+            # Un bloc ne se duplique pas lui-même (fenêtres chevauchantes)
+            if not locations or not _overlaps(locations[-1], loc):
+                locations.append(loc)
+        if len(locations) >= 2:
+            candidates.append(CloneClass(fingerprint, max(f.mass for f in group), locations))
+
+    accepted: List[CloneClass] = []
+    covered: Dict[Optional[str], List[Location]] = {}
+    for clone in sorted(_merge_sliding_windows(candidates), key=lambda c: -c.mass):
+        if all(
+            any(_contains(outer, loc) for outer in covered.get(loc[0], ()))
+            for loc in clone.locations
+        ):
+            continue
+        accepted.append(clone)
+        for loc in clone.locations:
+            covered.setdefault(loc[0], []).append(loc)
+
+    accepted.sort(key=lambda c: (str(c.locations[0][0]), c.locations[0][1]))
+    return accepted
+
+
+def detect_clones(
+    code: str,
+    min_statements: int = MIN_STATEMENTS,
+    min_mass: int = MIN_MASS
+) -> Optional[List[CloneClass]]:
+    """Classes de clones d'un fichier (None si le code n'est pas du Python valide)"""
+    fragments = extract_fragments(code, None, min_statements, min_mass)
+    if fragments is None:
+        return None
+    return group_clones(fragments)
+
+
+# ----------------------------------------------------------------------
+# INDEX PERSISTANT (multi-fichiers)
+# ----------------------------------------------------------------------
+
+def _fragments_for_file(args) -> Tuple[str, List[Tuple]]:
+    """Worker : fragments d'un fichier sous forme de tuples (sérialisables)"""
+    path, min_statements, min_mass = args
+    try:
+        code = Path(path).read_text(encoding="utf-8", errors="ignore")
+    except OSError:
+        return path, []
+    fragments = extract_fragments(code, path, min_statements, min_mass) or []
+    return path, [(f.fingerprint, f.path, f.start, f.end, f.mass) for f in fragments]
+
+
+class CloneIndex:
+    """
+    Index SQLite des fragments de tout un projet.
+    Un fichier n'est re-haché que si son mtime ou sa taille a changé.
+    """
+
+    def __init__(
+        self,
+        index_path: str = DEFAULT_INDEX_PATH,
+        min_statements: int = MIN_STATEMENTS,
+        min_mass: int = MIN_MASS
+    ):
+        self.index_path = index_path
+        self.min_statements = min_statements
+        self.min_mass = min_mass
+        if index_path != ":memory:":
+            Path(index_path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(index_path)
+        self._init_schema()
+
+    def _init_schema(self):
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime REAL, size INTEGER);
+            CREATE TABLE IF NOT EXISTS fragments (
+                hash TEXT, path TEXT, start INTEGER, end INTEGER, mass INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_fragments_hash ON fragments(hash);
+            CREATE INDEX IF NOT EXISTS idx_fragments_path ON fragments(path);
+            """
+        )
+        # Paramètres différents : les fragments stockés ne sont plus comparables
+        params = f"{self.min_statements}:{self.min_mass}"
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'params'").fetchone()
+        if row is None or row[0] != params:
+            self.conn.execute("DELETE FROM files")
+            self.conn.execute("DELETE FROM fragments")
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('params', ?)", (params,))
+        self.conn.commit()
+
+    def update(self, paths: Iterable[str], workers: int = 1) -> Dict[str, int]:
+        """
+        Synchronise l'index avec la liste de fichiers (ajouts, modifications, suppressions).
+
+        Args:
+            paths: Fichiers Python du projet
+            workers: Processus utilisés pour hacher les fichiers modifiés
+
+        Returns:
+            dict: {"indexed", "unchanged", "removed"}
+        """
+        known = {
+            path: (mtime, size)
+            for path, mtime, size in self.conn.execute("SELECT path, mtime, size FROM files")
+        }
+        current = {}
+        for path in paths:
+            try:
+                stat = Path(path).stat()
+            except OSError:
+                continue
+            current[str(path)] = (stat.st_mtime, stat.st_size)
+
+        changed = [p for p, sig in current.items() if known.get(p) != sig]
+        removed = [p for p in known if p not in current]
+
+        jobs = [(p, self.min_statements, self.min_mass) for p in changed]
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_fragments_for_file, jobs, chunksize=32))
+        else:
+            results = [_fragments_for_file(job) for job in jobs]
+
+        with self.conn:
+            for path in removed + changed:
+                self.conn.execute("DELETE FROM fragments WHERE path = ?", (path,))
+                self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+            for path, rows in results:
+                self.conn.executemany("INSERT INTO fragments VALUES (?, ?, ?, ?, ?)", rows)
+                self.conn.execute("INSERT INTO files VALUES (?, ?, ?)", (path, *current[path]))
+
+        return {"indexed": len(changed), "unchanged": len(current) - len(changed), "removed": len(removed)}
+
+    def clone_classes(self) -> List[CloneClass]:
+        """Classes de clones de tout l'index (seuls les hashes répétés sont relus)"""
+        rows = self.conn.execute(
+            """
+            SELECT hash, path, start, end, mass FROM fragments
+            WHERE hash IN (SELECT hash FROM fragments GROUP BY hash HAVING COUNT(*) >= 2)
+            """
+        )
+        return group_clones(Fragment(*row) for row in rows)
+
+    def close(self):
+        self.conn.close()
+
+
+def find_project_clones(
+    root: str,
+    index_path: str = DEFAULT_INDEX_PATH,
+    workers: int = 1,
+    pattern: str = "**/*.py"
+) -> List[CloneClass]:
+    """Clones inter-fichiers d'un répertoire, via l'index persistant"""
+    index = CloneIndex(index_path)
+    try:
+        paths = [p.as_posix() for p in Path(root).glob(pattern) if p.is_file()]
+        stats = index.update(paths, workers=workers)
+        print(
+            f"🔎 Index des clones: {stats['indexed']} fichiers hachés, "
+            f"{stats['unchanged']} inchangés, {stats['removed']} supprimés"
+        )
+        return index.clone_classes()
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    root = sys.argv[1] if len(sys.argv) > 1 else "."
+    for clone in find_project_clones(root, workers=4):
+        places = ", ".join(f"{path}:{start}-{end}" for path, start, end in clone.locations)
+        print(f"♻️  {len(clone.locations)} clones (masse {clone.mass}): {places}")
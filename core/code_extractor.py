@@ -0,0 +1,318 @@
+"""
+Extraction du code d'une réponse LLM, en une seule passe sur les lignes.
+
+Une machine à états (prose / bloc ``` / code sans balise) découpe la réponse
+en blocs candidats ; chaque ligne n'appartient qu'à un bloc et n'est vue
+qu'une fois. Le meilleur bloc est retenu au fil de l'eau :
+
+1. bloc ``` du langage demandé, puis bloc ``` sans langage, puis code sans
+   balise (un bloc ``` d'un autre langage, ex. bash, n'est retenu qu'à défaut)
+2. pour Python, bloc que `tokenize` accepte (chaînes et parenthèses fermées)
+3. bloc le plus long en lignes de code
+
+Réponse en plusieurs blocs ``` du langage demandé, ex. imports puis
+fonctions : les blocs sont concaténés si aucun ne redéfinit une fonction/classe
+d'un bloc précédent (deux versions du même code) et, pour Python, si le
+résultat passe `ast.parse` ; la concaténation prime alors sur chaque bloc.
+Sont exclus de la concaténation les blocs annoncés par une phrase d'exemple
+ou d'utilisation, et ceux qui ne contiennent que des appels/expressions au
+niveau module (`print(add(1, 2))`) : ils changeraient le comportement.
+
+`CodeExtractor.feed` accepte la réponse par morceaux (tokens d'un flux) ;
+`extract` / `extract_code` traitent une réponse complète.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional
+import ast
+import io
+import re
+import textwrap
+import tokenize
+
+
+@dataclass
+class ExtractedCode:
+    """Bloc de code retenu dans une réponse"""
+    code: str
+    fenced: bool     # issu d'un bloc ```
+    language: str    # langage annoncé par le bloc ("" si aucun)
+    valid: bool      # Python : tokenize sans erreur (autres langages : True)
+    code_lines: int
+
+
+# Balises de bloc -> langage (noms de langage du projet en minuscules)
+LANGUAGE_TAGS = {
+    "python": "python", "py": "python", "python3": "python",
+    "javascript": "javascript", "js": "javascript", "jsx": "javascript", "node": "javascript",
+    "typescript": "typescript", "ts": "typescript", "tsx": "typescript",
+    "java": "java",
+    "go": "go", "golang": "go",
+    "ruby": "ruby", "rb": "ruby",
+}
+
+_FENCE_RE = re.compile(r"^\s*(`{3,}|~{3,})\s*([\w+#.-]*)")
+
+# Début d'instruction Python sans ambiguïté
+_PY_CODE_RE = re.compile(r"""^(?:
+    (?:import|pass|break|continue|global|nonlocal|del|await|yield)\b
+  | from\s+[\w.]+\s+import\b
+  | (?:return|raise|assert)\b(?!\s+(?:the|a|an|it|this)\b)
+  | @[\w.]+
+  | \#
+  | [rbuf]?(?:\"\"\"|''')
+  | [\w.]+(?:\[[^\]]*\])?(?:\s*,\s*[\w.]+)*\s*(?::[^=]+)?(?://|\*\*|>>|<<|[-+*/%&|^@])?=(?!=)
+  | [\w.]+\s*\(
+  | [)\]}]
+)""", re.VERBOSE)
+
+# Instruction composée : mot-clé ... ':' en fin de ligne (hors commentaire)
+_PY_COMPOUND_RE = re.compile(
+    r"^(?:async\s+)?(?:def|class|if|elif|else|for|while|with|try|except|finally|match|case)\b.*:\s*(?:#.*)?$"
+)
+
+# Autres langages (JS/TS, Java, Go, Ruby)
+_OTHER_CODE_RE = re.compile(r"""^(?:
+    (?:function|const|let|var|public|private|protected|static|final|abstract|package|func|import|export|
+       class|interface|enum|type|return|if|else|for|while|switch|case|try|catch|throw|new|def|end|module|
+       require|async|await)\b
+  | //|/\*|\*/
+  | [})\]]
+  | @\w
+)""", re.VERBOSE)
+_OTHER_CODE_END_RE = re.compile(r"(?:[;{}]|=>)\s*$")
+
+# Phrases d'introduction / de conclusion du LLM
+_PROSE_RE = re.compile(
+    r"^(?:here'?s?\b|here is|voici|le code|the code|corrected|corrigé|refactored|improved|"
+    r"\d+\.\s|[-*]\s+|this\s|note:|explanation|explication|i've|i have|addresses|"
+    r"variable names|changes|modifications|#{1,6}\s|\*\*)",
+    re.IGNORECASE
+)
+# Phrase annonçant un exemple d'utilisation (bloc à ne pas concaténer)
+_EXAMPLE_RE = re.compile(
+    r"\b(?:example|exemple|usage|utilisation|utiliser|to use|to run|to test|you can (?:call|use|run|test)|"
+    r"install|output|sortie|résultat)\b",
+    re.IGNORECASE
+)
+_PY_DEFINITION_RE = re.compile(r"^(?:async\s+)?(?:def|class)\s+(\w+)", re.MULTILINE)
+_CODE_PUNCT_RE = re.compile(r"[=(){}\[\];]")
+_TRIPLE_QUOTE_RE = re.compile(r"\"\"\"|'''")
+
+
+def _normalize(language: Optional[str]) -> str:
+    language = (language or "").lower()
+    return LANGUAGE_TAGS.get(language, language)
+
+
+def _sentence(stripped: str) -> bool:
+    """Phrase en langue naturelle : au moins 3 mots, sans ponctuation de code"""
+    return (
+        stripped[:1].isalpha()
+        and len(stripped.split(None, 2)) > 2
+        and not _CODE_PUNCT_RE.search(stripped)
+    )
+
+
+def parses(code: str) -> bool:
+    """ast.parse accepte le code"""
+    try:
+        ast.parse(code)
+    except (SyntaxError, ValueError):
+        return False
+    return True
+
+
+def _only_expressions(code: str) -> bool:
+    """Bloc Python fait uniquement d'expressions au niveau module (appels, valeurs)"""
+    try:
+        body = ast.parse(code).body
+    except (SyntaxError, ValueError):
+        return False
+    return bool(body) and all(isinstance(node, ast.Expr) for node in body)
+
+
+def tokenizes(code: str) -> bool:
+    """tokenize accepte le code (chaînes, parenthèses et indentation cohérentes)"""
+    try:
+        for _ in tokenize.generate_tokens(io.StringIO(code).readline):
+            pass
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return False
+    return True
+
+
+class CodeExtractor:
+    """
+    Extracteur incrémental : feed(morceau)... puis close().
+
+    `complete` passe à True dès qu'un bloc ``` du langage demandé est fermé ;
+    des blocs suivants peuvent encore s'y ajouter (voir close()).
+    """
+
+    # Prose < code sans balise < bloc ``` sans langage < bloc ``` du langage
+    _RANK_OTHER_FENCE, _RANK_RUN, _RANK_UNTAGGED_FENCE, _RANK_TAGGED_FENCE = range(4)
+
+    def __init__(self, language: Optional[str] = "python"):
+        self.language = _normalize(language)
+        self.python = self.language == "python"
+        self.complete = False
+        self._partial = ""
+        self._state = "prose"  # "prose" | "run" | "fence"
+        self._lines: List[str] = []
+        self._fence = ""
+        self._tag = ""
+        self._in_string = False
+        self._best = None  # (clé de tri, ExtractedCode)
+        self._fenced_blocks: List[ExtractedCode] = []  # blocs ``` du langage, candidats à la concaténation
+        self._last_prose = ""    # dernière ligne de prose lue
+        self._example = False    # bloc courant annoncé comme exemple
+
+    # ------------------------------------------------------------------
+    # Entrée
+    # ------------------------------------------------------------------
+
+    def feed(self, chunk: str) -> "CodeExtractor":
+        """Ajoute un morceau de réponse ; seules les lignes complètes sont traitées"""
+        if not chunk:
+            return self
+        pieces = (self._partial + chunk).split("\n")
+        self._partial = pieces.pop()
+        for line in pieces:
+            self._line(line.rstrip("\r"))
+        return self
+
+    def close(self) -> Optional[ExtractedCode]:
+        """Termine la réponse et renvoie le meilleur bloc (None si aucun code)"""
+        if self._partial:
+            self._line(self._partial.rstrip("\r"))
+            self._partial = ""
+        self._finish(closed=False)
+        combined = self._combined()
+        if combined is not None:
+            return combined
+        return self._best[1] if self._best else None
+
+    def _combined(self) -> Optional[ExtractedCode]:
+        """Concaténation des blocs ``` du langage, si elle forme un tout cohérent"""
+        blocks = self._fenced_blocks
+        if self.python:
+            blocks = [block for block in blocks if not _only_expressions(block.code)]
+        if len(blocks) < 2:
+            return None
+        if self.python:
+            defined = set()
+            for block in blocks:
+                names = set(_PY_DEFINITION_RE.findall(block.code))
+                if names & defined:
+                    return None  # même fonction/classe dans deux blocs : versions alternatives
+                defined |= names
+        code = "\n\n".join(block.code for block in blocks)
+        if self.python and not parses(code):
+            return None
+        return ExtractedCode(code, True, self.language, True, sum(block.code_lines for block in blocks))
+
+    # ------------------------------------------------------------------
+    # Machine à états
+    # ------------------------------------------------------------------
+
+    def _line(self, line: str):
+        if self._state == "fence":
+            stripped = line.strip()
+            if stripped.startswith(self._fence) and not stripped.strip(self._fence[0]):
+                self._finish(closed=True)
+                self._last_prose = ""  # un bloc suivant sans phrase n'est pas un exemple
+            else:
+                self._lines.append(line)
+            return
+
+        match = _FENCE_RE.match(line)
+        if match:
+            self._finish(closed=True)
+            self._state = "fence"
+            self._fence = match.group(1)
+            self._tag = _normalize(match.group(2))
+            self._example = bool(_EXAMPLE_RE.search(self._last_prose))
+            return
+
+        stripped = line.strip()
+        if self._state == "prose":
+            if stripped and stripped.lower() not in LANGUAGE_TAGS and self._is_code(stripped):
+                self._state = "run"
+                self._in_string = False
+                self._append_run(line)
+            elif stripped:
+                self._last_prose = stripped
+            return
+
+        # Code sans balise : continue jusqu'à une ligne de prose au niveau 0
+        if self._in_string or not stripped or line[0].isspace() or not self._is_prose(stripped):
+            self._append_run(line)
+        else:
+            self._finish(closed=True)
+            self._last_prose = stripped
+
+    def _append_run(self, line: str):
+        self._lines.append(line)
+        # Chaîne triple ouverte : ses lignes ne sont jamais de la prose
+        if self.python and len(_TRIPLE_QUOTE_RE.findall(line)) % 2:
+            self._in_string = not self._in_string
+
+    def _is_code(self, stripped: str) -> bool:
+        if self.python:
+            return bool(_PY_CODE_RE.match(stripped) or _PY_COMPOUND_RE.match(stripped))
+        return bool(_OTHER_CODE_RE.match(stripped) or _OTHER_CODE_END_RE.search(stripped))
+
+    def _is_prose(self, stripped: str) -> bool:
+        if self._is_code(stripped):
+            return False
+        return bool(_PROSE_RE.match(stripped)) or (_sentence(stripped) and stripped[-1] in ".:!?")
+
+    def _finish(self, closed: bool):
+        """Termine le bloc courant et le compare au meilleur bloc connu"""
+        state, lines = self._state, self._lines
+        self._state, self._lines = "prose", []
+        if state == "prose":
+            return
+
+        while lines and not lines[-1].strip():
+            lines.pop()
+        code = textwrap.dedent("\n".join(lines)).strip("\n")
+        code_lines = sum(1 for line in lines if line.strip())
+        if not code_lines:
+            return
+
+        fenced = state == "fence"
+        tag = self._tag if fenced else ""
+        if not fenced:
+            rank = self._RANK_RUN
+        elif not tag:
+            rank = self._RANK_UNTAGGED_FENCE
+        elif tag == self.language:
+            rank = self._RANK_TAGGED_FENCE
+        else:
+            rank = self._RANK_OTHER_FENCE
+
+        valid = tokenizes(code) if self.python else True
+        key = (rank, valid, code_lines)
+        extracted = ExtractedCode(code, fenced, tag, valid, code_lines)
+        if rank == self._RANK_TAGGED_FENCE and not self._example:
+            self._fenced_blocks.append(extracted)
+        if self._best is None or key > self._best[0]:
+            self._best = (key, extracted)
+        if fenced and closed and rank == self._RANK_TAGGED_FENCE and valid:
+            self.complete = True
+
+
+def extract(response: Optional[str], language: Optional[str] = "python") -> Optional[ExtractedCode]:
+    """Meilleur bloc de code d'une réponse complète (None si aucun)"""
+    return CodeExtractor(language).feed(response or "").close()
+
+
+def extract_code(response: Optional[str], language: Optional[str] = "python",
+                 default: Optional[str] = None) -> Optional[str]:
+    """Code du meilleur bloc, ou `default` si la réponse n'en contient pas"""
+    extracted = extract(response, language)
+    return extracted.code if extracted else default
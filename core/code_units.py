@@ -0,0 +1,140 @@
+"""
+Découpage d'un fichier Python en unités (fonctions/classes de premier niveau)
+pour le mode de refactoring "par hunk" : seules les unités (ou la région) signalées par
+l'analyse d'un agent sont envoyées au LLM, puis recollées par plage de lignes.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import ast
+
+from core.code_extractor import extract_code
+
+
+@dataclass
+class CodeUnit:
+    """Fonction ou classe de premier niveau avec sa plage de lignes (1-indexée, incluse)"""
+    name: str
+    kind: str  # "function" | "class"
+    start: int  # inclut les décorateurs
+    end: int
+    source: str
+
+
+
+def split_units(code: str) -> List[CodeUnit]:
+    """
+    Découpe le code en unités de premier niveau via `ast`.
+    Retourne une liste vide si le code n'est pas du Python valide.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return []
+
+    lines = code.splitlines(keepends=True)
+    units = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            kind = "function"
+        elif isinstance(node, ast.ClassDef):
+            kind = "class"
+        else:
+            continue
+
+        start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+        end = node.end_lineno
+        units.append(CodeUnit(
+            name=node.name,
+            kind=kind,
+            start=start,
+            end=end,
+            source="".join(lines[start - 1:end])
+        ))
+    return units
+
+
+def splice_units(code: str, replacements: Dict[int, str], units: List[CodeUnit]) -> str:
+    """
+    Remplace le source des unités par leur nouvelle version.
+
+    Args:
+        code: Code complet d'origine
+        replacements: {start de l'unité: nouveau source}
+        units: Unités issues de split_units(code)
+    """
+    lines = code.splitlines(keepends=True)
+    # Du bas vers le haut pour que les plages restent valides
+    for unit in sorted(units, key=lambda u: u.start, reverse=True):
+        new_source = replacements.get(unit.start)
+        if new_source is None:
+            continue
+        if not new_source.endswith("\n"):
+            new_source += "\n"
+        lines[unit.start - 1:unit.end] = [new_source]
+    return "".join(lines)
+
+
+def extract_unit_code(response: str, original: str) -> str:
+    """
+    Extrait le code d'une réponse LLM pour une unité.
+    Retourne l'unité d'origine si la réponse n'est pas du Python valide.
+    """
+    candidate = extract_code(response, "python")
+    if not candidate:
+        return original
+    try:
+        ast.parse(candidate)
+    except SyntaxError:
+        return original
+    return candidate
+
+
+def covering_region(code: str, spans: List[Tuple[int, int]]) -> Optional[CodeUnit]:
+    """
+    Plus petite suite de statements consécutifs d'un même bloc couvrant toutes
+    les plages données : elle peut être remplacée sans casser la structure.
+
+    Returns:
+        CodeUnit (kind="region"), ou None si le code n'est pas du Python valide
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+    if not spans:
+        return None
+
+    first = min(start for start, _ in spans)
+    last = max(end for _, end in spans)
+
+    def start_of(stmt):
+        return min([stmt.lineno] + [d.lineno for d in getattr(stmt, "decorator_list", [])])
+
+    body = tree.body
+    while True:
+        touched = [s for s in body if start_of(s) <= last and s.end_lineno >= first]
+        if not touched:
+            return None
+        if len(touched) == 1:
+            # Descendre dans le sous-bloc qui contient toutes les plages
+            inner = None
+            for field in ("body", "orelse", "finalbody"):
+                sub = getattr(touched[0], field, None)
+                if isinstance(sub, list) and sub and start_of(sub[0]) <= first and last <= sub[-1].end_lineno:
+                    inner = sub
+                    break
+            if inner is not None:
+                body = inner
+                continue
+        break
+
+    lines = code.splitlines(keepends=True)
+    start, end = start_of(touched[0]), touched[-1].end_lineno
+    return CodeUnit(
+        name=f"lignes {start}-{end}",
+        kind="region",
+        start=start,
+        end=end,
+        source="".join(lines[start - 1:end])
+    )
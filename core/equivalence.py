@@ -0,0 +1,576 @@
+"""
+Test d'équivalence différentiel : le code refactoré se comporte-t-il comme
+l'original ?
+
+- les fonctions de premier niveau des deux versions sont appariées (même
+  nom, sinon même position et même nombre de paramètres : renommages)
+- des entrées sont générées aléatoirement (graine fixe, donc reproductibles)
+  d'après les annotations et les valeurs par défaut des paramètres
+- chaque cas exécute les deux versions dans un même processus de travail
+  et compare valeur de retour, exception levée, arguments mutés et sortie
+  standard ; `random` est réinitialisé avec la même graine avant chaque appel.
+  Les objets sans `__eq__` sont comparés par nom de classe et attributs,
+  les générateurs/itérateurs par leurs premiers éléments (MAX_ITEMS)
+- les processus de travail sont longs (pool partagé par le processus), avec
+  limites de ressources (core.resource_limits ; la limite CPU est un budget
+  par paquet de cas, pas pour la vie du processus), délai par appel et
+  répertoire courant jetable ; le code d'un fichier n'y est chargé qu'une
+  fois (cache par empreinte)
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import ast
+import atexit
+import contextlib
+import copy
+import hashlib
+import io
+import itertools
+import math
+import multiprocessing
+import os
+import random
+import re
+import signal
+import tempfile
+import threading
+import time
+
+from core.resource_limits import DEFAULT_LIMITS, apply_limits, reset_cpu_budget
+
+
+DEFAULT_CASES = 200        # cas par fonction
+CASE_TIMEOUT = 1.0         # secondes par appel
+CHUNK_SIZE = 250           # cas envoyés ensemble à un processus de travail
+MAX_EXAMPLES = 3           # divergences détaillées par fonction
+MAX_TIMEOUTS = 3           # au-delà, les cas restants du paquet sont abandonnés
+CHUNK_MARGIN = 30.0        # secondes ajoutées au délai d'un paquet (chargement du module)
+MAX_ITEMS = 1000           # éléments lus d'un générateur/itérateur renvoyé
+MAX_COMPARE_DEPTH = 20     # profondeur de comparaison structurelle
+DEFAULT_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+# ----------------------------------------------------------------------
+# Appariement des fonctions
+# ----------------------------------------------------------------------
+
+
+def top_level_functions(code: str) -> List[ast.FunctionDef]:
+    """Fonctions (non async) de premier niveau, dans l'ordre du fichier"""
+    tree = ast.parse(code)
+    return [node for node in tree.body if isinstance(node, ast.FunctionDef)]
+
+
+def _arity(node: ast.FunctionDef) -> int:
+    return len(node.args.posonlyargs) + len(node.args.args)
+
+
+def pair_functions(original: List[ast.FunctionDef], refactored: List[ast.FunctionDef]):
+    """
+    Returns:
+        tuple: ([(fonction originale, fonction refactorée)], [noms originaux sans équivalent])
+    """
+    by_name = {node.name: node for node in refactored}
+    pairs, unmatched = [], []
+    used = set()
+    for node in original:
+        if node.name in by_name:
+            pairs.append((node, by_name[node.name]))
+            used.add(node.name)
+        else:
+            unmatched.append(node)
+
+    # Fonction renommée : même rang parmi les restantes et même nombre de paramètres
+    remaining = [node for node in refactored if node.name not in used and node.name not in
+                 {n.name for n in original}]
+    still_unmatched = []
+    for node in unmatched:
+        candidate = next((r for r in remaining if _arity(r) == _arity(node)), None)
+        if candidate is not None:
+            remaining.remove(candidate)
+            pairs.append((node, candidate))
+        else:
+            still_unmatched.append(node.name)
+    return pairs, still_unmatched
+
+
+# ----------------------------------------------------------------------
+# Génération des entrées
+# ----------------------------------------------------------------------
+
+_INTS = [0, 1, -1, 2, 3, 7, 10, -10, 100, 2 ** 31, -(2 ** 31)]
+_FLOATS = [0.0, 1.0, -1.0, 0.5, 3.14159, -2.75, 1e9, 1e-9]
+_STRS = ["", "a", "abc", "Hello World", "  espaces  ", "123", "ünïcödé", "a,b,c", "\n"]
+
+
+def _value_for(annotation: Optional[str], rng: random.Random, depth: int = 0):
+    """Valeur aléatoire pour une annotation (texte ast.unparse), ou mélange simple"""
+    ann = (annotation or "").replace("typing.", "").replace(" ", "")
+    if ann.startswith("Optional[") and ann.endswith("]"):
+        return None if rng.random() < 0.2 else _value_for(ann[9:-1], rng, depth)
+    if "|None" in ann or ann.startswith("None|"):
+        inner = ann.replace("|None", "").replace("None|", "")
+        return None if rng.random() < 0.2 else _value_for(inner, rng, depth)
+
+    base, _, inner = ann.partition("[")
+    inner = inner[:-1] if inner.endswith("]") else inner
+    base = base.lower()
+    size = rng.randint(0, 5) if depth < 2 else 0
+
+    if base == "int":
+        return rng.choice(_INTS) if rng.random() < 0.3 else rng.randint(-1000, 1000)
+    if base == "float":
+        return rng.choice(_FLOATS) if rng.random() < 0.3 else rng.uniform(-1000, 1000)
+    if base == "bool":
+        return rng.random() < 0.5
+    if base == "str":
+        if rng.random() < 0.4:
+            return rng.choice(_STRS)
+        return "".join(rng.choice("abcdefghij XYZ_-0123") for _ in range(rng.randint(0, 12)))
+    if base in ("list", "sequence", "iterable"):
+        return [_value_for(inner or "int", rng, depth + 1) for _ in range(size)]
+    if base in ("set", "frozenset"):
+        return {_value_for(inner or "int", rng, depth + 1) for _ in range(size)}
+    if base == "tuple":
+        parts = [p for p in inner.split(",") if p and p != "..."]
+        if parts and not inner.endswith(",..."):
+            return tuple(_value_for(p, rng, depth + 1) for p in parts)
+        return tuple(_value_for(parts[0] if parts else "int", rng, depth + 1) for _ in range(size))
+    if base in ("dict", "mapping"):
+        key_ann, _, value_ann = inner.partition(",")
+        return {_value_for(key_ann or "str", rng, depth + 1): _value_for(value_ann or "int", rng, depth + 1)
+                for _ in range(size)}
+
+    # Sans annotation exploitable : surtout des entiers, parfois chaînes/listes
+    roll = rng.random()
+    if roll < 0.6:
+        return _value_for("int", rng, depth)
+    if roll < 0.8:
+        return _value_for("str", rng, depth)
+    if roll < 0.9:
+        return _value_for("float", rng, depth)
+    return _value_for("list[int]", rng, depth)
+
+
+def generate_cases(node: ast.FunctionDef, count: int, seed: int) -> List[Tuple[tuple, dict]]:
+    """Cas (args, kwargs) reproductibles pour une fonction"""
+    rng = random.Random(f"{seed}:{node.name}")
+    positional = node.args.posonlyargs + node.args.args
+    defaults = [None] * (len(positional) - len(node.args.defaults)) + list(node.args.defaults)
+    kwonly = list(zip(node.args.kwonlyargs, node.args.kw_defaults))
+
+    def annotation(arg, default):
+        if arg.annotation is not None:
+            return ast.unparse(arg.annotation)
+        if isinstance(default, ast.Constant) and default.value is not None:
+            return type(default.value).__name__
+        return None
+
+    cases = []
+    for _ in range(count):
+        args = []
+        for arg, default in zip(positional, defaults):
+            # Paramètre optionnel : parfois omis (ainsi que les suivants)
+            if default is not None and rng.random() < 0.3:
+                break
+            args.append(_value_for(annotation(arg, default), rng))
+        kwargs = {
+            arg.arg: _value_for(annotation(arg, default), rng)
+            for arg, default in kwonly
+            if default is None or rng.random() < 0.5
+        }
+        cases.append((tuple(args), kwargs))
+    return cases
+
+
+# ----------------------------------------------------------------------
+# Processus de travail
+# ----------------------------------------------------------------------
+
+_modules: Dict[str, Any] = {}
+_cpu_budget: Optional[int] = None
+
+
+class _CaseTimeout(BaseException):
+    """Hors de la hiérarchie Exception : un "except Exception" du code testé ne l'avale pas"""
+
+
+def _on_alarm(signum, frame):
+    raise _CaseTimeout()
+
+
+def _init_worker(limits: Dict[str, int]):
+    """Limites de ressources, répertoire jetable, stdin vide, délai par appel"""
+    global _cpu_budget
+    apply_limits(**limits)
+    # Processus réutilisé d'un fichier à l'autre : la limite CPU vaut par paquet (_run_chunk)
+    _cpu_budget = limits.get("cpu_s")
+    os.chdir(tempfile.mkdtemp(prefix="equivalence_"))
+    try:
+        os.dup2(os.open(os.devnull, os.O_RDONLY), 0)
+    except OSError:
+        pass
+    if hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGALRM, _on_alarm)
+
+
+def _load(source: str):
+    """Exécute un module une fois par processus ; (namespace, erreur de chargement)"""
+    key = hashlib.sha1(source.encode("utf-8", errors="ignore")).hexdigest()
+    if key not in _modules:
+        if len(_modules) > 64:
+            _modules.clear()
+        namespace = {"__name__": "__equivalence__"}
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                exec(compile(source, f"<{key[:8]}>", "exec"), namespace)
+            _modules[key] = (namespace, None)
+        except BaseException as e:
+            _modules[key] = (None, f"{type(e).__name__}: {str(e)[:200]}")
+    return _modules[key]
+
+
+@dataclass
+class _Iterated:
+    """Générateur/itérateur renvoyé, matérialisé pendant l'appel (sous le même délai)"""
+    kind: str
+    items: list
+    exhausted: bool
+
+
+def _materialize(value):
+    if not isinstance(value, Iterator):
+        return value
+    items = list(itertools.islice(value, MAX_ITEMS + 1))
+    return _Iterated(type(value).__name__, items[:MAX_ITEMS], len(items) <= MAX_ITEMS)
+
+
+def _call(fn, args, kwargs, seed: int, timeout: float):
+    """Un appel isolé : (issue, durée) avec issue = ("return", valeur, args après, stdout) | ("raise", type, message)"""
+    args, kwargs = copy.deepcopy(args), copy.deepcopy(kwargs)
+    random.seed(seed)
+    stdout = io.StringIO()
+    timer = hasattr(signal, "setitimer")
+    start = time.perf_counter()
+    try:
+        if timer:
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            with contextlib.redirect_stdout(stdout):
+                value = _materialize(fn(*args, **kwargs))
+        finally:
+            if timer:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        outcome = ("return", value, (args, kwargs), stdout.getvalue())
+    except _CaseTimeout:
+        outcome = ("timeout",)
+    except RecursionError:
+        outcome = ("raise", "RecursionError", "")
+    except BaseException as e:  # SystemExit compris : le processus de travail doit survivre
+        outcome = ("raise", type(e).__name__, str(e)[:200])
+    return outcome, time.perf_counter() - start
+
+
+_ADDRESS_RE = re.compile(r"0x[0-9a-fA-F]+")
+
+
+def _state(value) -> Optional[Dict[str, Any]]:
+    """Attributs d'un objet (__dict__ et __slots__), None s'il n'en expose pas"""
+    state = dict(vars(value)) if hasattr(value, "__dict__") else None
+    for cls in type(value).__mro__:
+        for slot in getattr(cls, "__slots__", ()):
+            if isinstance(slot, str) and hasattr(value, slot):
+                state = state if state is not None else {}
+                state[slot] = getattr(value, slot)
+    return state
+
+
+def _same(a, b, depth: int = 0) -> bool:
+    """
+    Égalité des résultats des deux versions. L'égalité par identité (objet
+    sans __eq__) et les repr contenant une adresse ne sont jamais utilisées :
+    les deux versions créent forcément des objets distincts.
+    """
+    if a is b:
+        return True
+    if type(a).__qualname__ != type(b).__qualname__:
+        return False
+    if depth > MAX_COMPARE_DEPTH:
+        return True  # structure trop profonde (ou cyclique) : pas de divergence prouvée
+    if isinstance(a, float):
+        return a == b or (math.isnan(a) and math.isnan(b))
+    if isinstance(a, _Iterated):
+        return a.kind == b.kind and a.exhausted == b.exhausted and _same(a.items, b.items, depth + 1)
+    if isinstance(a, (list, tuple)):
+        return len(a) == len(b) and all(_same(x, y, depth + 1) for x, y in zip(a, b))
+    if isinstance(a, dict):
+        try:
+            if a.keys() != b.keys():
+                return False
+        except Exception:
+            return False
+        return all(_same(a[key], b[key], depth + 1) for key in a)
+
+    # Fonction, classe, closure : comparées par nom qualifié
+    if isinstance(a, type) or (callable(a) and hasattr(a, "__qualname__")):
+        return getattr(a, "__qualname__", None) == getattr(b, "__qualname__", None)
+
+    custom_eq = type(a).__eq__ is not object.__eq__
+    if custom_eq:
+        try:
+            result = a == b
+            if isinstance(result, bool) and (result or type(a) is type(b)):
+                return result
+        except Exception:
+            pass
+    if isinstance(a, BaseException):
+        return _same(a.args, b.args, depth + 1)
+    # Sans __eq__ utilisable (identité, ou classes homonymes des deux versions) : attributs
+    state_a, state_b = _state(a), _state(b)
+    if state_a is not None and state_b is not None:
+        return _same(state_a, state_b, depth + 1)
+    text_a, text_b = repr(a), repr(b)
+    if _ADDRESS_RE.search(text_a) or _ADDRESS_RE.search(text_b):
+        return state_a is None and state_b is None and not custom_eq
+    return text_a == text_b
+
+
+def _same_outcome(a, b) -> bool:
+    if a[0] != b[0]:
+        return False
+    if a[0] == "return":
+        return _same(a[1], b[1]) and _same(a[2], b[2]) and a[3] == b[3]
+    if a[0] == "raise":
+        return a[1] == b[1]  # même type d'exception (le message peut légitimement changer)
+    return True
+
+
+def _describe(outcome) -> str:
+    if outcome[0] == "return":
+        text = f"return {outcome[1]!r}"
+        if outcome[3]:
+            text += f" (stdout {outcome[3][:60]!r})"
+        return text[:300]
+    if outcome[0] == "raise":
+        return f"raise {outcome[1]}: {outcome[2]}"[:300]
+    return "timeout"
+
+
+def _run_chunk(job) -> Dict[str, Any]:
+    """Exécute un paquet de cas (original puis refactoré) dans le processus de travail"""
+    original_src, refactored_src, original_name, refactored_name, cases, first_index, seed, timeout = job
+    result = {"cases": 0, "mismatches": 0, "timeouts": 0, "original_s": 0.0, "refactored_s": 0.0,
+              "examples": [], "load_error": None, "aborted": False}
+    reset_cpu_budget(_cpu_budget)
+
+    original_ns, error = _load(original_src)
+    refactored_ns, refactored_error = _load(refactored_src)
+    error = error or refactored_error
+    original_fn = original_ns.get(original_name) if original_ns else None
+    refactored_fn = refactored_ns.get(refactored_name) if refactored_ns else None
+    if error or not callable(original_fn) or not callable(refactored_fn):
+        result["load_error"] = error or "fonction introuvable après chargement"
+        return result
+
+    for offset, (args, kwargs) in enumerate(cases):
+        case_seed = seed + first_index + offset
+        expected, t_original = _call(original_fn, args, kwargs, case_seed, timeout)
+        actual, t_refactored = _call(refactored_fn, args, kwargs, case_seed, timeout)
+        result["cases"] += 1
+        result["original_s"] += t_original
+        result["refactored_s"] += t_refactored
+        if expected[0] == "timeout" or actual[0] == "timeout":
+            result["timeouts"] += 1
+            result["aborted"] = result["timeouts"] >= MAX_TIMEOUTS
+            # Un seul des deux bloque : divergence de comportement
+            if expected[0] == actual[0]:
+                if result["aborted"]:
+                    break
+                continue
+        if not _same_outcome(expected, actual):
+            result["mismatches"] += 1
+            if len(result["examples"]) < MAX_EXAMPLES:
+                result["examples"].append({
+                    "case": first_index + offset,
+                    "input": repr((args, kwargs))[:300],
+                    "original": _describe(expected),
+                    "refactored": _describe(actual),
+                })
+        if result["aborted"]:
+            break  # fonction bloquante : inutile d'épuiser les cas
+    return result
+
+
+# ----------------------------------------------------------------------
+# Moteur
+# ----------------------------------------------------------------------
+
+
+def _status(functions: List[Dict[str, Any]]) -> str:
+    """
+    MISMATCH dès qu'une divergence est observée ; sinon ERROR si une fonction
+    n'a pas pu être testée, INCONCLUSIVE si une fonction n'a que des timeouts.
+    """
+    if any(f["mismatches"] for f in functions):
+        return "MISMATCH"
+    if any(f["errors"] for f in functions):
+        return "ERROR"
+    if any(f["cases"] == f["timeouts"] for f in functions):
+        return "INCONCLUSIVE"
+    return "EQUIVALENT"
+
+
+def _coverage(entry: Dict[str, Any]) -> str:
+    """Cas effectivement comparés d'une fonction, ex. "f 197/200 (3 timeouts)" """
+    text = f"{entry['original']} {entry['cases'] - entry['timeouts']}/{entry['requested']}"
+    if entry["timeouts"]:
+        text += f" ({entry['timeouts']} timeouts)"
+    if entry["errors"]:
+        text += " (erreur)"
+    return text
+
+
+def _add_error(entry: Dict[str, Any], error: str):
+    if error not in entry["errors"]:
+        entry["errors"].append(error)
+
+
+class EquivalenceChecker:
+    """Pool de processus de travail réutilisé d'un fichier à l'autre"""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, limits: Optional[Dict[str, int]] = None,
+                 case_timeout: float = CASE_TIMEOUT):
+        self.workers = workers
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.case_timeout = case_timeout
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn : pas de fork d'un parent multi-thread (LLM, traçage)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.limits,)
+                )
+            return self._pool
+
+    def _discard_pool(self, kill: bool = False):
+        """Abandonne le pool ; kill=True tue aussi les processus (appel bloqué en C)"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        processes = list((getattr(pool, "_processes", None) or {}).values()) if kill else []
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            try:
+                process.kill()
+            except (OSError, ValueError, AttributeError):
+                pass
+
+    def _chunk_deadline(self, job) -> float:
+        """Délai d'un paquet : deux appels par cas, plus une marge de chargement"""
+        return len(job[4]) * 2 * self.case_timeout + CHUNK_MARGIN
+
+    def close(self):
+        self._discard_pool()
+
+    def check(self, original: str, refactored: str, cases: int = DEFAULT_CASES, seed: int = 0) -> Dict[str, Any]:
+        """
+        Compare le comportement des fonctions de premier niveau.
+
+        Returns:
+            dict: status (EQUIVALENT | MISMATCH | INCONCLUSIVE | SKIPPED | ERROR),
+            détail par fonction (cas demandés/exécutés, divergences, exemples,
+            temps original/refactoré) et couverture par fonction ("summary")
+        """
+        start = time.time()
+        report: Dict[str, Any] = {"status": "SKIPPED", "functions": [], "unmatched": [], "cases": 0,
+                                  "mismatches": 0, "timeouts": 0, "summary": "", "duration_s": 0.0,
+                                  "workers": self.workers}
+        try:
+            pairs, report["unmatched"] = pair_functions(top_level_functions(original), top_level_functions(refactored))
+        except SyntaxError as e:
+            report.update(status="ERROR", error=f"SyntaxError: {e}")
+            return report
+        if not pairs:
+            report["duration_s"] = time.time() - start
+            return report
+
+        jobs = []
+        for original_fn, refactored_fn in pairs:
+            function_cases = generate_cases(original_fn, cases, seed)
+            for first in range(0, len(function_cases), CHUNK_SIZE):
+                jobs.append((original_fn.name, (
+                    original, refactored, original_fn.name, refactored_fn.name,
+                    function_cases[first:first + CHUNK_SIZE], first, seed, self.case_timeout
+                )))
+
+        per_function = {
+            original_fn.name: {"original": original_fn.name, "refactored": refactored_fn.name, "requested": 0,
+                               "cases": 0, "mismatches": 0, "timeouts": 0, "original_s": 0.0,
+                               "refactored_s": 0.0, "examples": [], "errors": []}
+            for original_fn, refactored_fn in pairs
+        }
+        for name, job in jobs:
+            per_function[name]["requested"] += len(job[4])
+
+        try:
+            futures = [(name, job, self._executor().submit(_run_chunk, job)) for name, job in jobs]
+            for name, job, future in futures:
+                entry = per_function[name]
+                try:
+                    # Les paquets précédents sont terminés : celui-ci tourne ou démarre
+                    result = future.result(timeout=self._chunk_deadline(job))
+                except FutureTimeout:
+                    # Blocage hors de portée de SIGALRM (code natif) : processus tués
+                    self._discard_pool(kill=True)
+                    _add_error(entry, "paquet de cas bloqué (délai dépassé)")
+                    continue
+                except (BrokenProcessPool, CancelledError):
+                    # Processus tué (mémoire, CPU, crash natif) : pool recréé au prochain appel
+                    self._discard_pool()
+                    _add_error(entry, "processus de travail interrompu (limite de ressources ?)")
+                    continue
+                if result["load_error"]:
+                    _add_error(entry, result["load_error"])
+                    continue
+                for field in ("cases", "mismatches", "timeouts", "original_s", "refactored_s"):
+                    entry[field] += result[field]
+                entry["examples"].extend(result["examples"][:MAX_EXAMPLES - len(entry["examples"])])
+        except Exception as e:
+            self._discard_pool()
+            report.update(status="ERROR", error=f"{type(e).__name__}: {str(e)[:200]}")
+
+        report["functions"] = list(per_function.values())
+        report["cases"] = sum(f["cases"] for f in report["functions"])
+        report["mismatches"] = sum(f["mismatches"] for f in report["functions"])
+        report["timeouts"] = sum(f["timeouts"] for f in report["functions"])
+        if report["status"] != "ERROR":
+            report["status"] = _status(report["functions"])
+        report["summary"] = ", ".join(_coverage(f) for f in report["functions"])
+        report["duration_s"] = time.time() - start
+        return report
+
+
+_checker: Optional[EquivalenceChecker] = None
+_checker_lock = threading.Lock()
+
+
+def get_checker() -> EquivalenceChecker:
+    """Moteur partagé par le processus (pool arrêté à la sortie)"""
+    global _checker
+    with _checker_lock:
+        if _checker is None:
+            _checker = EquivalenceChecker()
+            atexit.register(_checker.close)
+        return _checker
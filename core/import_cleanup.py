@@ -0,0 +1,276 @@
+"""
+Nettoyage déterministe des imports Python, sans LLM.
+
+- suppression des noms importés jamais utilisés (AST : Name, attributs,
+  annotations en chaîne, __all__)
+- suppression des doublons au niveau module
+  (un module ne contenant que des imports est traité comme un ré-export)
+- tri de chaque groupe d'imports consécutifs (les lignes vides et les
+  commentaires séparent les groupes et restent en place)
+
+Le source est réécrit sur place : un import inchangé garde son texte exact
+(parenthèses, commentaires de fin de ligne), seuls les imports modifiés
+sont régénérés. Ne sont jamais modifiés, seulement signalés :
+
+- un import qui porte un commentaire (il serait perdu à la régénération)
+- un import marqué `# noqa` (seul ou avec F401) : conservé sans finding
+- un module connu pour son effet de bord (SIDE_EFFECT_MODULES) : conservé
+  sans finding
+- un `import paquet.module` sans usage hors bibliothèque standard : souvent
+  un import d'enregistrement (plugin), signalé sans être supprimé
+
+Un `import x` sans usage (bibliothèque standard ou non) est supprimé comme
+les autres noms inutilisés.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+import ast
+import io
+import re
+import sys
+import tokenize
+
+from core.static_analysis import parse_python, used_names
+
+
+IMPORT_NODES = (ast.Import, ast.ImportFrom)
+MAX_LINE_LENGTH = 88
+_NOQA_RE = re.compile(r"#\s*noqa(?::\s*([\w\s,]+))?", re.IGNORECASE)
+
+# Modules importés pour leur seul effet de bord : jamais supprimés
+SIDE_EFFECT_MODULES = {
+    "readline", "rlcompleter", "antigravity", "this", "site", "sitecustomize", "usercustomize",
+    "mpl_toolkits.mplot3d",
+}
+STDLIB_MODULES = getattr(sys, "stdlib_module_names", frozenset(sys.builtin_module_names))
+
+
+def _side_effect_import(name: str) -> Optional[bool]:
+    """
+    "import name" sans usage : True = module d'effet de bord connu (conservé),
+    False = import d'enregistrement possible (signalé), None = supprimable.
+    """
+    if name in SIDE_EFFECT_MODULES:
+        return True
+    if "." in name and name.split(".")[0] not in STDLIB_MODULES:
+        return False
+    return None
+
+
+def _comment_lines(code: str) -> Tuple[Set[int], Set[int]]:
+    """Lignes portant un commentaire, et celles dont le noqa couvre F401"""
+    comments, noqa = set(), set()
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(code).readline):
+            if token.type != tokenize.COMMENT:
+                continue
+            comments.add(token.start[0])
+            match = _NOQA_RE.search(token.string)
+            if match and (not match.group(1) or "F401" in match.group(1).upper()):
+                noqa.add(token.start[0])
+    except (tokenize.TokenError, SyntaxError):
+        pass
+    return comments, noqa
+
+
+def _bodies(tree: ast.AST):
+    """Toutes les listes de statements de l'arbre (module, fonctions, blocs)"""
+    for node in ast.walk(tree):
+        for field in ("body", "orelse", "finalbody"):
+            body = getattr(node, field, None)
+            if isinstance(body, list) and body and isinstance(body[0], ast.stmt):
+                yield node, body
+
+
+def _alias_text(alias: ast.alias) -> str:
+    return f"{alias.name} as {alias.asname}" if alias.asname else alias.name
+
+
+def _render(node: ast.stmt, aliases: List[ast.alias], indent: str) -> str:
+    """Régénère un import avec les noms conservés"""
+    names = [_alias_text(a) for a in aliases]
+    if isinstance(node, ast.Import):
+        return "".join(f"{indent}import {name}\n" for name in names)
+
+    module = "." * node.level + (node.module or "")
+    line = f"{indent}from {module} import {', '.join(names)}\n"
+    if len(line) <= MAX_LINE_LENGTH + 1:
+        return line
+    body = "".join(f"{indent}    {name},\n" for name in names)
+    return f"{indent}from {module} import (\n{body}{indent})\n"
+
+
+def _sort_key(node: ast.stmt) -> Tuple:
+    """__future__ d'abord, puis "import x" avant "from x import" (ordre isort)"""
+    if isinstance(node, ast.ImportFrom):
+        module = "." * node.level + (node.module or "")
+        return (0 if module == "__future__" else 1, 1, module.lower(), node.names[0].name.lower())
+    return (1, 0, node.names[0].name.lower(), "")
+
+
+def _binding_key(node: ast.stmt, alias: ast.alias) -> Tuple:
+    module = "." * node.level + (node.module or "") if isinstance(node, ast.ImportFrom) else ""
+    return (module, alias.name, alias.asname)
+
+
+def _owns_lines(node: ast.stmt, lines: List[str]) -> bool:
+    """L'import occupe-t-il seul ses lignes (pas de "import os; x = 1") ?"""
+    before = lines[node.lineno - 1].encode("utf-8")[:node.col_offset].decode("utf-8", errors="ignore")
+    after = lines[node.end_lineno - 1].encode("utf-8")[node.end_col_offset:].decode("utf-8", errors="ignore")
+    return not before.strip() and (not after.strip() or after.strip().startswith("#"))
+
+
+def clean_imports(code: str) -> Tuple[str, Optional[List[Dict[str, Any]]]]:
+    """
+    Supprime, dédoublonne et trie les imports.
+
+    Returns:
+        (code réécrit, modifications sous forme de findings)
+        Si le code n'est pas du Python valide : (code inchangé, None)
+    """
+    tree = parse_python(code)
+    if tree is None:
+        return code, None
+
+    used = used_names(tree)
+    # Module composé uniquement d'imports (type __init__.py) : ce sont des ré-exports
+    reexport_module = all(
+        isinstance(node, IMPORT_NODES)
+        or (isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant))
+        or (isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "__all__" for t in node.targets))
+        for node in tree.body
+    )
+    lines = code.splitlines(keepends=True)
+    comment_lines, noqa_lines = _comment_lines(code)
+    changes: List[Dict[str, Any]] = []
+    # Import modifié : première ligne -> (dernière ligne, nouveau texte ; "" = supprimé)
+    replacement: Dict[int, Tuple[int, str]] = {}
+    seen_bindings = set()
+
+    for parent, body in _bodies(tree):
+        top_level = isinstance(parent, ast.Module)
+        remaining = len(body)
+        for node in body:
+            if not isinstance(node, IMPORT_NODES) or not _owns_lines(node, lines):
+                continue
+            if isinstance(node, ast.ImportFrom) and node.module == "__future__":
+                continue
+
+            node_lines = set(range(node.lineno, node.end_lineno + 1))
+            suppressed = bool(node_lines & noqa_lines)
+            # Commentaire dans l'import : le régénérer le perdrait, on signale seulement
+            frozen = bool(node_lines & comment_lines)
+
+            kept, unused, side_effects, duplicates = [], [], [], []
+            for alias in node.names:
+                bound = alias.asname or alias.name.split(".")[0]
+                key = _binding_key(node, alias)
+                side_effect = (_side_effect_import(alias.name)
+                               if isinstance(node, ast.Import) and not alias.asname else None)
+                if top_level and key in seen_bindings and not suppressed:
+                    duplicates.append(_alias_text(alias))
+                    if frozen:
+                        kept.append(alias)
+                elif (alias.name == "*" or alias.asname == alias.name or bound in used
+                      or suppressed or (top_level and reexport_module)):
+                    # "import x as x" : ré-export explicite ; "# noqa" : conservé volontairement
+                    kept.append(alias)
+                    if top_level:
+                        seen_bindings.add(key)
+                elif side_effect is not None:
+                    # Effet de bord connu : conservé sans finding ; sous-module tiers : signalé
+                    if not side_effect:
+                        side_effects.append(alias.name)
+                    kept.append(alias)
+                else:
+                    unused.append(_alias_text(alias))
+                    if frozen:
+                        kept.append(alias)
+
+            if unused:
+                changes.append({
+                    "type": "unused_import",
+                    "note": lines[node.lineno - 1].strip() + (" (commentaire : non modifié)" if frozen else ""),
+                    "names": unused,
+                    "lineno": node.lineno,
+                    "end_lineno": node.end_lineno,
+                    "applied": not frozen,
+                })
+            if side_effects:
+                changes.append({
+                    "type": "unused_side_effect_import",
+                    "note": f"Import sans usage conservé (enregistrement possible) ligne {node.lineno}: "
+                            f"{', '.join(side_effects)}",
+                    "names": side_effects,
+                    "lineno": node.lineno,
+                    "end_lineno": node.end_lineno,
+                    "applied": False,
+                })
+            if duplicates:
+                changes.append({
+                    "type": "duplicate_import",
+                    "note": f"Import dupliqué ligne {node.lineno}: {', '.join(duplicates)}"
+                            + (" (commentaire : non modifié)" if frozen else ""),
+                    "names": duplicates,
+                    "lineno": node.lineno,
+                    "end_lineno": node.end_lineno,
+                    "applied": not frozen,
+                })
+            if len(kept) == len(node.names):
+                continue
+            if not kept and remaining == 1:
+                # Seul statement du bloc : le supprimer casserait la syntaxe
+                continue
+
+            indent = lines[node.lineno - 1][:len(lines[node.lineno - 1]) - len(lines[node.lineno - 1].lstrip())]
+            replacement[node.lineno] = (node.end_lineno, _render(node, kept, indent) if kept else "")
+            if not kept:
+                remaining -= 1
+
+    # Remplacements (première ligne, dernière ligne, texte), appliqués du bas vers le haut
+    edits: List[Tuple[int, int, str]] = []
+
+    # Groupes d'imports consécutifs du module : tri + remplacements
+    groups: List[List[ast.stmt]] = []
+    for node in tree.body:
+        if not isinstance(node, IMPORT_NODES) or not _owns_lines(node, lines):
+            continue
+        if groups and groups[-1][-1].end_lineno + 1 == node.lineno:
+            groups[-1].append(node)
+        else:
+            groups.append([node])
+
+    grouped = set()
+    for group in groups:
+        grouped.update(node.lineno for node in group)
+        ordered = sorted(group, key=_sort_key)
+        if ordered != group:
+            changes.append({
+                "type": "unsorted_imports",
+                "note": f"Imports non triés (lignes {group[0].lineno}-{group[-1].end_lineno})",
+                "lineno": group[0].lineno,
+                "end_lineno": group[-1].end_lineno,
+                "applied": True,
+            })
+        elif not any(node.lineno in replacement for node in group):
+            continue
+        text = "".join(
+            replacement[node.lineno][1] if node.lineno in replacement
+            else "".join(lines[node.lineno - 1:node.end_lineno])
+            for node in ordered
+        )
+        edits.append((group[0].lineno, group[-1].end_lineno, text))
+
+    # Imports imbriqués (fonctions, blocs) : remplacement en place
+    for lineno, (end_lineno, text) in replacement.items():
+        if lineno not in grouped:
+            edits.append((lineno, end_lineno, text))
+
+    new_lines = list(lines)
+    for start, end, text in sorted(edits, reverse=True):
+        new_lines[start - 1:end] = [text]
+
+    changes.sort(key=lambda c: c["lineno"])
+    return "".join(new_lines), changes
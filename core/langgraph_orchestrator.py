@@ -5,6 +5,7 @@ Version corrigée qui passe correctement temperature_override au workflow.
 
 from typing import Dict, List, Any, Optional
 import time
+import uuid
 
 # Import de vos agents existants
 from agents.rename_agent import RenameAgent
@@ -18,8 +19,12 @@ from agents.patch_agent import PatchAgent
 from core.temperature_config import TemperatureConfig
 
 # Import des nouveaux modules LangGraph
-from .workflow_state import RefactorState
+from .workflow_state import RefactorState, code_hash
 from .workflow_graph import compile_graph
+from .workflow_checkpoint import create_checkpointer
+from . import tracing
+from .llm_usage import collect_usage, merge_usage
+from .equivalence import get_checker
 
 
 class LangGraphOrchestrator:
@@ -28,7 +33,21 @@ class LangGraphOrchestrator:
     Version corrigée avec support complet des températures personnalisées.
     """
     
-    def __init__(self, llm):
+    def __init__(self, llm, checkpoint_path: Optional[str] = None, hunk_mode: bool = False, warm_up: bool = True):
+        """
+        Args:
+            llm: Client LLM partagé par tous les agents
+            checkpoint_path: Fichier SQLite des checkpoints (None = pas de persistance)
+            hunk_mode: Envoyer au LLM uniquement les fonctions/classes signalées (Python)
+            warm_up: Précharger le modèle en arrière-plan (évite le chargement à froid)
+        """
+        self.llm = llm
+        
+        # ⭐ Préchargement du modèle pendant l'initialisation du reste du système
+        warm_up_async = getattr(llm, "warm_up_async", None)
+        if warm_up and callable(warm_up_async):
+            warm_up_async()
+        
         # Instanciation de tous les agents
         self.agent_instances = {
             "RenameAgent": RenameAgent(llm),
@@ -41,9 +60,19 @@ class LangGraphOrchestrator:
         }
         self.merge_agent = MergeAgent(llm)
         self.temperature_config = TemperatureConfig()
+        self.set_hunk_mode(hunk_mode)
+        
+        # ⭐ Checkpointing optionnel : l'état est persisté après chaque agent
+        self.checkpointer = create_checkpointer(checkpoint_path) if checkpoint_path else None
         
         # Compiler le graphe LangGraph
-        self.graph = compile_graph(self)
+        self.graph = compile_graph(self, checkpointer=self.checkpointer)
+        
+        # Export des traces (JSON + Chrome trace) par workflow, si configuré
+        self.trace_dir = None
+        
+        # Test d'équivalence original / refactoré (Python), désactivé par défaut
+        self.equivalence_check = False
     
     def run_workflow(
         self, 
@@ -52,7 +81,8 @@ class LangGraphOrchestrator:
         selected_agents: Optional[List[str]] = None,
         auto_patch: bool = True,
         auto_test: bool = True,
-        temperature_override: Optional[Dict[str, float]] = None
+        temperature_override: Optional[Dict[str, float]] = None,
+        thread_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Exécute le workflow complet de refactoring avec LangGraph.
@@ -64,6 +94,7 @@ class LangGraphOrchestrator:
             auto_patch: Appliquer PatchAgent automatiquement
             auto_test: Exécuter TestAgent automatiquement
             temperature_override: Dict des températures par agent {agent_name: temperature}
+            thread_id: Identifiant du checkpoint (généré si checkpointing actif et None)
             
         Returns:
             Dict avec tous les résultats incluant durées et températures
@@ -76,9 +107,24 @@ class LangGraphOrchestrator:
         if temperature_override is None:
             temperature_override = {}
         
+        if self.checkpointer is not None and thread_id is None:
+            thread_id = uuid.uuid4().hex
+        elif self.has_checkpoint(thread_id):
+            # Réutiliser un thread existant cumulerait les résultats (reducers)
+            return {
+                "success": False,
+                "error": f"thread_id={thread_id} existe déjà, utilisez resume()",
+                "refactored_code": code,
+                "final_code": code,
+                "agent_results": [],
+                "thread_id": thread_id
+            }
+        
         print(f"🚀 Démarrage du workflow LangGraph avec {len(selected_agents)} agents")
         if temperature_override:
             print(f"   🌡️  Températures personnalisées: {temperature_override}")
+        if thread_id:
+            print(f"   💾 Checkpoint thread_id: {thread_id}")
         
         # Préparer l'état initial
         workflow_start_time = time.time()
@@ -87,12 +133,12 @@ class LangGraphOrchestrator:
             "original_code": code,
             "language": language,
             "current_code": code,
+            "code_blobs": {code_hash(code): code},
             "current_agent": None,
             "agent_results": [],
             "issues_detected": [],
             "history": [],
             "selected_agents": selected_agents,
-            "temperature_config": self.temperature_config,
             "temperature_override": temperature_override,  # ⭐ IMPORTANT
             "auto_patch": auto_patch,
             "auto_test": auto_test,
@@ -101,77 +147,231 @@ class LangGraphOrchestrator:
             "status": "initialized",
             "patch_result": None,
             "test_result": None,
+            "equivalence_result": None,
             "final_code": None
         }
         
         # Exécuter le graphe
         try:
-            final_state = self.graph.invoke(initial_state)
-            
-            workflow_duration = time.time() - workflow_start_time
+            with tracing.start_trace(thread_id or "workflow") as trace:
+                with tracing.span("workflow", agents=len(selected_agents)):
+                    final_state = self.graph.invoke(initial_state, config=self._thread_config(thread_id))
+                    report = self._finish_workflow(final_state, workflow_start_time, thread_id)
+            return self._attach_trace(report, trace)
             
-            # Récupérer le code après le workflow
-            final_code = final_state.get("current_code", code)
-            
-            # ⭐ Exécuter PatchAgent si demandé
-            patch_result = None
-            if auto_patch:
-                print("\n🩹 Application du PatchAgent...")
-                patch_agent = self.agent_instances.get("PatchAgent")
-                if patch_agent:
-                    patch_start = time.time()
-                    patch_result = patch_agent.apply(final_code, language)
-                    patch_duration = time.time() - patch_start
-                    
-                    # Ajouter les infos de durée
-                    patch_result["duration"] = patch_duration
-                    patch_result["status"] = "SUCCESS"
-                    
-                    final_state["patch_result"] = patch_result
-                    final_code = patch_result.get("proposal", final_code)
-                    
-                    print(f"   ✅ PatchAgent terminé en {patch_duration:.2f}s")
-            
-            # ⭐ Exécuter TestAgent si demandé
-            test_result = None
-            if auto_test:
-                print("\n🧪 Exécution du TestAgent...")
-                test_agent = self.agent_instances.get("TestAgent")
-                if test_agent:
-                    test_start = time.time()
-                    test_result = test_agent.apply(final_code, language)
-                    test_duration = time.time() - test_start
-                    
-                    # Ajouter les infos de durée
-                    test_result["duration"] = test_duration
-                    
-                    final_state["test_result"] = test_result
-                    
-                    test_status = test_result.get("status", "UNKNOWN")
-                    print(f"   {'✅' if test_status == 'SUCCESS' else '❌'} TestAgent terminé en {test_duration:.2f}s - Statut: {test_status}")
+        except Exception as e:
+            print(f"❌ Erreur dans le workflow : {e}")
+            import traceback
+            traceback.print_exc()
             
-            final_state["final_code"] = final_code
-            final_state["metrics"]["workflow_duration"] = workflow_duration
+            return {
+                "success": False,
+                "error": str(e),
+                "refactored_code": code,
+                "final_code": code,
+                "agent_results": [],
+                "thread_id": thread_id
+            }
+    
+    def resume(self, thread_id: str) -> Dict[str, Any]:
+        """
+        Reprend un workflow interrompu depuis son dernier checkpoint.
+        Les agents déjà terminés ne sont pas ré-exécutés.
+        
+        Args:
+            thread_id: Identifiant retourné (ou fourni) lors de run_workflow
             
-            return self._prepare_final_report(final_state)
+        Returns:
+            Dict au même format que run_workflow
+        """
+        if self.checkpointer is None:
+            return {
+                "success": False,
+                "error": "Checkpointing désactivé (checkpoint_path non configuré)",
+                "agent_results": [],
+                "thread_id": thread_id
+            }
+        
+        config = self._thread_config(thread_id)
+        snapshot = self.graph.get_state(config)
+        if not snapshot.values:
+            return {
+                "success": False,
+                "error": f"Aucun checkpoint trouvé pour thread_id={thread_id}",
+                "agent_results": [],
+                "thread_id": thread_id
+            }
+        
+        done = [r.name for r in snapshot.values.get("agent_results", [])]
+        print(f"♻️  Reprise du workflow {thread_id} ({len(done)} agents déjà terminés)")
+        
+        workflow_start_time = time.time()
+        try:
+            with tracing.start_trace(thread_id) as trace:
+                with tracing.span("workflow", resumed=True):
+                    if snapshot.next:
+                        # Reprendre là où le graphe s'est arrêté
+                        final_state = self.graph.invoke(None, config=config)
+                    else:
+                        # Graphe terminé : seules les étapes Patch/Test restent éventuellement
+                        final_state = dict(snapshot.values)
+                    report = self._finish_workflow(final_state, workflow_start_time, thread_id)
+            return self._attach_trace(report, trace)
             
         except Exception as e:
-            print(f"❌ Erreur dans le workflow : {e}")
+            print(f"❌ Erreur lors de la reprise : {e}")
             import traceback
             traceback.print_exc()
             
+            code = snapshot.values.get("original_code", "")
             return {
                 "success": False,
                 "error": str(e),
                 "refactored_code": code,
                 "final_code": code,
-                "agent_results": []
+                "agent_results": [],
+                "thread_id": thread_id
             }
     
-    def _prepare_final_report(self, final_state: RefactorState) -> Dict[str, Any]:
+    def has_checkpoint(self, thread_id: Optional[str]) -> bool:
+        """Indique si un checkpoint existe pour ce thread_id"""
+        if self.checkpointer is None or thread_id is None:
+            return False
+        return bool(self.graph.get_state(self._thread_config(thread_id)).values)
+    
+    def _thread_config(self, thread_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Configuration LangGraph associée au thread_id (None sans checkpointing)"""
+        if self.checkpointer is None or thread_id is None:
+            return None
+        return {"configurable": {"thread_id": thread_id}}
+    
+    def _save_checkpoint(self, thread_id: Optional[str], values: Dict[str, Any]):
+        """Persiste les résultats Patch/Test (exécutés hors du graphe)"""
+        config = self._thread_config(thread_id)
+        if config is not None:
+            self.graph.update_state(config, values)
+    
+    def _finish_workflow(
+        self,
+        final_state: Dict[str, Any],
+        workflow_start_time: float,
+        thread_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Exécute PatchAgent/TestAgent après le graphe puis prépare le rapport.
+        Les étapes déjà checkpointées (reprise) ne sont pas rejouées.
+        """
+        workflow_duration = time.time() - workflow_start_time
+        language = final_state["language"]
+        
+        # Récupérer le code après le workflow
+        final_code = final_state.get("current_code", final_state["original_code"])
+        
+        # ⭐ Exécuter PatchAgent si demandé
+        patch_result = final_state.get("patch_result")
+        if patch_result:
+            final_code = patch_result.get("proposal", final_code)
+        elif final_state.get("auto_patch", True):
+            print("\n🩹 Application du PatchAgent...")
+            patch_agent = self.agent_instances.get("PatchAgent")
+            if patch_agent:
+                patch_start = time.time()
+                with tracing.span("PatchAgent", "patch"), collect_usage() as usage:
+                    patch_result = patch_agent.apply(final_code, language)
+                patch_result["llm_usage"] = usage.to_dict()
+                patch_duration = time.time() - patch_start
+                
+                # Ajouter les infos de durée
+                patch_result["duration"] = patch_duration
+                patch_result["status"] = "SUCCESS"
+                
+                final_state["patch_result"] = patch_result
+                final_code = patch_result.get("proposal", final_code)
+                self._save_checkpoint(thread_id, {"patch_result": patch_result})
+                
+                print(f"   ✅ PatchAgent terminé en {patch_duration:.2f}s")
+        
+        # ⭐ Exécuter TestAgent si demandé
+        test_result = final_state.get("test_result")
+        if not test_result and final_state.get("auto_test", True):
+            print("\n🧪 Exécution du TestAgent...")
+            test_agent = self.agent_instances.get("TestAgent")
+            if test_agent:
+                test_start = time.time()
+                with tracing.span("TestAgent", "test"), collect_usage() as usage:
+                    test_result = test_agent.apply(final_code, language)
+                test_result["llm_usage"] = usage.to_dict()
+                test_duration = time.time() - test_start
+                
+                # Ajouter les infos de durée
+                test_result["duration"] = test_duration
+                
+                final_state["test_result"] = test_result
+                self._save_checkpoint(thread_id, {"test_result": test_result})
+                
+                test_status = test_result.get("status", "UNKNOWN")
+                print(f"   {'✅' if test_status == 'SUCCESS' else '❌'} TestAgent terminé en {test_duration:.2f}s - Statut: {test_status}")
+        
+        # ⭐ Test d'équivalence différentiel (fonctions de premier niveau, Python)
+        equivalence_result = final_state.get("equivalence_result")
+        if not equivalence_result and self.equivalence_check and language.lower() == "python":
+            print("\n⚖️  Test d'équivalence original / refactoré...")
+            with tracing.span("equivalence", "test"):
+                equivalence_result = get_checker().check(final_state["original_code"], final_code)
+            final_state["equivalence_result"] = equivalence_result
+            self._save_checkpoint(thread_id, {"equivalence_result": equivalence_result})
+            status = equivalence_result["status"]
+            icon = {"EQUIVALENT": "✅", "MISMATCH": "❌"}.get(status, "⚠️")
+            print(f"   {icon} {status}: {equivalence_result['cases']} cas, "
+                  f"{equivalence_result['mismatches']} divergences en {equivalence_result['duration_s']:.2f}s")
+            if equivalence_result.get("summary"):
+                print(f"      Couverture: {equivalence_result['summary']}")
+            for function in equivalence_result["functions"]:
+                for example in function["examples"][:1]:
+                    print(f"      ≠ {function['original']}{example['input']}: "
+                          f"{example['original']} → {example['refactored']}")
+        
+        final_state["final_code"] = final_code
+        final_state["metrics"] = {**final_state.get("metrics", {}), "workflow_duration": workflow_duration}
+        
+        report = self._prepare_final_report(final_state, tracing.current_trace())
+        report["thread_id"] = thread_id
+        usage = report["metrics"].get("llm_usage")
+        if usage and usage["calls"]:
+            print(f"🔢 LLM: {usage['calls']} appels, {usage['prompt_tokens']} tokens prompt "
+                  f"(prefill {usage['prefill_s']:.1f}s), {usage['completion_tokens']} générés "
+                  f"({usage['decode_tokens_per_s']:.1f} tok/s), chargement {usage['load_s']:.1f}s"
+                  + (f" ⚠️ {usage['load_stalls']} rechargements" if usage["load_stalls"] else ""))
+        return report
+    
+    def _attach_trace(self, report: Dict[str, Any], trace: "tracing.Trace") -> Dict[str, Any]:
+        """Ventilation complète (span racine fermé) et export éventuel de la trace"""
+        report["timing_breakdown"] = trace.summary()
+        self._print_breakdown(report["timing_breakdown"])
+        if self.trace_dir:
+            name = (report.get("thread_id") or f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}").replace(":", "_")
+            trace.export_json(f"{self.trace_dir}/{name}.trace.json")
+            chrome_path = trace.export_chrome(f"{self.trace_dir}/{name}.chrome.json")
+            report["trace_file"] = str(chrome_path)
+            print(f"🔬 Trace: {chrome_path}")
+        return report
+    
+    @staticmethod
+    def _print_breakdown(summary: Dict[str, Any]):
+        total = summary.get("duration_s") or 0
+        if not total:
+            return
+        parts = sorted(summary["breakdown"].items(), key=lambda item: -item[1]["self_s"])
+        print("⏱️  Répartition: " + " | ".join(
+            f"{category} {stats['self_s']:.2f}s ({stats['self_s'] / total * 100:.0f}%)"
+            for category, stats in parts if stats["self_s"] >= 0.01
+        ))
+    
+    def _prepare_final_report(self, final_state: RefactorState, trace: Optional["tracing.Trace"] = None) -> Dict[str, Any]:
         """
         Prépare le rapport final à partir de l'état.
-        Inclut toutes les durées et températures.
+        Inclut toutes les durées et températures, et la ventilation par étape
+        (LLM, GraphRAG, prompts, analyse, patch, outils de test) si tracé.
         """
         agent_results = []
         
@@ -181,7 +381,9 @@ class LangGraphOrchestrator:
                 "analysis": agent_result.analysis,
                 "temperature_used": agent_result.temperature_used,  # ⭐ Température
                 "duration": agent_result.duration,  # ⭐ Durée
-                "status": agent_result.status
+                "status": agent_result.status,
+                "llm_calls_avoided": agent_result.llm_calls_avoided,
+                "llm_usage": agent_result.llm_usage
             })
         
         # ⭐ Ajouter PatchAgent et TestAgent aux résultats
@@ -192,7 +394,8 @@ class LangGraphOrchestrator:
                 "analysis": patch_result.get("analysis", []),
                 "temperature_used": None,
                 "duration": patch_result.get("duration", 0),
-                "status": patch_result.get("status", "SUCCESS")
+                "status": patch_result.get("status", "SUCCESS"),
+                "llm_usage": patch_result.get("llm_usage")
             })
         
         test_result = final_state.get("test_result")
@@ -202,7 +405,8 @@ class LangGraphOrchestrator:
                 "analysis": [],
                 "temperature_used": None,
                 "duration": test_result.get("duration", 0),
-                "status": test_result.get("status", "UNKNOWN")
+                "status": test_result.get("status", "UNKNOWN"),
+                "llm_usage": test_result.get("llm_usage")
             })
         
         return {
@@ -213,10 +417,17 @@ class LangGraphOrchestrator:
             "agent_results": agent_results,  # ⭐ Avec durées et températures
             "issues_detected": final_state.get("issues_detected", []),
             "history": final_state.get("history", []),
-            "metrics": final_state.get("metrics", {}),
+            "metrics": {
+                **final_state.get("metrics", {}),
+                "llm_calls_avoided": sum(r.llm_calls_avoided for r in final_state.get("agent_results", [])),
+                # ⭐ Tokens, débit et temps prefill/decode/chargement de tout le workflow
+                "llm_usage": merge_usage(r.get("llm_usage") for r in agent_results)
+            },
             "patch_result": patch_result,
             "test_result": test_result,
-            "execution_time": final_state.get("metrics", {}).get("workflow_duration", 0)
+            "equivalence_result": final_state.get("equivalence_result"),
+            "execution_time": final_state.get("metrics", {}).get("workflow_duration", 0),
+            "timing_breakdown": trace.summary() if trace else None
         }
     
     # Méthodes compatibles avec l'ancienne API
@@ -281,6 +492,23 @@ class LangGraphOrchestrator:
 
         return code, patch_result, test_result
     
+    def set_hunk_mode(self, enabled: bool):
+        """Active/désactive le mode par hunk pour les agents de refactoring"""
+        for name in self.get_refactoring_agents():
+            self.agent_instances[name].hunk_mode = enabled
+    
+    def set_trace_dir(self, path: Optional[str]):
+        """Exporter la trace de chaque workflow (JSON + Chrome trace) dans ce répertoire"""
+        self.trace_dir = path
+    
+    def set_equivalence_check(self, enabled: bool):
+        """Comparer le comportement du code refactoré à l'original (core.equivalence)"""
+        self.equivalence_check = enabled
+    
+    def set_deterministic_renames(self, enabled: bool):
+        """RenameAgent applique ses renommages par réécriture AST, sans LLM (Python)"""
+        self.agent_instances["RenameAgent"].deterministic = enabled
+    
     def get_available_agents(self):
         """Retourne la liste de tous les agents disponibles"""
         return list(self.agent_instances.keys())
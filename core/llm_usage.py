@@ -0,0 +1,107 @@
+"""
+Comptabilité des tokens et des temps LLM (métriques renvoyées par Ollama).
+
+Chaque réponse de /api/generate contient prompt_eval_count, eval_count et
+les durées (ns) prompt_eval_duration, eval_duration, load_duration,
+total_duration. Le client les enregistre via `record_usage` dans tous les
+collecteurs actifs (`collect_usage`, imbriquables : agent ⊂ workflow).
+
+Permet de distinguer un prompt qui grossit (contexte GraphRAG, prefill) d'un
+modèle lent (decode) ou d'un rechargement du modèle (load).
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+import threading
+
+from core import tracing
+
+
+NS_PER_S = 1e9
+# Au-delà, le temps de chargement signale un modèle (re)chargé en mémoire
+LOAD_STALL_SECONDS = 1.0
+
+
+def usage_from_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Extrait les compteurs d'une réponse Ollama (durées converties en secondes)"""
+    return {
+        "prompt_tokens": result.get("prompt_eval_count", 0) or 0,
+        "completion_tokens": result.get("eval_count", 0) or 0,
+        "prefill_s": (result.get("prompt_eval_duration", 0) or 0) / NS_PER_S,
+        "decode_s": (result.get("eval_duration", 0) or 0) / NS_PER_S,
+        "load_s": (result.get("load_duration", 0) or 0) / NS_PER_S,
+        "total_s": (result.get("total_duration", 0) or 0) / NS_PER_S,
+    }
+
+
+class LLMUsage:
+    """Cumul thread-safe des appels LLM d'un périmètre (agent, workflow)"""
+
+    FIELDS = ("prompt_tokens", "completion_tokens", "prefill_s", "decode_s", "load_s", "total_s")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.load_stalls = 0
+        self.totals = {name: 0 for name in self.FIELDS}
+
+    def add(self, usage: Dict[str, Any]):
+        with self._lock:
+            self.calls += 1
+            for name in self.FIELDS:
+                self.totals[name] += usage.get(name, 0)
+            if usage.get("load_s", 0) >= LOAD_STALL_SECONDS:
+                self.load_stalls += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            totals = dict(self.totals)
+            calls, stalls = self.calls, self.load_stalls
+        return {
+            "calls": calls,
+            **totals,
+            "load_stalls": stalls,
+            # Débit de génération (decode) et d'ingestion du prompt (prefill)
+            "decode_tokens_per_s": totals["completion_tokens"] / totals["decode_s"] if totals["decode_s"] else 0.0,
+            "prefill_tokens_per_s": totals["prompt_tokens"] / totals["prefill_s"] if totals["prefill_s"] else 0.0,
+        }
+
+
+_collectors: ContextVar[Tuple[LLMUsage, ...]] = ContextVar("llm_usage_collectors", default=())
+
+
+@contextmanager
+def collect_usage() -> Iterator[LLMUsage]:
+    """Cumule les appels LLM du bloc (et des threads lancés via tracing.bind_context)"""
+    usage = LLMUsage()
+    token = _collectors.set(_collectors.get() + (usage,))
+    try:
+        yield usage
+    finally:
+        _collectors.reset(token)
+
+
+def record_usage(usage: Dict[str, Any]):
+    """Enregistre un appel dans tous les collecteurs actifs et sur le span LLM courant"""
+    for collector in _collectors.get():
+        collector.add(usage)
+    tracing.annotate(**usage)
+
+
+def merge_usage(usages) -> Optional[Dict[str, Any]]:
+    """Agrège des résumés to_dict() (ex. agents d'un workflow repris)"""
+    total = LLMUsage()
+    seen = False
+    for usage in usages:
+        if not usage:
+            continue
+        seen = True
+        with total._lock:
+            total.calls += usage.get("calls", 0)
+            total.load_stalls += usage.get("load_stalls", 0)
+            for name in LLMUsage.FIELDS:
+                total.totals[name] += usage.get(name, 0)
+    return total.to_dict() if seen else None
@@ -1,11 +1,39 @@
 import subprocess
 import json
+import threading
 import time
 
+from core.llm_usage import LLMUsage, LOAD_STALL_SECONDS, record_usage, usage_from_response
+
+# Durée pendant laquelle Ollama garde le modèle en mémoire après un appel
+# (durée "5m"/"1h", secondes, -1 = toujours, 0 = décharger ; None = défaut du serveur)
+DEFAULT_KEEP_ALIVE = "30m"
+
+
+def normalize_keep_alive(value):
+    """
+    "-1" / "300" -> entier : Ollama lit une chaîne comme une durée Go
+    (time.ParseDuration), qui exige une unité ("5m") ; sinon HTTP 400.
+    """
+    if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+        return int(value.strip())
+    return value
+
+
+# Préchargements en cours dans ce processus : (base_url, modèle). Une clé est
+# retirée dès la fin du préchargement : un modèle déchargé par Ollama (keep_alive
+# expiré) ou re-sélectionné plus tard est préchargé de nouveau.
+_warming_models = set()
+_warm_lock = threading.Lock()
+
 class OllamaLLMClient:
-    def __init__(self, model_name, base_url="http://localhost:11434"):
+    def __init__(self, model_name, base_url="http://localhost:11434", keep_alive=DEFAULT_KEEP_ALIVE):
         self.model_name = model_name
         self.base_url = base_url
+        self.keep_alive = normalize_keep_alive(keep_alive)
+        # Cumul de tous les appels du client (tokens, temps, rechargements du modèle)
+        self.usage = LLMUsage()
+        self.warmup_duration = None
     
     def ask(self, system_prompt, user_prompt, temperature=None, max_tokens=2000):
         """
@@ -46,6 +74,8 @@ class OllamaLLMClient:
         # Ajouter la température si spécifiée
         if temperature is not None:
             request_data["options"]["temperature"] = temperature
+        if self.keep_alive is not None:
+            request_data["keep_alive"] = self.keep_alive
         
         try:
             response = requests.post(
@@ -55,6 +85,13 @@ class OllamaLLMClient:
             )
             response.raise_for_status()
             result = response.json()
+            # Tokens et durées (prefill / decode / chargement du modèle)
+            usage = usage_from_response(result)
+            record_usage(usage)
+            self.usage.add(usage)
+            if usage["load_s"] >= LOAD_STALL_SECONDS:
+                print(f"⚠️ Modèle {self.model_name} rechargé : {usage['load_s']:.1f}s de chargement "
+                      f"(keep_alive={self.keep_alive})")
             return result.get("response", "").strip()
             
         except requests.exceptions.RequestException as e:
@@ -89,6 +126,58 @@ class OllamaLLMClient:
         except Exception as e:
             return f"Error: {str(e)}"
     
+    def warm_up(self, timeout=300):
+        """
+        Précharge le modèle (requête sans prompt) pour que le premier appel
+        réel ne paie pas le chargement à froid.
+        
+        Returns:
+            float: Durée de chargement rapportée par Ollama (s), None en cas d'échec
+        """
+        import requests
+        
+        request_data = {"model": self.model_name, "prompt": "", "stream": False}
+        if self.keep_alive is not None:
+            request_data["keep_alive"] = self.keep_alive
+        
+        start = time.time()
+        try:
+            response = requests.post(f"{self.base_url}/api/generate", json=request_data, timeout=timeout)
+            response.raise_for_status()
+            usage = usage_from_response(response.json())
+        except Exception as e:
+            print(f"⚠️ Préchargement de {self.model_name} impossible: {e}")
+            return None
+        
+        self.warmup_duration = usage["load_s"] or (time.time() - start)
+        print(f"🔥 Modèle {self.model_name} préchargé en {self.warmup_duration:.1f}s (keep_alive={self.keep_alive})")
+        return self.warmup_duration
+    
+    def warm_up_async(self):
+        """
+        Précharge le modèle dans un thread en arrière-plan.
+        Sans effet si ce modèle est déjà en cours de préchargement dans ce processus.
+        
+        Returns:
+            threading.Thread ou None
+        """
+        key = (self.base_url, self.model_name)
+        with _warm_lock:
+            if key in _warming_models:
+                return None
+            _warming_models.add(key)
+        thread = threading.Thread(target=self._warm_up_tracked, args=(key,),
+                                  name=f"warmup-{self.model_name}", daemon=True)
+        thread.start()
+        return thread
+
+    def _warm_up_tracked(self, key):
+        try:
+            self.warm_up()
+        finally:
+            with _warm_lock:
+                _warming_models.discard(key)
+    
     def list_models(self):
         """Liste les modèles disponibles localement"""
         try:
@@ -126,4 +215,49 @@ class OllamaLLMClient:
             response = requests.get(f"{self.base_url}/api/tags", timeout=5)
             return response.status_code == 200
         except:
-            return False
\ No newline at end of file
+            return False
+
+class SupervisedPermits:
+    """
+    Sémaphore dont les jetons sont distribués par un processus superviseur,
+    via un pipe dédié ("acquire" -> "grant", "release"). Le superviseur sait
+    ce que détient chaque worker : si le worker est tué en plein appel LLM,
+    ses jetons sont récupérés au lieu d'être perdus.
+    """
+    def __init__(self, conn):
+        self.conn = conn
+        self._acquire_lock = threading.Lock()
+        self._send_lock = threading.Lock()
+
+    def __enter__(self):
+        # Un seul thread attend une réponse à la fois : chaque "grant" reçu est le sien
+        with self._acquire_lock:
+            with self._send_lock:
+                self.conn.send("acquire")
+            self.conn.recv()
+        return self
+
+    def __exit__(self, *exc):
+        with self._send_lock:
+            self.conn.send("release")
+        return False
+
+
+class ConcurrencyLimitedLLM:
+    """
+    Enveloppe un client LLM et limite le nombre d'appels simultanés.
+    Le sémaphore peut être partagé entre threads ou processus (multiprocessing).
+    """
+    def __init__(self, llm, semaphore):
+        self.llm = llm
+        self.semaphore = semaphore
+    
+    def ask(self, system_prompt, user_prompt, temperature=None, **kwargs):
+        with self.semaphore:
+            if temperature is not None:
+                kwargs["temperature"] = temperature
+            return self.llm.ask(system_prompt=system_prompt, user_prompt=user_prompt, **kwargs)
+    
+    def __getattr__(self, name):
+        # list_models, test_connection, model_name... du client enveloppé
+        return getattr(self.llm, name)
@@ -25,6 +25,10 @@ class Orchestrator:
         }
         self.merge_agent = MergeAgent(llm)
         self.temperature_config = TemperatureConfig()
+        # Préchargement du modèle en arrière-plan (évite le chargement à froid)
+        warm_up_async = getattr(llm, "warm_up_async", None)
+        if callable(warm_up_async):
+            warm_up_async()
 
     def run_parallel(self, code, selected_agent_names, language, temperature_override=None):
         """
@@ -0,0 +1,195 @@
+"""
+Exécution des outils externes : délais adaptatifs et arrêt de l'arbre complet.
+
+- délai par outil = p95 des durées récentes × FACTOR + MARGIN, borné
+  [MIN_TIMEOUT, MAX_TIMEOUT] ; délai par défaut tant que l'historique est
+  trop court. L'historique est conservé sur disque entre les exécutions.
+- chaque commande tourne dans son propre groupe de processus : au timeout,
+  tout l'arbre (mvn, npx et leurs enfants) est tué, pas seulement le parent
+- limites CPU/mémoire optionnelles (core.resource_limits) appliquées à
+  l'enfant après son lancement (prlimit), ou par un shell `ulimit` sans
+  prlimit : jamais de preexec_fn, dangereux dans un processus multi-thread
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import atexit
+import json
+import os
+import signal
+import subprocess
+import threading
+
+from core.resource_limits import apply_limits, can_limit_child, ulimit_wrapper
+from core.tracing import percentile
+
+
+DEFAULT_HISTORY_PATH = "checkpoints/tool_durations.json"
+DEFAULT_TIMEOUT = 30.0
+MIN_TIMEOUT = 5.0
+MAX_TIMEOUT = 300.0
+FACTOR = 3.0
+MARGIN = 2.0
+WINDOW = 50        # durées conservées par outil
+MIN_SAMPLES = 5    # en dessous, délai par défaut
+SAVE_EVERY = 20    # enregistrements entre deux écritures disque
+
+
+class AdaptiveTimeouts:
+    """Historique des durées par outil et délai déduit du p95"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_HISTORY_PATH, default: float = DEFAULT_TIMEOUT):
+        self.path = Path(path) if path else None
+        self.default = default
+        self._lock = threading.Lock()
+        self._durations: Dict[str, deque] = {}
+        self._unsaved = 0
+        self._load()
+
+    def _load(self):
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        for tool, durations in data.items():
+            self._durations[tool] = deque(durations[-WINDOW:], maxlen=WINDOW)
+
+    def save(self):
+        if self.path is None:
+            return
+        with self._lock:
+            payload = {tool: list(durations) for tool, durations in self._durations.items()}
+            self._unsaved = 0
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(payload), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass  # historique best-effort
+
+    def timeout_for(self, tool: str) -> float:
+        with self._lock:
+            durations = sorted(self._durations.get(tool, ()))
+        if len(durations) < MIN_SAMPLES:
+            return self.default
+        return min(MAX_TIMEOUT, max(MIN_TIMEOUT, percentile(durations, 95) * FACTOR + MARGIN))
+
+    def record(self, tool: str, duration: float):
+        """
+        Ajoute une durée. Un timeout s'enregistre avec le délai atteint : le
+        p95 remonte alors progressivement pour un outil réellement plus lent.
+        """
+        with self._lock:
+            self._durations.setdefault(tool, deque(maxlen=WINDOW)).append(round(duration, 3))
+            self._unsaved += 1
+            due = self._unsaved >= SAVE_EVERY
+        if due:
+            self.save()
+
+    def snapshot(self) -> Dict[str, float]:
+        """Délai courant de chaque outil connu"""
+        with self._lock:
+            tools = list(self._durations)
+        return {tool: self.timeout_for(tool) for tool in tools}
+
+
+def _kill_group(process: subprocess.Popen):
+    """Tue le groupe de processus (POSIX) ou le seul processus (Windows)"""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+
+def run_in_group(cmd: List[str], cwd=None, timeout: Optional[float] = None, input: Optional[str] = None,
+                 limits: Optional[Dict[str, int]] = None, env=None) -> Tuple[int, str, str]:
+    """
+    Lance cmd dans un nouveau groupe de processus.
+
+    Returns:
+        tuple: (code_retour, stdout, stderr)
+
+    Raises:
+        subprocess.TimeoutExpired: après avoir tué tout le groupe
+    """
+    use_prlimit = bool(limits) and can_limit_child()
+    if limits and not use_prlimit and os.path.exists("/bin/sh"):
+        cmd = ulimit_wrapper(cmd, limits)
+    process = subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        env=env,
+        stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        errors="ignore",
+        start_new_session=hasattr(os, "setsid")
+    )
+    if use_prlimit:
+        # Les processus lancés ensuite par l'outil héritent de ces limites
+        apply_limits(**limits, pid=process.pid)
+    try:
+        stdout, stderr = process.communicate(input=input, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        _kill_group(process)
+        process.communicate()
+        raise
+    except BaseException:
+        _kill_group(process)
+        process.wait()
+        raise
+    return process.returncode, stdout or "", stderr or ""
+
+
+_timeouts: Optional[AdaptiveTimeouts] = None
+_timeouts_lock = threading.Lock()
+_settings = {"adaptive": True, "limits": None}
+
+
+def configure(adaptive: bool = True, limits: Optional[Dict[str, int]] = None):
+    """
+    Réglages du processus : délais adaptatifs (sinon DEFAULT_TIMEOUT fixe) et
+    limites (memory_mb, cpu_s, file_size_mb) des outils lancés, None = aucune.
+    """
+    _settings["adaptive"] = adaptive
+    _settings["limits"] = dict(limits) if limits else None
+
+
+def adaptive() -> bool:
+    return _settings["adaptive"]
+
+
+def get_timeouts() -> AdaptiveTimeouts:
+    """Historique partagé par le processus (sauvegardé à la sortie)"""
+    global _timeouts
+    with _timeouts_lock:
+        if _timeouts is None:
+            _timeouts = AdaptiveTimeouts()
+            atexit.register(_timeouts.save)
+        return _timeouts
+
+
+def timeout_for(tool: str) -> float:
+    if not _settings["adaptive"]:
+        return DEFAULT_TIMEOUT
+    return get_timeouts().timeout_for(tool)
+
+
+def record(tool: str, duration: float):
+    if _settings["adaptive"]:
+        get_timeouts().record(tool, duration)
+
+
+def tool_limits() -> Optional[Dict[str, int]]:
+    return _settings["limits"]
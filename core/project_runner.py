@@ -0,0 +1,525 @@
+"""
+Refactoring d'un projet entier (répertoire ou glob).
+
+Chaque fichier est une chaîne de tâches (fichier, agent) : l'agent suivant
+reçoit le code produit par le précédent. Les tâches sont exécutées par un
+pool de workers avec vol de travail (work stealing) :
+- chaque worker a sa propre file ; la tâche suivante d'un fichier est
+  poussée dans la file du worker qui vient de le traiter (localité)
+- un worker inactif vole la tâche la plus ancienne du worker le plus chargé
+
+La taille du pool est déduite de la latence LLM mesurée (les workers
+passent l'essentiel de leur temps à attendre le modèle). Les résultats sont
+écrits au fil de l'eau (JSONL + code refactoré), ce qui permet de reprendre
+un run interrompu.
+
+Options du mode fichier également disponibles : export d'une trace du run
+(un span par tâche, JSON + Chrome trace) et test d'équivalence de chaque
+fichier Python refactoré (core.equivalence).
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import contextlib
+import glob
+import json
+import math
+import os
+import threading
+import time
+import uuid
+
+from agents.sandbox_pool import get_pool
+from core import tracing
+from core.equivalence import get_checker
+
+
+LANGUAGE_BY_EXTENSION = {
+    ".py": "Python",
+    ".js": "JavaScript",
+    ".ts": "TypeScript",
+    ".java": "Java",
+    ".cpp": "C++",
+    ".c": "C",
+    ".cs": "C#",
+    ".go": "Go",
+    ".rb": "Ruby",
+}
+
+# Répertoires jamais parcourus en mode projet
+SKIPPED_DIRS = {".git", "__pycache__", ".venv", "venv", "node_modules", ".mypy_cache", ".ruff_cache"}
+
+DEFAULT_MAX_WORKERS = 8
+
+
+def collect_files(target: str) -> List[str]:
+    """Fichiers source d'un répertoire (récursif) ou d'un motif glob"""
+    if os.path.isdir(target):
+        files = []
+        for root, dirs, names in os.walk(target):
+            dirs[:] = sorted(d for d in dirs if d not in SKIPPED_DIRS)
+            files.extend(
+                os.path.join(root, name) for name in sorted(names)
+                if os.path.splitext(name)[1].lower() in LANGUAGE_BY_EXTENSION
+            )
+        return files
+    return sorted(
+        path for path in glob.glob(target, recursive=True)
+        if os.path.isfile(path) and os.path.splitext(path)[1].lower() in LANGUAGE_BY_EXTENSION
+    )
+
+
+def measure_llm_latency(llm, samples: int = 1) -> float:
+    """Latence moyenne (secondes) d'un appel LLM minimal"""
+    durations = []
+    for _ in range(samples):
+        start = time.time()
+        try:
+            llm.ask(system_prompt="Reply with OK.", user_prompt="ping")
+        except Exception as e:
+            print(f"⚠️ Mesure de latence LLM échouée: {e}")
+        durations.append(time.time() - start)
+    return sum(durations) / len(durations)
+
+
+def suggest_pool_size(llm_latency: float, cpu_time: float, max_workers: int = DEFAULT_MAX_WORKERS) -> int:
+    """
+    Nombre de workers pour garder le CPU occupé pendant l'attente du LLM :
+    N = 1 + attente / calcul, borné par max_workers (capacité du serveur LLM).
+    """
+    ratio = llm_latency / max(cpu_time, 1e-3)
+    return max(1, min(max_workers, math.ceil(1 + ratio)))
+
+
+@dataclass
+class FileJob:
+    """État d'un fichier en cours de traitement"""
+    path: str
+    language: str
+    code: str
+    original: str
+    started: float = field(default_factory=time.time)
+    results: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class Task:
+    """Exécution d'un agent (position `step` de la chaîne) sur un fichier"""
+    job: FileJob
+    step: int
+
+
+class WorkStealingPool:
+    """
+    Pool de threads à files locales avec vol de travail.
+    `handler(task, worker_id)` peut soumettre des tâches de suivi via submit().
+    """
+
+    def __init__(self, workers: int, handler):
+        self.workers = workers
+        self.handler = handler
+        self.queues = [deque() for _ in range(workers)]
+        self.cond = threading.Condition()
+        self.in_flight = 0
+        self.steals = 0
+
+    def submit(self, task, worker_id: int):
+        with self.cond:
+            self.queues[worker_id % self.workers].append(task)
+            self.cond.notify()
+
+    def _next_task(self, worker_id: int):
+        """Tâche locale la plus récente, sinon vol de la plus ancienne chez le plus chargé"""
+        with self.cond:
+            while True:
+                own = self.queues[worker_id]
+                if own:
+                    self.in_flight += 1
+                    return own.pop()
+                victim = max(self.queues, key=len)
+                if victim:
+                    self.in_flight += 1
+                    self.steals += 1
+                    return victim.popleft()
+                if self.in_flight == 0:
+                    # Plus rien en file ni en cours : fin du travail
+                    self.cond.notify_all()
+                    return None
+                self.cond.wait()
+
+    def _worker(self, worker_id: int):
+        while True:
+            task = self._next_task(worker_id)
+            if task is None:
+                return
+            try:
+                self.handler(task, worker_id)
+            finally:
+                with self.cond:
+                    self.in_flight -= 1
+                    self.cond.notify_all()
+
+    def run(self):
+        # Contexte du thread appelant (trace en cours éventuelle) propagé aux workers
+        threads = [
+            threading.Thread(target=tracing.bind_context(self._worker), args=(i,),
+                             name=f"refactor-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+class ProjectRunner:
+    """
+    Refactoring multi-fichiers : une chaîne d'agents par fichier, exécutée
+    sur un pool à vol de travail, résultats écrits dès qu'ils sont prêts.
+    """
+
+    PROGRESS_INTERVAL = 5.0  # secondes entre deux lignes de progression
+
+    def __init__(
+        self,
+        orchestrator,
+        selected_agents: List[str],
+        output_dir: str = "refactored_project",
+        results_path: Optional[str] = None,
+        workers: Optional[int] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        temperature_override: Optional[Dict[str, float]] = None,
+        auto_patch: bool = True,
+        auto_test: bool = True,
+        resume: bool = False,
+        validation_batch: int = 0,
+        trace_dir: Optional[str] = None,
+        equivalence: bool = False
+    ):
+        self.orchestrator = orchestrator
+        self.chain = [a for a in selected_agents if a not in ["TestAgent", "PatchAgent", "MergeAgent"]]
+        if auto_patch:
+            self.chain.append("PatchAgent")
+        if auto_test:
+            self.chain.append("TestAgent")
+        self.output_dir = Path(output_dir)
+        self.results_path = Path(results_path or self.output_dir / "results.jsonl")
+        self.workers = workers
+        self.max_workers = max_workers
+        self.temperature_override = temperature_override or {}
+        self.resume = resume
+        # TestAgent groupé : un lancement ruff/mypy/pytest par lot de N fichiers (0 = par fichier)
+        self.validation_batch = validation_batch if auto_test else 0
+        self._validation_queue: List[FileJob] = []
+        # Export de la trace du run (None = pas de trace) et test d'équivalence par fichier
+        self.trace_dir = trace_dir
+        self.equivalence = equivalence
+        self._equivalence_counts: Dict[str, int] = {}
+
+        self._lock = threading.Lock()
+        self._results_file = None
+        self._pool = None
+        self._root = None
+        self._done_tasks = 0
+        self._total_tasks = 0
+        self._worker_tasks: Dict[int, int] = {}
+        self._files_done = 0
+        self._failed_files = 0
+        self._started = 0.0
+        self._last_progress = 0.0
+
+    # ------------------------------------------------------------------
+    # Préparation
+    # ------------------------------------------------------------------
+
+    def _completed_files(self) -> set:
+        """Fichiers déjà terminés lors d'un run précédent (reprise)"""
+        done = set()
+        if not self.resume or not self.results_path.exists():
+            return done
+        with open(self.results_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # ligne tronquée par une interruption
+                if record.get("event") == "file" and record.get("status") == "SUCCESS":
+                    done.add(record["file"])
+        return done
+
+    def _pool_size(self, jobs: List[FileJob]) -> int:
+        """Taille du pool : imposée, ou déduite de la latence LLM mesurée"""
+        if self.workers:
+            return self.workers
+        latency = measure_llm_latency(self.orchestrator.llm)
+        # Coût CPU local d'une tâche : analyse statique d'un fichier échantillon
+        sample = jobs[0]
+        start = time.time()
+        for name in self.chain:
+            agent = self.orchestrator.agent_instances.get(name)
+            if agent is not None and name not in ["PatchAgent", "TestAgent"]:
+                agent.analyze(sample.code, sample.language)
+        cpu_time = (time.time() - start) / max(1, len(self.chain))
+        size = suggest_pool_size(latency, cpu_time, self.max_workers)
+        print(f"⚙️  Latence LLM {latency:.2f}s, analyse {cpu_time * 1000:.1f}ms/tâche → {size} workers")
+        return size
+
+    def _load_jobs(self, files: List[str]) -> List[FileJob]:
+        jobs = []
+        for path in files:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    code = f.read()
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"⚠️ Fichier ignoré {path}: {e}")
+                continue
+            language = LANGUAGE_BY_EXTENSION.get(os.path.splitext(path)[1].lower(), "Python")
+            jobs.append(FileJob(path=path, language=language, code=code, original=code))
+        return jobs
+
+    # ------------------------------------------------------------------
+    # Exécution
+    # ------------------------------------------------------------------
+
+    def run(self, target: str) -> Dict[str, Any]:
+        """
+        Refactore tous les fichiers de `target` (répertoire ou glob).
+
+        Returns:
+            dict: Résumé du run (fichiers, tâches, durée, débit par worker)
+        """
+        files = collect_files(target)
+        self._root = Path(target) if os.path.isdir(target) else Path(os.path.commonpath(files or ["."]))
+        if self._root.is_file():
+            self._root = self._root.parent
+
+        completed = self._completed_files()
+        if completed:
+            print(f"♻️  Reprise: {len(completed)} fichiers déjà traités ignorés")
+        jobs = self._load_jobs([f for f in files if f not in completed])
+        if not jobs or not self.chain:
+            print("ℹ️  Aucun fichier à traiter")
+            return {"files": 0, "tasks": 0, "duration": 0.0, "workers": 0}
+
+        if "TestAgent" in self.chain:
+            # Gabarits de validation (node_modules, dépôt Maven...) préparés pendant le refactoring
+            get_pool().warm(sorted({job.language for job in jobs}))
+
+        workers = self._pool_size(jobs)
+        self._total_tasks = len(jobs) * len(self.chain)
+        self._worker_tasks = {i: 0 for i in range(workers)}
+        print(f"🚀 Projet: {len(jobs)} fichiers × {len(self.chain)} agents = {self._total_tasks} tâches, {workers} workers")
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.results_path.parent.mkdir(parents=True, exist_ok=True)
+        pool = self._pool = WorkStealingPool(workers, self._run_task)
+        self._started = time.time()
+        trace_context = tracing.start_trace("project") if self.trace_dir else contextlib.nullcontext()
+        with open(self.results_path, "a" if self.resume else "w", encoding="utf-8") as results_file, \
+                trace_context as trace:
+            self._results_file = results_file
+            with tracing.span("project", files=len(jobs), workers=workers):
+                for i, job in enumerate(jobs):
+                    pool.submit(Task(job=job, step=0), i)
+                pool.run()
+                # Dernier lot de validation incomplet
+                if self._validation_queue:
+                    self._validate_batch(self._validation_queue)
+                    self._validation_queue = []
+            self._results_file = None
+
+        duration = time.time() - self._started
+        summary = {
+            "files": len(jobs),
+            "failed_files": self._failed_files,
+            "tasks": self._done_tasks,
+            "duration": duration,
+            "workers": workers,
+            "steals": pool.steals,
+            "throughput_per_worker": {
+                f"worker-{i}": count / duration * 60 for i, count in self._worker_tasks.items()
+            },
+            "results_path": str(self.results_path),
+        }
+        if self.equivalence:
+            summary["equivalence"] = dict(self._equivalence_counts)
+        if self.trace_dir:
+            summary["trace_file"] = str(self._export_trace(trace))
+        print(
+            f"✅ Projet terminé: {len(jobs)} fichiers en {duration:.1f}s "
+            f"({self._failed_files} en échec, {pool.steals} vols de tâches)"
+        )
+        return summary
+
+    def _export_trace(self, trace: "tracing.Trace") -> Path:
+        name = f"project_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        trace.export_json(f"{self.trace_dir}/{name}.trace.json")
+        chrome_path = trace.export_chrome(f"{self.trace_dir}/{name}.chrome.json")
+        print(f"🔬 Trace: {chrome_path}")
+        return chrome_path
+
+    def _run_task(self, task: Task, worker_id: int):
+        job = task.job
+        agent_name = self.chain[task.step]
+        if agent_name == "TestAgent" and self.validation_batch:
+            self._queue_validation(job, worker_id)
+            return
+        agent = self.orchestrator.agent_instances.get(agent_name)
+        start = time.time()
+        status = "SUCCESS"
+        result: Dict[str, Any] = {}
+        try:
+            if agent is None:
+                raise KeyError(f"Agent {agent_name} non trouvé")
+            with tracing.span(agent_name, "agent", file=job.path, worker=worker_id):
+                if agent_name in ["PatchAgent", "TestAgent"]:
+                    result = agent.apply(job.code, job.language)
+                else:
+                    temperature = self.temperature_override.get(
+                        agent_name, self.orchestrator.temperature_config.get_temperature(agent_name)
+                    )
+                    result = agent.apply(job.code, job.language, temperature=temperature)
+            if agent_name != "TestAgent":
+                job.code = result.get("proposal", job.code)
+        except Exception as e:
+            status = f"FAILED: {str(e)[:100]}"
+        duration = time.time() - start
+        self._record_task(job, agent_name, worker_id, status, duration, result)
+
+        if task.step + 1 < len(self.chain):
+            # Chaîne du fichier : l'agent suivant reste sur ce worker (sauf vol)
+            self._pool.submit(Task(job=job, step=task.step + 1), worker_id)
+        else:
+            self._finish_file(job)
+
+    def _record_task(self, job: FileJob, agent_name: str, worker_id: Optional[int],
+                     status: str, duration: float, result: Dict[str, Any]):
+        record = {
+            "event": "task",
+            "file": job.path,
+            "agent": agent_name,
+            "worker": worker_id,
+            "status": status,
+            "duration": duration,
+            "issues": len(result.get("analysis", [])),
+            "llm_calls_avoided": result.get("llm_calls_avoided", 0),
+        }
+        if agent_name == "TestAgent":
+            record["test_status"] = result.get("status")
+        job.results.append(record)
+        self._record(record, worker_id)
+
+    def _queue_validation(self, job: FileJob, worker_id: int):
+        """Met le fichier en attente de validation ; le worker qui complète un lot le valide"""
+        with self._lock:
+            self._validation_queue.append(job)
+            if len(self._validation_queue) < self.validation_batch:
+                return
+            batch, self._validation_queue = self._validation_queue, []
+        self._validate_batch(batch, worker_id)
+
+    def _validate_batch(self, jobs: List[FileJob], worker_id: Optional[int] = None):
+        """TestAgent sur un lot de fichiers (un lancement par outil), puis fin des fichiers"""
+        agent = self.orchestrator.agent_instances.get("TestAgent")
+        start = time.time()
+        try:
+            if agent is None:
+                raise KeyError("Agent TestAgent non trouvé")
+            reports = agent.analyze_batch([(job.code, job.language) for job in jobs])
+            statuses = ["SUCCESS"] * len(jobs)
+        except Exception as e:
+            reports = [{} for _ in jobs]
+            statuses = [f"FAILED: {str(e)[:100]}"] * len(jobs)
+        # Durée du lot répartie entre ses fichiers
+        duration = (time.time() - start) / len(jobs)
+        for job, report, status in zip(jobs, reports, statuses):
+            self._record_task(job, "TestAgent", worker_id, status, duration, report)
+            self._finish_file(job)
+
+    def _finish_file(self, job: FileJob):
+        """Écrit le code refactoré et l'enregistrement de fin de fichier"""
+        try:
+            relative = Path(job.path).resolve().relative_to(self._root.resolve())
+        except ValueError:
+            relative = Path(Path(job.path).name)
+        output = self.output_dir / relative
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(job.code, encoding="utf-8")
+
+        failed = [r for r in job.results if r["status"] != "SUCCESS"]
+        record = {
+            "event": "file",
+            "file": job.path,
+            "output": str(output),
+            "status": "FAILED" if failed else "SUCCESS",
+            "duration": time.time() - job.started,
+            "changed": job.code != job.original,
+            "llm_calls_avoided": sum(r["llm_calls_avoided"] for r in job.results),
+            "test_status": next((r.get("test_status") for r in job.results if r["agent"] == "TestAgent"), None),
+        }
+        equivalence = self._check_equivalence(job)
+        if equivalence is not None:
+            record["equivalence_status"] = equivalence["status"]
+            record["equivalence_summary"] = equivalence.get("summary", "")
+        with self._lock:
+            self._files_done += 1
+            if failed:
+                self._failed_files += 1
+        self._record(record)
+
+    def _check_equivalence(self, job: FileJob) -> Optional[Dict[str, Any]]:
+        """Comportement du fichier refactoré comparé à l'original (Python modifié uniquement)"""
+        if not self.equivalence or job.language != "Python" or job.code == job.original:
+            return None
+        with tracing.span("equivalence", "test", file=job.path):
+            try:
+                result = get_checker().check(job.original, job.code)
+            except Exception as e:
+                result = {"status": "ERROR", "summary": str(e)[:200]}
+        if result["status"] != "EQUIVALENT":
+            print(f"   ⚠️ Équivalence {job.path}: {result['status']} {result.get('summary', '')}")
+        with self._lock:
+            self._equivalence_counts[result["status"]] = self._equivalence_counts.get(result["status"], 0) + 1
+        return result
+
+    def _record(self, record: Dict[str, Any], worker_id: Optional[int] = None):
+        """Écrit un résultat (JSONL, flush immédiat) et affiche la progression"""
+        with self._lock:
+            self._results_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._results_file.flush()
+            if record["event"] != "task":
+                return
+            self._done_tasks += 1
+            if worker_id is not None:
+                self._worker_tasks[worker_id] += 1
+            now = time.time()
+            if now - self._last_progress < self.PROGRESS_INTERVAL and self._done_tasks < self._total_tasks:
+                return
+            self._last_progress = now
+            self._print_progress(now)
+
+    def _print_progress(self, now: float):
+        elapsed = now - self._started
+        rate = self._done_tasks / elapsed if elapsed > 0 else 0.0
+        remaining = self._total_tasks - self._done_tasks
+        eta = remaining / rate if rate > 0 else float("inf")
+        per_worker = " ".join(
+            f"w{i}:{count / elapsed * 60:.1f}/min" for i, count in self._worker_tasks.items()
+        )
+        print(
+            f"📈 {self._done_tasks}/{self._total_tasks} tâches "
+            f"({self._files_done} fichiers) | {rate * 60:.1f} tâches/min | "
+            f"ETA {_format_duration(eta)} | {per_worker}"
+        )
+
+
+def _format_duration(seconds: float) -> str:
+    if seconds == float("inf"):
+        return "?"
+    hours, rest = divmod(int(seconds), 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}h{minutes:02d}m{secs:02d}s" if hours else f"{minutes}m{secs:02d}s"
@@ -0,0 +1,314 @@
+"""
+Analyse des identifiants pour RenameAgent (Python).
+
+Une passe `symtable` classe les symboles de chaque fonction (paramètre,
+local, global, capturé par une fonction imbriquée) et une passe `ast`
+localise leurs occurrences. Seuls les noms locaux courts ou peu parlants
+sont retenus comme candidats au renommage.
+
+Les renommages peuvent aussi être appliqués sans LLM : les occurrences sont
+réécrites à leur position exacte, le reste du fichier (formatage,
+commentaires) est conservé tel quel.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+import ast
+import builtins
+import keyword
+import re
+import symtable
+
+from core.static_analysis import iter_functions
+
+
+# Noms courts conventionnels : jamais signalés
+CONVENTIONAL_NAMES = {"_", "i", "j", "k", "self", "cls", "e", "f", "id", "ok", "db", "df"}
+# Noms génériques qui n'informent pas sur le contenu
+POOR_NAMES = {
+    "tmp", "temp", "data", "val", "var", "obj", "res", "ret", "foo", "bar", "baz",
+    "stuff", "thing", "lst", "arr", "dct", "dic", "cnt", "num", "idx", "msg", "err",
+    "str", "list", "dict", "elem", "aux",
+}
+_NUMBERED_RE = re.compile(r"^[A-Za-z]+\d+$")
+
+# Expansions sûres des abréviations courantes
+ABBREVIATIONS = {
+    "idx": "index", "cnt": "count", "num": "number", "val": "value",
+    "res": "result", "ret": "result", "msg": "message", "err": "error",
+    "arr": "values", "lst": "items", "dct": "mapping", "dic": "mapping",
+    "tmp": "temp_value", "str": "text", "s": "text", "n": "count",
+}
+# Nom déduit de l'appel qui initialise la variable
+_CALL_NAMES = {
+    "len": "length", "open": "file", "sum": "total", "sorted": "sorted_items",
+    "input": "user_input", "dict": "mapping", "list": "items", "set": "unique_items",
+    "str": "text", "int": "number", "float": "number", "range": "indices",
+    "enumerate": "indexed_items", "zip": "pairs", "max": "maximum", "min": "minimum",
+}
+_VERB_PREFIX_RE = re.compile(r"^(get|load|fetch|read|compute|calculate|build|make|create|parse|find)_")
+_COMPREHENSION_SCOPES = {"listcomp", "setcomp", "dictcomp", "genexpr"}
+
+
+def is_poor_name(name: str) -> bool:
+    """Nom court (≤ 2 caractères), générique ou numéroté (data1, x2)"""
+    if name in CONVENTIONAL_NAMES or name.startswith("__"):
+        return False
+    bare = name.lstrip("_")
+    return len(bare) <= 2 or bare.lower() in POOR_NAMES or bool(_NUMBERED_RE.match(bare))
+
+
+def _scope_tables(table: symtable.SymbolTable) -> Dict[Tuple[str, int], symtable.SymbolTable]:
+    """Tables des fonctions indexées par (nom, ligne de définition)"""
+    tables = {}
+    stack = [table]
+    while stack:
+        current = stack.pop()
+        for child in current.get_children():
+            if child.get_type() == "function" and child.get_name() not in _COMPREHENSION_SCOPES:
+                tables[(child.get_name(), child.get_lineno())] = child
+            stack.append(child)
+    return tables
+
+
+def _is_captured(table: symtable.SymbolTable, name: str) -> bool:
+    """Le nom est-il lu par une fonction/classe imbriquée (variable de closure) ?"""
+    stack = list(table.get_children())
+    while stack:
+        child = stack.pop()
+        if child.get_name() not in _COMPREHENSION_SCOPES:
+            try:
+                if child.lookup(name).is_free():
+                    return True
+            except KeyError:
+                pass
+        stack.extend(child.get_children())
+    return False
+
+
+def _own_scope_nodes(func: ast.AST):
+    """
+    Nœuds évalués dans la portée de la fonction : les corps des fonctions,
+    lambdas et classes imbriquées sont exclus (leurs décorateurs et valeurs
+    par défaut restent inclus).
+    """
+    stack = list(func.args.args + func.args.posonlyargs + func.args.kwonlyargs)
+    stack += [a for a in (func.args.vararg, func.args.kwarg) if a is not None]
+    stack += list(func.body)
+    while stack:
+        node = stack.pop()
+        yield node
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            stack.extend(getattr(node, "decorator_list", []))
+            stack.extend(node.args.defaults + [d for d in node.args.kw_defaults if d is not None])
+        elif isinstance(node, ast.ClassDef):
+            stack.extend(node.decorator_list + node.bases + [kw.value for kw in node.keywords])
+        else:
+            stack.extend(ast.iter_child_nodes(node))
+
+
+_DYNAMIC_SCOPE_CALLS = {"locals", "vars", "eval", "exec"}
+
+
+def _is_dynamic_scope_call(node: ast.AST) -> bool:
+    return (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in _DYNAMIC_SCOPE_CALLS
+    )
+
+
+def _comprehension_targets(node: ast.AST) -> Set[str]:
+    names = set()
+    for gen in getattr(node, "generators", []):
+        for target in ast.walk(gen.target):
+            if isinstance(target, ast.Name):
+                names.add(target.id)
+    return names
+
+
+def suggest_name(name: str, binding: Optional[ast.AST], taken: Set[str]) -> Optional[str]:
+    """
+    Propose un nom à partir de la liaison de la variable (boucle, appel, littéral)
+    ou d'une abréviation connue. None si aucune déduction n'est sûre.
+    """
+    suggestion = None
+    if isinstance(binding, (ast.For, ast.comprehension)):
+        iterable = binding.iter
+        if isinstance(iterable, ast.Call) and isinstance(iterable.func, ast.Name) and iterable.func.id == "range":
+            suggestion = "index"
+        else:
+            source = iterable.attr if isinstance(iterable, ast.Attribute) else getattr(iterable, "id", "")
+            if len(source) > 3 and source.endswith("s") and not is_poor_name(source):
+                suggestion = source[:-3] + "y" if source.endswith("ies") else source[:-1]
+    elif isinstance(binding, ast.Call):
+        func = binding.func
+        callee = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", "")
+        if callee in _CALL_NAMES:
+            suggestion = _CALL_NAMES[callee]
+        elif _VERB_PREFIX_RE.match(callee):
+            suggestion = _VERB_PREFIX_RE.sub("", callee)
+    elif isinstance(binding, (ast.Dict, ast.DictComp)):
+        suggestion = "mapping"
+    elif isinstance(binding, (ast.List, ast.ListComp)):
+        suggestion = "items"
+    elif isinstance(binding, ast.JoinedStr):
+        suggestion = "text"
+
+    if not suggestion or is_poor_name(suggestion):
+        suggestion = ABBREVIATIONS.get(name.lstrip("_").lower())
+    if not suggestion or not suggestion.isidentifier() or keyword.iskeyword(suggestion):
+        return None
+
+    suggestion = ("_" if name.startswith("_") else "") + suggestion
+    candidate, counter = suggestion, 2
+    while candidate in taken:
+        candidate = f"{suggestion}_{counter}"
+        counter += 1
+    return candidate
+
+
+def _analyze(code: str) -> Optional[List[Dict[str, Any]]]:
+    """Candidats avec leurs occurrences (ligne, colonne en octets)"""
+    try:
+        tree = ast.parse(code)
+        module_table = symtable.symtable(code, "<code>", "exec")
+    except (SyntaxError, ValueError):
+        return None
+
+    tables = _scope_tables(module_table)
+    # Noms à ne jamais réutiliser : tout identifiant du fichier + builtins
+    taken = {n.id for n in ast.walk(tree) if isinstance(n, ast.Name)}
+    taken |= {n.arg for n in ast.walk(tree) if isinstance(n, ast.arg)}
+    taken |= set(dir(builtins))
+
+    candidates = []
+    for qualname, func in iter_functions(tree):
+        table = tables.get((func.name, func.lineno))
+        if table is None:
+            continue
+
+        nodes = list(_own_scope_nodes(func))
+        if any(_is_dynamic_scope_call(node) for node in nodes):
+            continue  # locals()/vars()/eval/exec voient les noms par chaîne : aucun renommage sûr
+        for symbol in table.get_symbols():
+            name = symbol.get_name()
+            if not (symbol.is_parameter() or symbol.is_assigned()):
+                continue
+            if symbol.is_global() or symbol.is_nonlocal() or symbol.is_imported() or symbol.is_namespace():
+                continue
+            if not is_poor_name(name):
+                continue
+
+            occurrences = []
+            binding = None
+            safe = not _is_captured(table, name)
+            for node in nodes:
+                if isinstance(node, ast.Name) and node.id == name:
+                    occurrences.append((node.lineno, node.col_offset))
+                elif isinstance(node, ast.arg) and node.arg == name:
+                    occurrences.append((node.lineno, node.col_offset))
+                elif isinstance(node, ast.ExceptHandler) and node.name == name:
+                    # "except X as nom" : pas de position exacte pour le nom
+                    safe = False
+                elif isinstance(node, (ast.MatchAs, ast.MatchStar)) and node.name == name:
+                    # Capture d'un motif "case" : même problème que "except ... as"
+                    safe = False
+                elif isinstance(node, ast.MatchMapping) and node.rest == name:
+                    safe = False
+                elif isinstance(node, (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+                    if name in _comprehension_targets(node):
+                        safe = False
+                elif binding is None and isinstance(node, (ast.Assign, ast.AnnAssign)):
+                    targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                    if any(isinstance(t, ast.Name) and t.id == name for t in targets):
+                        binding = node.value
+                elif binding is None and isinstance(node, ast.For):
+                    if isinstance(node.target, ast.Name) and node.target.id == name:
+                        binding = node
+
+            suggestion = suggest_name(name, binding, taken)
+            if suggestion:
+                taken.add(suggestion)
+            kind = "paramètre" if symbol.is_parameter() else "variable locale"
+            candidates.append({
+                "type": "rename",
+                "note": f"{name} ({kind} de {qualname}, {len(occurrences)} usages)",
+                "name": name,
+                "scope": qualname,
+                "kind": "parameter" if symbol.is_parameter() else "local",
+                "uses": len(occurrences),
+                "lineno": func.lineno,
+                "end_lineno": func.end_lineno,
+                "suggestion": suggestion,
+                "safe": safe,
+                "occurrences": sorted(occurrences),
+            })
+
+    candidates.sort(key=lambda c: (c["lineno"], c["name"]))
+    return candidates
+
+
+def rename_candidates(code: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Identifiants locaux mal nommés, avec portée et nombre d'usages.
+    Retourne None si le code n'est pas du Python valide.
+    """
+    candidates = _analyze(code)
+    if candidates is None:
+        return None
+    for candidate in candidates:
+        del candidate["occurrences"]
+    return candidates
+
+
+def apply_renames(code: str, rename_parameters: bool = False) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Applique les renommages déductibles sans LLM, par réécriture aux positions AST.
+
+    Les paramètres ne sont renommés que si rename_parameters=True (un appelant
+    peut les passer par mot-clé). Les variables capturées par une closure ou
+    liées par "except ... as" ou un motif "case" sont ignorées, de même que les
+    fonctions qui appellent locals(), vars(), eval ou exec.
+
+    Returns:
+        (code réécrit, renommages appliqués)
+    """
+    candidates = _analyze(code)
+    if not candidates:
+        return code, []
+
+    lines = code.splitlines(keepends=True)
+    edits: Dict[int, List[Tuple[int, int, str]]] = {}
+    applied = []
+    for candidate in candidates:
+        new_name = candidate["suggestion"]
+        if not new_name or not candidate["safe"]:
+            continue
+        if candidate["kind"] == "parameter" and not rename_parameters:
+            continue
+
+        name = candidate["name"]
+        spans = []
+        for lineno, byte_col in candidate["occurrences"]:
+            line = lines[lineno - 1]
+            col = len(line.encode("utf-8")[:byte_col].decode("utf-8", errors="ignore"))
+            if line[col:col + len(name)] != name:
+                spans = None  # position incohérente : on ne touche pas à ce nom
+                break
+            spans.append((lineno, col))
+        if not spans:
+            continue
+
+        for lineno, col in spans:
+            edits.setdefault(lineno, []).append((col, len(name), new_name))
+        applied.append({"scope": candidate["scope"], "old": name, "new": new_name, "uses": len(spans)})
+
+    for lineno, line_edits in edits.items():
+        line = lines[lineno - 1]
+        for col, length, new_name in sorted(line_edits, reverse=True):
+            line = line[:col] + new_name + line[col + length:]
+        lines[lineno - 1] = line
+
+    return "".join(lines), applied
@@ -0,0 +1,109 @@
+"""
+Limites de ressources des processus qui exécutent du code généré (POSIX).
+
+`apply_limits` s'appelle dans le processus enfant lui-même (initializer
+d'un pool de processus), ou depuis le parent avec pid= (prlimit, Linux)
+pour un enfant lancé par subprocess : preexec_fn n'est pas sûr dans un
+processus multi-thread. Sans le module `resource` (Windows), les limites
+sont ignorées.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+import math
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+DEFAULT_LIMITS = {
+    "memory_mb": 1024,   # espace d'adressage (RLIMIT_AS)
+    "cpu_s": 600,        # temps CPU cumulé du processus (RLIMIT_CPU)
+    "file_size_mb": 64,  # taille maximale d'un fichier écrit (RLIMIT_FSIZE)
+}
+
+MB = 1024 * 1024
+
+
+def _set(limit, value, pid: Optional[int] = None) -> bool:
+    """Abaisse une limite douce sans dépasser la limite dure existante (pid : autre processus)"""
+    try:
+        soft, hard = resource.getrlimit(limit) if pid is None else resource.prlimit(pid, limit)
+        if hard != resource.RLIM_INFINITY:
+            value = min(value, hard)
+        if soft != resource.RLIM_INFINITY and soft <= value:
+            return False
+        if pid is None:
+            resource.setrlimit(limit, (value, hard))
+        else:
+            resource.prlimit(pid, limit, (value, hard))
+    except (ValueError, OSError):
+        return False
+    return True
+
+
+def apply_limits(memory_mb: Optional[int] = None, cpu_s: Optional[int] = None,
+                 file_size_mb: Optional[int] = None, pid: Optional[int] = None) -> List[str]:
+    """
+    Applique les limites au processus courant, ou au processus `pid` via
+    prlimit (Linux) (None = limite non modifiée).
+
+    Returns:
+        list: Noms des limites effectivement appliquées
+    """
+    if resource is None or (pid is not None and not hasattr(resource, "prlimit")):
+        return []
+    applied = []
+    if memory_mb and _set(resource.RLIMIT_AS, memory_mb * MB, pid):
+        applied.append("memory_mb")
+    if cpu_s and _set(resource.RLIMIT_CPU, cpu_s, pid):
+        applied.append("cpu_s")
+    if file_size_mb and _set(resource.RLIMIT_FSIZE, file_size_mb * MB, pid):
+        applied.append("file_size_mb")
+    # Pas de core dump pour un processus tué par une limite
+    _set(resource.RLIMIT_CORE, 0, pid)
+    return applied
+
+
+def can_limit_child() -> bool:
+    """Limites applicables à un enfant déjà lancé (prlimit, Linux uniquement)"""
+    return resource is not None and hasattr(resource, "prlimit")
+
+
+def ulimit_wrapper(cmd: List[str], limits: Dict[str, int]) -> List[str]:
+    """
+    Sans prlimit : préfixe la commande d'un shell qui pose les limites
+    (ulimit) avant de l'exécuter (exec), sans preexec_fn côté Python.
+    """
+    settings = ["ulimit -c 0"]
+    if limits.get("memory_mb"):
+        settings.append(f"ulimit -v {int(limits['memory_mb']) * 1024}")
+    if limits.get("cpu_s"):
+        settings.append(f"ulimit -t {int(limits['cpu_s'])}")
+    if limits.get("file_size_mb"):
+        settings.append(f"ulimit -f {int(limits['file_size_mb']) * 2048}")  # blocs de 512 octets
+    script = "; ".join(f"{setting} 2>/dev/null" for setting in settings) + '; exec "$@"'
+    return ["/bin/sh", "-c", script, "sh", *cmd]
+
+
+def reset_cpu_budget(cpu_s: Optional[int]) -> bool:
+    """
+    RLIMIT_CPU compte le temps CPU de toute la vie du processus : pour un
+    processus réutilisé, repousse la limite douce à (temps déjà consommé +
+    cpu_s). Appelé avant chaque tâche, c'est un budget par tâche.
+    """
+    if resource is None or not cpu_s:
+        return False
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    value = math.ceil(usage.ru_utime + usage.ru_stime) + cpu_s
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        value = min(value, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_CPU, (value, hard))
+    except (ValueError, OSError):
+        return False
+    return True
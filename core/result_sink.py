@@ -0,0 +1,100 @@
+"""
+Journal de résultats append-only (JSONL).
+
+Chaque résultat est écrit et flushé dès qu'il est produit : un crash ne perd
+que le test en cours, et rien n'est accumulé en mémoire. Les rapports
+(CSV, Excel) sont reconstruits ensuite en relisant le journal en streaming.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Sequence, Set, Tuple
+import hashlib
+import json
+import threading
+
+
+def code_hash(code: str) -> str:
+    """Empreinte courte d'un code (le code lui-même reste hors du journal)"""
+    return hashlib.blake2b(code.encode("utf-8"), digest_size=12).hexdigest()
+
+
+class ResultSink:
+    """Écriture append-only d'un résultat par ligne, sûre entre threads"""
+
+    def __init__(self, path, append: bool = True):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a" if append else "w", encoding="utf-8")
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def append(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_records(path) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """(offset, enregistrement) dans l'ordre du fichier ; lignes tronquées ignorées"""
+    path = Path(path)
+    if not path.exists():
+        return
+    with open(path, "rb") as f:
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            try:
+                yield offset, json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue  # ligne tronquée par une interruption
+
+
+def completed_keys(path, key_fields: Sequence[str], status: str = "SUCCESS") -> Set[Tuple]:
+    """Clés des résultats déjà réussis (reprise d'un run)"""
+    return {
+        tuple(record.get(k) for k in key_fields)
+        for _, record in iter_records(path)
+        if record.get("status") == status
+    }
+
+
+def iter_results(
+    path,
+    key_fields: Sequence[str],
+    order_field: Optional[str] = "index",
+) -> Iterator[Dict[str, Any]]:
+    """
+    Relit le journal : un résultat par clé (le dernier écrit l'emporte,
+    ex. un test rejoué après reprise), trié selon order_field.
+
+    Seuls (ordre, offset) sont gardés en mémoire ; chaque résultat est relu
+    depuis le disque au moment où il est produit.
+    """
+    latest: Dict[Tuple, Tuple[Any, int]] = {}
+    for offset, record in iter_records(path):
+        key = tuple(record.get(k) for k in key_fields)
+        order = record.get(order_field, 0) if order_field else 0
+        latest[key] = (order, offset)
+
+    positions = sorted(latest.values(), key=lambda item: (item[0], item[1]))
+    with open(path, "rb") as f:
+        for _, offset in positions:
+            f.seek(offset)
+            yield json.loads(f.readline())
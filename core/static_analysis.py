@@ -0,0 +1,427 @@
+"""
+Détecteurs statiques rapides (AST) utilisés par les agents pour décider
+si un appel LLM est nécessaire : complexité cyclomatique, imbrication des
+boucles, longueur des fonctions, sous-arbres dupliqués et noms utilisés
+(imports inutilisés, voir core/import_cleanup.py).
+
+Chaque détecteur retourne des "findings" au format des analyses d'agents :
+{"type", "note", "lineno", "end_lineno", ...}.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+import ast
+import re
+
+from core.clone_detection import MIN_MASS, MIN_STATEMENTS, detect_clones
+
+
+LOOP_NODES = (ast.For, ast.AsyncFor, ast.While)
+BLOCK_NODES = LOOP_NODES + (ast.If, ast.With, ast.AsyncWith, ast.Try)
+FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+def parse_python(code: str) -> Optional[ast.AST]:
+    """ast.parse tolérant : None si le code n'est pas du Python valide"""
+    try:
+        return ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+
+
+def unparsable_finding(code: str) -> List[Dict[str, Any]]:
+    """
+    Code non analysable (ex: réponse LLM avec du texte) : on ne peut pas
+    conclure qu'il est propre, l'analyse est donc déléguée au LLM.
+    """
+    return [{
+        "type": "unparsable",
+        "note": "Code non analysable statiquement - analyse déléguée au LLM",
+        "lineno": 1,
+        "end_lineno": max(1, len(code.splitlines())),
+    }]
+
+
+# ----------------------------------------------------------------------
+# COMPLEXITÉ
+# ----------------------------------------------------------------------
+
+def cyclomatic_complexity(func: ast.AST) -> int:
+    """
+    Complexité cyclomatique (McCabe) d'une fonction :
+    1 + nombre de points de décision, sans descendre dans les fonctions imbriquées.
+    """
+    complexity = 1
+    stack = list(ast.iter_child_nodes(func))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, FUNCTION_NODES + (ast.ClassDef, ast.Lambda)):
+            continue
+        if isinstance(node, (ast.If, ast.IfExp, ast.ExceptHandler, ast.Assert) + LOOP_NODES):
+            complexity += 1
+        elif isinstance(node, ast.BoolOp):
+            complexity += len(node.values) - 1
+        elif isinstance(node, ast.comprehension):
+            complexity += 1 + len(node.ifs)
+        elif hasattr(ast, "match_case") and isinstance(node, ast.match_case):
+            complexity += 1
+        stack.extend(ast.iter_child_nodes(node))
+    return complexity
+
+
+def _is_elif(parent: ast.AST, child: ast.AST) -> bool:
+    """child est le `elif` de parent (orelse réduit à un seul if) : même niveau d'imbrication"""
+    return (
+        isinstance(parent, ast.If)
+        and isinstance(child, ast.If)
+        and len(parent.orelse) == 1
+        and parent.orelse[0] is child
+    )
+
+
+def nesting_depths(func: ast.AST) -> Dict[str, int]:
+    """
+    Profondeurs maximales d'imbrication d'une fonction :
+    "loop" (boucles imbriquées) et "block" (if/for/while/with/try imbriqués ;
+    une chaîne if/elif/else compte pour un seul niveau).
+    """
+    max_loop = 0
+    max_block = 0
+    stack = [(child, 0, 0) for child in ast.iter_child_nodes(func)]
+    while stack:
+        node, loops, blocks = stack.pop()
+        if isinstance(node, FUNCTION_NODES + (ast.ClassDef, ast.Lambda)):
+            continue
+        if isinstance(node, LOOP_NODES):
+            loops += 1
+            max_loop = max(max_loop, loops)
+        if isinstance(node, BLOCK_NODES):
+            blocks += 1
+            max_block = max(max_block, blocks)
+        for child in ast.iter_child_nodes(node):
+            stack.append((child, loops, blocks - 1 if _is_elif(node, child) else blocks))
+    return {"loop": max_loop, "block": max_block}
+
+
+def iter_functions(tree: ast.AST):
+    """Toutes les fonctions/méthodes du module avec leur nom qualifié"""
+    stack = [(tree, "")]
+    while stack:
+        node, prefix = stack.pop()
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, FUNCTION_NODES):
+                qualname = f"{prefix}{child.name}"
+                yield qualname, child
+                stack.append((child, qualname + "."))
+            elif isinstance(child, ast.ClassDef):
+                stack.append((child, f"{prefix}{child.name}."))
+            else:
+                stack.append((child, prefix))
+
+
+def complexity_findings(
+    code: str,
+    max_cyclomatic: int = 5,
+    max_loop_depth: int = 1,
+    max_block_depth: int = 2
+) -> List[Dict[str, Any]]:
+    """Fonctions dépassant les seuils de complexité (Python)"""
+    tree = parse_python(code)
+    if tree is None:
+        return unparsable_finding(code)
+
+    findings = []
+    for qualname, func in iter_functions(tree):
+        complexity = cyclomatic_complexity(func)
+        depths = nesting_depths(func)
+        reasons = []
+        if complexity > max_cyclomatic:
+            reasons.append(f"complexité cyclomatique {complexity} > {max_cyclomatic}")
+        if depths["loop"] > max_loop_depth:
+            reasons.append(f"{depths['loop']} boucles imbriquées")
+        if depths["block"] > max_block_depth:
+            reasons.append(f"imbrication de {depths['block']} blocs")
+        if reasons:
+            findings.append({
+                "type": "complexity",
+                "note": f"{qualname} (lignes {func.lineno}-{func.end_lineno}): " + ", ".join(reasons),
+                "name": qualname,
+                "lineno": func.lineno,
+                "end_lineno": func.end_lineno,
+                "cyclomatic": complexity,
+                "loop_depth": depths["loop"],
+                "block_depth": depths["block"],
+            })
+    findings.sort(key=lambda f: f["lineno"])
+    return findings
+
+
+_LOOP_KEYWORD_RE = re.compile(r"\b(for|while|do)\b")
+
+
+def loop_lines(code: str) -> List[Dict[str, Any]]:
+    """Autres langages : lignes contenant un vrai mot-clé de boucle (pas "format")"""
+    findings = []
+    for i, line in enumerate(code.splitlines(), 1):
+        stripped = line.strip()
+        if stripped.startswith(("//", "#", "*", "/*")):
+            continue
+        if _LOOP_KEYWORD_RE.search(stripped):
+            findings.append({"type": "loop", "note": stripped, "lineno": i, "end_lineno": i})
+    return findings
+
+
+# ----------------------------------------------------------------------
+# FONCTIONS LONGUES
+# ----------------------------------------------------------------------
+
+def function_metrics(tree: ast.AST) -> List[Dict[str, Any]]:
+    """
+    Mesures de chaque fonction en un seul parcours de l'arbre :
+    plage exacte (décorateurs inclus), nombre de statements propres
+    (hors fonctions imbriquées) et profondeur maximale d'imbrication des blocs
+    (une chaîne if/elif/else compte pour un seul niveau).
+    """
+    metrics: List[Dict[str, Any]] = []
+    # (nœud, prefixe du nom qualifié, mesures de la fonction englobante, profondeur)
+    stack = [(child, "", None, 0) for child in reversed(_child_statements(tree))]
+    while stack:
+        node, prefix, current, depth = stack.pop()
+
+        if isinstance(node, FUNCTION_NODES):
+            start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            current = {
+                "name": f"{prefix}{node.name}",
+                "lineno": start,
+                "end_lineno": node.end_lineno,
+                "lines": node.end_lineno - start + 1,
+                "statements": 0,
+                "depth": 0,
+            }
+            metrics.append(current)
+            prefix, depth = current["name"] + ".", 0
+        elif isinstance(node, ast.ClassDef):
+            prefix = f"{prefix}{node.name}."
+        elif current is not None and isinstance(node, ast.stmt):
+            current["statements"] += 1
+            if isinstance(node, BLOCK_NODES):
+                depth += 1
+                current["depth"] = max(current["depth"], depth)
+
+        # Seuls les blocs de statements sont parcourus (les expressions n'en contiennent pas)
+        for child in reversed(_child_statements(node)):
+            stack.append((child, prefix, current, depth - 1 if _is_elif(node, child) else depth))
+    return metrics
+
+
+def _child_statements(node: ast.AST) -> List[ast.AST]:
+    """Statements directement contenus dans un nœud (corps, else, except, case)"""
+    children: List[ast.AST] = []
+    for field in ("body", "orelse", "finalbody"):
+        block = getattr(node, field, None)
+        if isinstance(block, list):
+            children.extend(block)
+    for wrapper in getattr(node, "handlers", []) + getattr(node, "cases", []):
+        children.extend(wrapper.body)
+    return children
+
+
+def long_function_findings(
+    code: str,
+    max_lines: int = 20,
+    max_statements: int = 15,
+    max_depth: int = 3
+) -> List[Dict[str, Any]]:
+    """Fonctions dépassant les seuils de longueur ou d'imbrication (Python)"""
+    tree = parse_python(code)
+    if tree is None:
+        return unparsable_finding(code)
+
+    findings = []
+    for func in function_metrics(tree):
+        reasons = []
+        if func["lines"] > max_lines:
+            reasons.append(f"{func['lines']} lignes > {max_lines}")
+        if func["statements"] > max_statements:
+            reasons.append(f"{func['statements']} statements > {max_statements}")
+        if func["depth"] > max_depth:
+            reasons.append(f"imbrication {func['depth']} > {max_depth}")
+        if reasons:
+            findings.append(_long_function_finding(func, reasons))
+    return findings
+
+
+def _long_function_finding(func: Dict[str, Any], reasons: List[str]) -> Dict[str, Any]:
+    return {
+        "type": "long_function",
+        "note": f"{func['name']} (lignes {func['lineno']}-{func['end_lineno']}): " + ", ".join(reasons),
+        **func,
+    }
+
+
+# En-têtes de fonctions des langages à accolades (C, C++, Java, C#, JS/TS, Go)
+_BRACE_FUNCTION_RE = re.compile(
+    r"^\s*(?:(?:export|async|public|private|protected|internal|static|final|virtual|override|inline)\s+)*"
+    r"(?:function\s*\*?\s*(?P<js>[A-Za-z_$][\w$]*)"
+    r"|func\s+(?:\([^)]*\)\s*)?(?P<go>[A-Za-z_]\w*)"
+    r"|[\w<>\[\],.*&:\s]+?\b(?P<c>[A-Za-z_]\w*))\s*\("
+)
+_BRACE_KEYWORDS = {"if", "for", "while", "switch", "catch", "return", "else", "do", "new", "sizeof"}
+_STRING_OR_COMMENT_RE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`[^`]*`|//.*$')
+
+
+def brace_function_spans(code: str) -> List[Dict[str, Any]]:
+    """
+    Autres langages : plages des fonctions par comptage d'accolades, en une passe.
+    Chaînes et commentaires de fin de ligne sont ignorés.
+    """
+    spans = []
+    pending = None  # en-tête vu, accolade ouvrante pas encore rencontrée
+    open_functions = []  # (nom, ligne de début, profondeur à l'ouverture)
+    depth = 0
+    in_block_comment = False
+
+    for lineno, raw in enumerate(code.splitlines(), 1):
+        line = raw
+        if in_block_comment:
+            if "*/" not in line:
+                continue
+            line = line.split("*/", 1)[1]
+            in_block_comment = False
+        line = _STRING_OR_COMMENT_RE.sub("", line)
+        if "/*" in line:
+            head, _, tail = line.partition("/*")
+            in_block_comment = "*/" not in tail
+            line = head + (tail.split("*/", 1)[1] if not in_block_comment else "")
+
+        match = _BRACE_FUNCTION_RE.match(line)
+        if match:
+            name = match.group("js") or match.group("go") or match.group("c")
+            if name not in _BRACE_KEYWORDS:
+                pending = (name, lineno)
+
+        for char in line:
+            if char == "{":
+                if pending is not None:
+                    open_functions.append((pending[0], pending[1], depth))
+                    pending = None
+                depth += 1
+            elif char == "}":
+                depth = max(0, depth - 1)
+                if open_functions and open_functions[-1][2] == depth:
+                    name, start, _ = open_functions.pop()
+                    spans.append({"name": name, "lineno": start, "end_lineno": lineno,
+                                  "lines": lineno - start + 1})
+            elif char == ";" and pending is not None:
+                # Déclaration sans corps (prototype, appel)
+                pending = None
+
+    spans.sort(key=lambda f: f["lineno"])
+    return spans
+
+
+def brace_long_function_findings(code: str, max_lines: int = 30) -> List[Dict[str, Any]]:
+    """Fonctions trop longues des langages à accolades"""
+    return [
+        _long_function_finding(func, [f"{func['lines']} lignes > {max_lines}"])
+        for func in brace_function_spans(code)
+        if func["lines"] > max_lines
+    ]
+
+
+# ----------------------------------------------------------------------
+# DUPLICATION
+# ----------------------------------------------------------------------
+
+def duplicate_findings(
+    code: str,
+    min_statements: int = MIN_STATEMENTS,
+    min_mass: int = MIN_MASS
+) -> List[Dict[str, Any]]:
+    """
+    Blocs dupliqués (sous-arbres AST normalisés, identifiants et littéraux abstraits).
+    min_mass : nombre minimal de nœuds AST du bloc (ignore les blocs triviaux).
+    """
+    clones = detect_clones(code, min_statements, min_mass)
+    if clones is None:
+        return unparsable_finding(code)
+
+    findings = []
+    for clone in clones:
+        spans = [(start, end) for _, start, end in clone.locations]
+        findings.append({
+            "type": "duplication",
+            "note": "Bloc dupliqué aux lignes " + ", ".join(f"{a}-{b}" for a, b in spans),
+            "lineno": spans[0][0],
+            "end_lineno": spans[0][1],
+            "locations": spans,
+            "mass": clone.mass,
+        })
+    return findings
+
+
+def duplicate_line_windows(code: str, window: int = 4) -> List[Dict[str, Any]]:
+    """Autres langages : fenêtres de lignes normalisées identiques"""
+    lines = [(i, re.sub(r"\s+", " ", l.strip())) for i, l in enumerate(code.splitlines(), 1)]
+    lines = [(i, l) for i, l in lines if len(l) > 2 and l not in ("{", "}", "};")]
+
+    seen: Dict[str, List[int]] = {}
+    for k in range(len(lines) - window + 1):
+        chunk = lines[k:k + window]
+        key = "\n".join(l for _, l in chunk)
+        seen.setdefault(key, []).append(k)
+
+    findings = []
+    for starts in seen.values():
+        if len(starts) < 2:
+            continue
+        spans = [(lines[k][0], lines[k + window - 1][0]) for k in starts]
+        findings.append({
+            "type": "duplication",
+            "note": "Lignes dupliquées aux lignes " + ", ".join(f"{a}-{b}" for a, b in spans),
+            "lineno": spans[0][0],
+            "end_lineno": spans[0][1],
+            "locations": spans,
+        })
+    return findings
+
+
+# ----------------------------------------------------------------------
+# IMPORTS
+# ----------------------------------------------------------------------
+
+def _string_annotation_names(annotation: Optional[ast.AST]) -> set:
+    """Noms cités dans une annotation sous forme de chaîne ("Optional[Foo]")"""
+    if not (isinstance(annotation, ast.Constant) and isinstance(annotation.value, str)):
+        return set()
+    try:
+        expr = ast.parse(annotation.value, mode="eval")
+    except SyntaxError:
+        return set()
+    return {n.id for n in ast.walk(expr) if isinstance(n, ast.Name)}
+
+
+def used_names(tree: ast.AST) -> set:
+    """
+    Noms réellement référencés : Name (donc aussi racines d'attributs),
+    annotations en chaîne et entrées de __all__
+    """
+    used = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            used.add(node.id)
+        elif isinstance(node, ast.arg):
+            used |= _string_annotation_names(node.annotation)
+        elif isinstance(node, FUNCTION_NODES):
+            used |= _string_annotation_names(node.returns)
+        elif isinstance(node, ast.AnnAssign):
+            used |= _string_annotation_names(node.annotation)
+        elif isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name) and target.id == "__all__":
+                    if isinstance(node.value, (ast.List, ast.Tuple)):
+                        for elt in node.value.elts:
+                            if isinstance(elt, ast.Constant) and isinstance(elt.value, str):
+                                used.add(elt.value)
+    return used
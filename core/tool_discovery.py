@@ -0,0 +1,155 @@
+"""
+Découverte des outils externes (ruff, mypy, mvn, go...), une fois par processus.
+
+- résolution par shutil.which : aucun sous-processus pour savoir si un outil existe
+- "--version" sondé paresseusement, uniquement pour les outils demandés
+  (ceux du langage analysé), puis mis en cache en mémoire et sur disque
+- le cache disque est invalidé par un changement de PATH, et chaque entrée
+  est indexée par (chemin, mtime, taille) de l'exécutable : une mise à jour
+  de l'outil provoque un nouveau sondage
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Optional
+import json
+import os
+import shutil
+import subprocess
+import threading
+
+from core import tracing
+
+
+DEFAULT_CACHE_PATH = "checkpoints/tool_cache.json"
+VERSION_TIMEOUT = 5
+
+TOOLS_BY_LANGUAGE = {
+    "python": ["python", "ruff", "black", "mypy", "pytest", "coverage"],
+    "javascript": ["npm", "npx", "node"],
+    "typescript": ["npm", "npx", "node"],
+    "java": ["javac", "mvn", "gradle"],
+    "c": ["gcc", "make"],
+    "cpp": ["g++", "make"],
+    "c++": ["g++", "make"],
+    "go": ["go"],
+    "ruby": ["ruby", "rspec"],
+}
+
+
+class ToolRegistry:
+    """Disponibilité et version des outils, partagées par tout le processus"""
+
+    def __init__(self, cache_path: Optional[str] = DEFAULT_CACHE_PATH):
+        self.cache_path = Path(cache_path) if cache_path else None
+        self._lock = threading.Lock()
+        # Clé d'exécutable -> {"ok": bool, "version": str}
+        self._entries: Dict[str, Dict] = {}
+        self._disk_loaded = False
+
+    @staticmethod
+    def _executable_key(path: str) -> Optional[str]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return f"{path}|{stat.st_mtime_ns}|{stat.st_size}"
+
+    def _load_disk(self):
+        """Charge le cache disque (une fois) s'il correspond au PATH courant"""
+        if self._disk_loaded:
+            return
+        self._disk_loaded = True
+        if self.cache_path is None or not self.cache_path.exists():
+            return
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("path_env") == os.environ.get("PATH", ""):
+            self._entries.update(data.get("tools", {}))
+
+    def _save_disk(self):
+        if self.cache_path is None:
+            return
+        payload = {"path_env": os.environ.get("PATH", ""), "tools": dict(self._entries)}
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass  # cache best-effort : le sondage sera refait au prochain processus
+
+    def resolve(self, tool: str) -> Optional[str]:
+        """Chemin de l'exécutable, ou None s'il n'est pas dans le PATH"""
+        return shutil.which(tool)
+
+    def probe(self, tool: str) -> Dict:
+        """Résultat (mis en cache) du sondage "<tool> --version" """
+        path = self.resolve(tool)
+        key = self._executable_key(path) if path else None
+        if key is None:
+            return {"ok": False, "version": None}
+
+        with self._lock:
+            self._load_disk()
+            if key in self._entries:
+                return self._entries[key]
+
+        entry = {"ok": False, "version": None}
+        persistent = True
+        try:
+            with tracing.span(f"detect:{tool}", "tool_detection"):
+                p = subprocess.run(
+                    [path, "--version"],
+                    capture_output=True,
+                    text=True,
+                    errors="ignore",
+                    check=False,
+                    timeout=VERSION_TIMEOUT
+                )
+            output = (p.stdout or p.stderr or "").strip()
+            entry = {"ok": True, "version": output.splitlines()[0] if output else ""}
+        except subprocess.TimeoutExpired:
+            persistent = False  # lenteur passagère possible : ne pas la figer sur disque
+        except OSError:
+            pass
+
+        with self._lock:
+            self._entries[key] = entry
+            if persistent:
+                self._save_disk()
+        return entry
+
+    def is_available(self, tool: str) -> bool:
+        return self.probe(tool)["ok"]
+
+    def version(self, tool: str) -> Optional[str]:
+        return self.probe(tool)["version"]
+
+    def available_tools(self, language: str) -> Dict[str, bool]:
+        """Disponibilité des seuls outils utiles au langage"""
+        return {tool: self.is_available(tool) for tool in TOOLS_BY_LANGUAGE.get(language.lower(), [])}
+
+
+_registry: Optional[ToolRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ToolRegistry:
+    """Registre partagé par le processus"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ToolRegistry()
+        return _registry
+
+
+def is_available(tool: str) -> bool:
+    return get_registry().is_available(tool)
+
+
+def available_tools(language: str) -> Dict[str, bool]:
+    return get_registry().available_tools(language)
@@ -0,0 +1,246 @@
+"""
+Traçage léger par spans (contextvars).
+
+Un workflow ouvre une trace (`start_trace`) ; chaque étape instrumentée
+(`span`) y ajoute un intervalle typé par catégorie : agent, analysis,
+prompt_build, graphrag, llm, patch, test, subprocess...
+
+- hors d'une trace, `span` ne coûte qu'une lecture de contextvar
+- la trace suit le contexte : les threads lancés via `bind_context`
+  (ThreadPoolExecutor) rattachent leurs spans au span parent
+- export JSON, Chrome trace (chrome://tracing, Perfetto), ventilation par
+  catégorie (temps propre = durée - enfants) et percentiles p50/p95/p99
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+import itertools
+import json
+import math
+import os
+import threading
+import time
+
+
+@dataclass
+class Span:
+    name: str
+    category: str
+    start: float  # secondes depuis le début de la trace
+    span_id: int
+    parent_id: Optional[int]
+    thread_id: int
+    end: Optional[float] = None
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else self.start) - self.start
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentile au rang le plus proche (values triées)"""
+    if not values:
+        return 0.0
+    rank = math.ceil(q / 100 * len(values))
+    return values[min(len(values), max(rank, 1)) - 1]
+
+
+class Trace:
+    """Spans d'un workflow ; ajout thread-safe"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = time.time()
+        self._origin = time.perf_counter()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.spans: List[Span] = []
+
+    def now(self) -> float:
+        return time.perf_counter() - self._origin
+
+    def open(self, name: str, category: str, parent_id: Optional[int], attrs: Dict[str, Any]) -> Span:
+        span = Span(
+            name=name,
+            category=category,
+            start=self.now(),
+            span_id=next(self._ids),
+            parent_id=parent_id,
+            thread_id=threading.get_ident(),
+            attrs=attrs,
+        )
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def finished(self) -> List[Span]:
+        with self._lock:
+            return [s for s in self.spans if s.end is not None]
+
+    # ------------------------------------------------------------------
+    # Agrégats
+    # ------------------------------------------------------------------
+
+    def breakdown(self) -> Dict[str, Dict[str, float]]:
+        """
+        Temps par catégorie : total (spans imbriqués compris) et propre
+        (hors spans enfants). La somme des temps propres reconstitue la durée
+        des spans racines ; les enfants parallèles peuvent la dépasser.
+        """
+        spans = self.finished()
+        children: Dict[int, float] = {}
+        for s in spans:
+            if s.parent_id is not None:
+                children[s.parent_id] = children.get(s.parent_id, 0.0) + s.duration
+
+        result: Dict[str, Dict[str, float]] = {}
+        for s in spans:
+            entry = result.setdefault(s.category, {"count": 0, "total_s": 0.0, "self_s": 0.0})
+            entry["count"] += 1
+            entry["total_s"] += s.duration
+            entry["self_s"] += max(0.0, s.duration - children.get(s.span_id, 0.0))
+        return result
+
+    def histograms(self) -> Dict[str, Dict[str, float]]:
+        """Distribution des durées par catégorie : p50/p95/p99, max"""
+        by_category: Dict[str, List[float]] = {}
+        for s in self.finished():
+            by_category.setdefault(s.category, []).append(s.duration)
+        stats = {}
+        for category, durations in by_category.items():
+            durations.sort()
+            stats[category] = {
+                "count": len(durations),
+                "p50_s": percentile(durations, 50),
+                "p95_s": percentile(durations, 95),
+                "p99_s": percentile(durations, 99),
+                "max_s": durations[-1],
+            }
+        return stats
+
+    def summary(self) -> Dict[str, Any]:
+        """Résumé sérialisable (rapport final, résultats de tests)"""
+        roots = [s for s in self.finished() if s.parent_id is None]
+        return {
+            "duration_s": sum(s.duration for s in roots),
+            "breakdown": self.breakdown(),
+            "histograms": self.histograms(),
+        }
+
+    # ------------------------------------------------------------------
+    # Exports
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "spans": [
+                {
+                    "id": s.span_id,
+                    "parent_id": s.parent_id,
+                    "name": s.name,
+                    "category": s.category,
+                    "start_s": s.start,
+                    "duration_s": s.duration,
+                    "thread_id": s.thread_id,
+                    "attrs": s.attrs,
+                }
+                for s in self.finished()
+            ],
+            **self.summary(),
+        }
+
+    def chrome_events(self) -> List[Dict[str, Any]]:
+        """Événements "complete" (ph=X) au format Chrome trace, en microsecondes"""
+        pid = os.getpid()
+        return [
+            {
+                "name": s.name,
+                "cat": s.category,
+                "ph": "X",
+                "ts": s.start * 1e6,
+                "dur": s.duration * 1e6,
+                "pid": pid,
+                "tid": s.thread_id,
+                "args": s.attrs,
+            }
+            for s in self.finished()
+        ]
+
+    def export_json(self, path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2, ensure_ascii=False, default=str), encoding="utf-8")
+        return path
+
+    def export_chrome(self, path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"traceEvents": self.chrome_events(), "displayTimeUnit": "ms"}
+        path.write_text(json.dumps(payload, ensure_ascii=False, default=str), encoding="utf-8")
+        return path
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace(name: str) -> Iterator[Trace]:
+    """Ouvre une trace ; une trace déjà active est réutilisée (workflows imbriqués)"""
+    existing = _current_trace.get()
+    if existing is not None:
+        yield existing
+        return
+    trace = Trace(name)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        yield trace
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+@contextmanager
+def span(name: str, category: Optional[str] = None, **attrs) -> Iterator[Optional[Span]]:
+    """Mesure le bloc comme un span enfant du span courant (sans effet hors trace)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get()
+    current = trace.open(name, category or name, parent.span_id if parent else None, attrs)
+    token = _current_span.set(current)
+    try:
+        yield current
+    finally:
+        current.end = trace.now()
+        _current_span.reset(token)
+
+
+def annotate(**attrs):
+    """Ajoute des attributs au span courant (ex. tokens d'un appel LLM)"""
+    current = _current_span.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+def bind_context(fn):
+    """
+    Capture le contexte courant (trace, span parent) pour exécuter fn dans un
+    autre thread. À appeler dans le thread qui soumet, une fois par tâche.
+    """
+    context = copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
@@ -0,0 +1,70 @@
+"""
+Persistance locale du workflow LangGraph (checkpoints SQLite).
+Chaque super-étape du graphe (donc chaque agent) est sauvegardée,
+ce qui permet de reprendre un workflow interrompu avec son thread_id.
+"""
+
+from pathlib import Path
+from typing import Optional
+import sqlite3
+
+# Checkpointer SQLite : import optionnel (paquet langgraph-checkpoint-sqlite)
+try:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+except Exception:
+    SqliteSaver = None
+
+try:
+    from langgraph.checkpoint.memory import MemorySaver
+except Exception:
+    MemorySaver = None
+
+try:
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+except Exception:
+    JsonPlusSerializer = None
+
+
+DEFAULT_CHECKPOINT_PATH = "checkpoints/workflows.sqlite"
+
+# Types de l'état autorisés à la désérialisation msgpack
+ALLOWED_STATE_TYPES = [("core.workflow_state", "AgentResult")]
+
+
+def _create_serde():
+    """Sérialiseur autorisant explicitement les types de l'état du workflow"""
+    if JsonPlusSerializer is None:
+        return None
+    try:
+        return JsonPlusSerializer(allowed_msgpack_modules=ALLOWED_STATE_TYPES)
+    except TypeError:
+        # Anciennes versions de langgraph : pas de liste d'autorisation
+        return JsonPlusSerializer()
+
+
+def create_checkpointer(checkpoint_path: Optional[str] = DEFAULT_CHECKPOINT_PATH):
+    """
+    Crée le checkpointer du workflow.
+
+    Args:
+        checkpoint_path: Fichier SQLite (":memory:" pour un stockage volatil)
+
+    Returns:
+        SqliteSaver, MemorySaver en fallback, ou None si indisponible
+    """
+    serde = _create_serde()
+
+    if SqliteSaver is not None:
+        if checkpoint_path != ":memory:":
+            Path(checkpoint_path).parent.mkdir(parents=True, exist_ok=True)
+        # check_same_thread=False : le graphe peut tourner dans un thread worker
+        # timeout : plusieurs processus (batch parallèle) peuvent écrire la même base
+        conn = sqlite3.connect(checkpoint_path, check_same_thread=False, timeout=30)
+        return SqliteSaver(conn, serde=serde)
+
+    if MemorySaver is not None:
+        print("⚠️ langgraph-checkpoint-sqlite non installé - checkpoints en mémoire uniquement")
+        return MemorySaver(serde=serde)
+
+    print("⚠️ Checkpointing LangGraph indisponible")
+    return None
@@ -6,7 +6,9 @@ Correction: Utilise correctement temperature_override pour chaque agent
 from typing import Dict, Any
 import time
 from langgraph.graph import StateGraph, END
-from .workflow_state import RefactorState, AgentResult
+from .workflow_state import RefactorState, AgentResult, code_hash
+from . import tracing
+from .llm_usage import collect_usage
 
 
 def create_agent_node(orchestrator, agent_name: str):
@@ -14,13 +16,13 @@ def create_agent_node(orchestrator, agent_name: str):
     Crée un nœud pour un agent spécifique.
     Utilise temperature_override si fourni.
     """
-    def agent_node(state: RefactorState) -> RefactorState:
+    def agent_node(state: RefactorState) -> Dict[str, Any]:
         print(f"\n🤖 Exécution de {agent_name}...")
         
         agent = orchestrator.agent_instances.get(agent_name)
         if not agent:
             print(f"⚠️  Agent {agent_name} non trouvé")
-            return state
+            return {}
         
         current_code = state["current_code"]
         language = state["language"]
@@ -34,7 +36,7 @@ def create_agent_node(orchestrator, agent_name: str):
             print(f"   🌡️  Température personnalisée: {temperature}")
         else:
             # Température par défaut depuis config
-            temperature = state["temperature_config"].get_temperature(agent_name)
+            temperature = orchestrator.temperature_config.get_temperature(agent_name)
             print(f"   🌡️  Température par défaut: {temperature}")
         
         # ⭐ Chronométrer l'exécution de l'agent
@@ -42,53 +44,60 @@ def create_agent_node(orchestrator, agent_name: str):
         
         try:
             # Exécuter l'agent avec la température appropriée
-            result = agent.apply(current_code, language, temperature=temperature)
+            with tracing.span(agent_name, "agent", temperature=temperature), collect_usage() as usage:
+                result = agent.apply(current_code, language, temperature=temperature)
             
             duration = time.time() - start_time
+            proposal = result.get("proposal", current_code)
+            proposal_hash = code_hash(proposal)
             
-            # Créer AgentResult avec toutes les infos
+            # Créer AgentResult avec toutes les infos (code référencé par hash)
             agent_result = AgentResult(
                 name=agent_name,
                 analysis=result.get("analysis", []),
-                proposal=result.get("proposal", current_code),
+                proposal_hash=proposal_hash,
                 temperature_used=temperature,  # ⭐ Température réellement utilisée
                 duration=duration,  # ⭐ Durée réelle
-                status="SUCCESS"
+                status="SUCCESS",
+                llm_calls_avoided=result.get("llm_calls_avoided", 0),
+                llm_usage=usage.to_dict()
             )
             
             print(f"   ✅ Terminé en {duration:.2f}s")
             print(f"   📋 {len(agent_result.analysis)} problèmes détectés")
             
-            # Mettre à jour l'état
-            new_state = state.copy()
-            new_state["agent_results"].append(agent_result)
-            new_state["current_agent"] = agent_name
-            new_state["current_code"] = agent_result.proposal
-            new_state["issues_detected"].extend(agent_result.analysis)
-            new_state["history"].append(f"{agent_name} executed")
+            # Mise à jour partielle : les reducers ajoutent aux listes existantes
+            update = {
+                "agent_results": [agent_result],
+                "current_agent": agent_name,
+                "current_code": proposal,
+                "issues_detected": list(agent_result.analysis),
+                "history": [f"{agent_name} executed"],
+            }
+            if proposal_hash not in state.get("code_blobs", {}):
+                update["code_blobs"] = {proposal_hash: proposal}
             
-            return new_state
+            return update
             
         except Exception as e:
             print(f"   ❌ Erreur: {e}")
             
             duration = time.time() - start_time
             
-            # Enregistrer l'erreur mais continuer
+            # Enregistrer l'erreur mais continuer (le code courant reste inchangé)
             agent_result = AgentResult(
                 name=agent_name,
                 analysis=[],
-                proposal=current_code,
+                proposal_hash=code_hash(current_code),
                 temperature_used=temperature,
                 duration=duration,
                 status=f"FAILED: {str(e)[:100]}"
             )
             
-            new_state = state.copy()
-            new_state["agent_results"].append(agent_result)
-            new_state["history"].append(f"{agent_name} failed: {str(e)[:50]}")
-            
-            return new_state
+            return {
+                "agent_results": [agent_result],
+                "history": [f"{agent_name} failed: {str(e)[:50]}"],
+            }
     
     return agent_node
 
@@ -109,7 +118,7 @@ def route_to_next_agent(state: RefactorState) -> str:
     return "merge"
 
 
-def merge_node(state: RefactorState) -> RefactorState:
+def merge_node(state: RefactorState) -> Dict[str, Any]:
     """
     Fusionne tous les résultats des agents.
     """
@@ -118,18 +127,18 @@ def merge_node(state: RefactorState) -> RefactorState:
     # Le code actuel est déjà le résultat fusionné (chaque agent modifie current_code)
     # On garde juste le code actuel comme code final
     
-    new_state = state.copy()
-    new_state["status"] = "merged"
-    new_state["history"].append("Results merged")
-    
     print("   ✅ Fusion terminée")
     
-    return new_state
+    return {
+        "status": "merged",
+        "history": ["Results merged"],
+    }
 
 
-def compile_graph(orchestrator) -> StateGraph:
+def compile_graph(orchestrator, checkpointer=None) -> StateGraph:
     """
     Compile le graphe LangGraph avec tous les nœuds d'agents.
+    Si un checkpointer est fourni, l'état est persisté après chaque agent.
     """
     # Créer le graphe
     workflow = StateGraph(RefactorState)
@@ -162,4 +171,4 @@ def compile_graph(orchestrator) -> StateGraph:
     # Après la fusion, c'est terminé
     workflow.add_edge("merge", END)
     
-    return workflow.compile()
\ No newline at end of file
+    return workflow.compile(checkpointer=checkpointer)
\ No newline at end of file
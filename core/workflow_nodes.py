@@ -1,38 +1,41 @@
 """
 Nœuds pour le workflow LangGraph de refactoring.
-Chaque nœud est une fonction qui prend l'état en entrée et le modifie.
+Chaque nœud est une fonction qui prend l'état en entrée et retourne
+une mise à jour partielle (les listes sont fusionnées par les reducers).
 """
 
 from typing import Dict, Any
-from .workflow_state import RefactorState
+from .workflow_state import RefactorState, code_hash
 import time
 
-def initialize_node(state: RefactorState) -> RefactorState:
+def initialize_node(state: RefactorState) -> Dict[str, Any]:
     """Nœud d'initialisation : prépare l'état"""
     print(f"🔧 Initialisation du workflow pour {state['language']}")
     
-    state["current_code"] = state["original_code"]
-    state["agent_results"] = []
-    state["issues_detected"] = []
-    state["history"] = []
-    state["status"] = "analyzing"
-    state["metrics"] = {
-        "start_time": time.time(),
-        "agents_executed": 0,
-        "issues_found": 0,
-        "code_length_original": len(state["original_code"])
+    original_code = state["original_code"]
+    original_hash = code_hash(original_code)
+    
+    # Les listes append-only sont déjà initialisées dans l'état initial :
+    # on n'ajoute que les nouveaux éléments au lieu de les reconstruire.
+    return {
+        "current_code": original_code,
+        "code_blobs": {original_hash: original_code},
+        "status": "analyzing",
+        "metrics": {
+            "start_time": time.time(),
+            "agents_executed": 0,
+            "issues_found": 0,
+            "code_length_original": len(original_code)
+        },
+        # Enregistrer dans l'historique
+        "history": [{
+            "timestamp": time.time(),
+            "action": "initialize",
+            "message": f"Workflow démarré avec {len(state['selected_agents'])} agents sélectionnés"
+        }],
     }
-    
-    # Enregistrer dans l'historique
-    state["history"].append({
-        "timestamp": time.time(),
-        "action": "initialize",
-        "message": f"Workflow démarré avec {len(state['selected_agents'])} agents sélectionnés"
-    })
-    
-    return state
 
-def analyze_issues_node(state: RefactorState) -> RefactorState:
+def analyze_issues_node(state: RefactorState) -> Dict[str, Any]:
     """Nœud d'analyse : détecte les problèmes dans le code"""
     print("🔍 Analyse des problèmes...")
     
@@ -40,29 +43,29 @@ def analyze_issues_node(state: RefactorState) -> RefactorState:
     # quels agents exécuter en priorité, mais pour maintenant,
     # on exécutera simplement tous les agents sélectionnés
     
-    state["history"].append({
-        "timestamp": time.time(),
-        "action": "analyze",
-        "message": f"Analyse terminée - {len(state['selected_agents'])} agents à exécuter"
-    })
-    
-    return state
+    return {
+        "history": [{
+            "timestamp": time.time(),
+            "action": "analyze",
+            "message": f"Analyse terminée - {len(state['selected_agents'])} agents à exécuter"
+        }],
+    }
 
-def execute_refactoring_agent_node(state: RefactorState, agent_name: str) -> RefactorState:
+def execute_refactoring_agent_node(state: RefactorState, agent_name: str) -> Dict[str, Any]:
     """Nœud d'exécution d'un agent de refactoring spécifique"""
     print(f"⚡ Exécution de {agent_name}...")
     
     # Cette fonction serait appelée pour chaque agent
     # Dans l'implémentation finale, on utiliserait les agents existants
     
-    state["current_agent"] = agent_name
-    state["history"].append({
-        "timestamp": time.time(),
-        "action": "execute_agent",
-        "agent": agent_name
-    })
-    
-    return state
+    return {
+        "current_agent": agent_name,
+        "history": [{
+            "timestamp": time.time(),
+            "action": "execute_agent",
+            "agent": agent_name
+        }],
+    }
 
 def decide_next_agent_node(state: RefactorState) -> Dict[str, Any]:
     """
@@ -85,88 +88,90 @@ def decide_next_agent_node(state: RefactorState) -> Dict[str, Any]:
     # Tous les agents de refactoring sont terminés
     return {"next": "merge_results"}
 
-def merge_results_node(state: RefactorState) -> RefactorState:
+def merge_results_node(state: RefactorState) -> Dict[str, Any]:
     """Nœud de fusion des résultats des agents"""
     print("🔄 Fusion des résultats...")
     
     # Pour l'instant, on garde le code tel quel
     # Dans l'implémentation finale, on utiliserait le MergeAgent
     
-    state["history"].append({
-        "timestamp": time.time(),
-        "action": "merge",
-        "message": "Fusion des propositions d'agents"
-    })
-    
-    state["status"] = "patching"
-    return state
+    return {
+        "status": "patching",
+        "history": [{
+            "timestamp": time.time(),
+            "action": "merge",
+            "message": "Fusion des propositions d'agents"
+        }],
+    }
 
-def apply_patch_node(state: RefactorState) -> RefactorState:
+def apply_patch_node(state: RefactorState) -> Dict[str, Any]:
     """Nœud d'application du PatchAgent"""
     if not state.get("auto_patch", True):
         print("⏭️ PatchAgent désactivé")
-        return state
+        return {}
     
     print("🩹 Application du PatchAgent...")
     
-    state["history"].append({
-        "timestamp": time.time(),
-        "action": "patch",
-        "message": "PatchAgent appliqué"
-    })
-    
-    state["status"] = "testing"
-    return state
+    return {
+        "status": "testing",
+        "history": [{
+            "timestamp": time.time(),
+            "action": "patch",
+            "message": "PatchAgent appliqué"
+        }],
+    }
 
-def run_tests_node(state: RefactorState) -> RefactorState:
+def run_tests_node(state: RefactorState) -> Dict[str, Any]:
     """Nœud d'exécution du TestAgent"""
     if not state.get("auto_test", True):
         print("⏭️ TestAgent désactivé")
-        return state
+        return {}
     
     print("🧪 Exécution du TestAgent...")
     
-    state["history"].append({
-        "timestamp": time.time(),
-        "action": "test",
-        "message": "TestAgent exécuté"
-    })
-    
-    state["status"] = "completed"
-    return state
+    return {
+        "status": "completed",
+        "history": [{
+            "timestamp": time.time(),
+            "action": "test",
+            "message": "TestAgent exécuté"
+        }],
+    }
 
-def finalize_node(state: RefactorState) -> RefactorState:
+def finalize_node(state: RefactorState) -> Dict[str, Any]:
     """Nœud de finalisation : calcule les métriques finales"""
     print("✅ Finalisation du workflow...")
     
-    # Calculer les métriques finales
+    # Calculer les métriques finales (nouveau dict, l'ancien n'est pas muté)
     execution_time = time.time() - state["metrics"]["start_time"]
-    state["metrics"]["execution_time"] = execution_time
-    state["metrics"]["agents_executed"] = len(state.get("agent_results", []))
-    state["metrics"]["code_length_final"] = len(state.get("current_code", ""))
-    
-    # Définir le code final
-    state["final_code"] = state.get("current_code", state["original_code"])
-    
-    state["history"].append({
-        "timestamp": time.time(),
-        "action": "finalize",
-        "message": f"Workflow terminé en {execution_time:.2f}s"
-    })
+    metrics = {
+        **state["metrics"],
+        "execution_time": execution_time,
+        "agents_executed": len(state.get("agent_results", [])),
+        "code_length_final": len(state.get("current_code", "")),
+    }
     
-    return state
+    return {
+        "metrics": metrics,
+        # Définir le code final
+        "final_code": state.get("current_code", state["original_code"]),
+        "history": [{
+            "timestamp": time.time(),
+            "action": "finalize",
+            "message": f"Workflow terminé en {execution_time:.2f}s"
+        }],
+    }
 
-def handle_error_node(state: RefactorState, error: Exception) -> RefactorState:
+def handle_error_node(state: RefactorState, error: Exception) -> Dict[str, Any]:
     """Nœud de gestion d'erreur"""
     print(f"❌ Erreur dans le workflow : {error}")
     
-    state["error"] = str(error)
-    state["status"] = "failed"
-    
-    state["history"].append({
-        "timestamp": time.time(),
-        "action": "error",
-        "message": str(error)
-    })
-    
-    return state
\ No newline at end of file
+    return {
+        "error": str(error),
+        "status": "failed",
+        "history": [{
+            "timestamp": time.time(),
+            "action": "error",
+            "message": str(error)
+        }],
+    }
@@ -1,21 +1,60 @@
 """
 Définition de l'état du workflow LangGraph.
 Contient toutes les informations partagées entre les nœuds.
+
+Les listes (résultats, problèmes, historique) sont des canaux "append-only" :
+chaque nœud retourne uniquement ses nouveaux éléments et LangGraph les
+concatène via le reducer associé. Aucun nœud ne mute donc l'état précédent,
+ce qui rend aussi les branches concurrentes sûres.
+
+L'état ne contient que des valeurs sérialisables afin de pouvoir être
+checkpointé (la configuration des températures reste sur l'orchestrateur).
 """
 
-from typing import TypedDict, List, Dict, Any, Optional
+from typing import TypedDict, List, Dict, Any, Optional, Annotated
 from dataclasses import dataclass
+import hashlib
+import operator
+
 
+def code_hash(code: str) -> str:
+    """Empreinte courte et stable d'un code source (clé du stockage de code)."""
+    return hashlib.sha1(code.encode("utf-8", errors="ignore")).hexdigest()[:16]
 
-@dataclass
+
+def merge_code_blobs(left: Dict[str, str], right: Dict[str, str]) -> Dict[str, str]:
+    """
+    Reducer du stockage de code : union des blobs indexés par hash.
+    Un même code n'est stocké qu'une seule fois, quel que soit le nombre d'agents.
+    """
+    if not right:
+        return left
+    if not left:
+        return dict(right)
+    merged = dict(left)
+    merged.update(right)
+    return merged
+
+
+@dataclass(slots=True)
 class AgentResult:
-    """Résultat de l'exécution d'un agent"""
+    """
+    Résultat de l'exécution d'un agent.
+    Le code proposé n'est pas dupliqué : on ne garde que son hash,
+    le texte est stocké une seule fois dans state["code_blobs"].
+    """
     name: str
     analysis: List[str]
-    proposal: str
+    proposal_hash: str
     temperature_used: Optional[float]
     duration: float  # ⭐ Durée en secondes
     status: str
+    llm_calls_avoided: int = 0  # Appels LLM évités par l'analyse statique
+    llm_usage: Optional[Dict[str, Any]] = None  # Tokens et temps LLM (voir core.llm_usage)
+
+    def proposal(self, code_blobs: Dict[str, str]) -> str:
+        """Résout le code proposé à partir du stockage partagé"""
+        return code_blobs[self.proposal_hash]
 
 
 class RefactorState(TypedDict):
@@ -27,30 +66,33 @@ class RefactorState(TypedDict):
     original_code: str
     language: str
     current_code: str
-    
+
+    # Stockage des codes par hash (chaque version n'est stockée qu'une fois)
+    code_blobs: Annotated[Dict[str, str], merge_code_blobs]
+
     # Agent en cours
     current_agent: Optional[str]
-    
-    # Résultats des agents
-    agent_results: List[AgentResult]
-    issues_detected: List[str]
-    
+
+    # Résultats des agents (canaux append-only)
+    agent_results: Annotated[List[AgentResult], operator.add]
+    issues_detected: Annotated[List[str], operator.add]
+
     # Historique et configuration
-    history: List[str]
+    history: Annotated[List[Any], operator.add]
     selected_agents: List[str]
-    temperature_config: Any  # TemperatureConfig
     temperature_override: Dict[str, float]  # ⭐ Températures personnalisées
-    
+
     # Options
     auto_patch: bool
     auto_test: bool
-    
+
     # Métriques
     metrics: Dict[str, Any]
-    
+
     # Résultats finaux
     error: Optional[str]
     status: str
     patch_result: Optional[Dict[str, Any]]
     test_result: Optional[Dict[str, Any]]
-    final_code: Optional[str]
\ No newline at end of file
+    equivalence_result: Optional[Dict[str, Any]]
+    final_code: Optional[str]
@@ -3,8 +3,13 @@
 
 #from core.orchestrator import Orchestrator
 from core.langgraph_orchestrator import Orchestrator
-from core.ollama_llm_client import OllamaLLMClient
+from core.ollama_llm_client import DEFAULT_KEEP_ALIVE, OllamaLLMClient
 from core.temperature_config import TemperatureConfig
+from core.workflow_checkpoint import DEFAULT_CHECKPOINT_PATH
+from core.project_runner import LANGUAGE_BY_EXTENSION, ProjectRunner
+from agents import type_check, validation_cache
+from core import process_control
+from core.resource_limits import DEFAULT_LIMITS
 import os
 import sys
 
@@ -12,7 +17,8 @@ def main():
     """Point d'entrée CLI unifié"""
     
     if len(sys.argv) < 2:
-        print("Usage: python main.py <fichier> [--agents=agent1,agent2] [--temperature=0.3]")
+        print("Usage: python main.py <fichier> [--agents=agent1,agent2] [--temperature=0.3] [--thread-id=ID | --resume=ID]")
+        print("       python main.py <répertoire|glob> [--workers=N] [--output-dir=DIR] [--resume-project]")
         print("\nAgents disponibles:")
         for agent, config in TemperatureConfig.get_all_configs().items():
             print(f"  - {agent}: {config['description']} (temp: {config['default']})")
@@ -27,6 +33,18 @@ def main():
     temperature = 0.3
     auto_patch = True
     auto_test = True
+    thread_id = None
+    resume_thread_id = None
+    checkpoint_db = DEFAULT_CHECKPOINT_PATH
+    hunk_mode = False
+    rename_ast = False
+    workers = None
+    output_dir = "refactored_project"
+    resume_project = False
+    trace_dir = None
+    keep_alive = DEFAULT_KEEP_ALIVE
+    validation_batch = 0
+    equivalence = False
     
     # Analyser les arguments
     for arg in sys.argv[2:]:
@@ -38,15 +56,72 @@ def main():
             auto_patch = False
         elif arg == "--no-test":
             auto_test = False
+        elif arg.startswith("--thread-id="):
+            thread_id = arg.split("=", 1)[1]
+        elif arg.startswith("--resume="):
+            resume_thread_id = arg.split("=", 1)[1]
+        elif arg.startswith("--checkpoint-db="):
+            checkpoint_db = arg.split("=", 1)[1]
+        elif arg == "--hunks":
+            hunk_mode = True
+        elif arg == "--rename-ast":
+            rename_ast = True
+        elif arg.startswith("--workers="):
+            workers = int(arg.split("=", 1)[1])
+        elif arg.startswith("--output-dir="):
+            output_dir = arg.split("=", 1)[1]
+        elif arg == "--resume-project":
+            resume_project = True
+        elif arg.startswith("--trace-dir="):
+            trace_dir = arg.split("=", 1)[1]
+        elif arg.startswith("--keep-alive="):
+            keep_alive = arg.split("=", 1)[1]
+        elif arg.startswith("--mypy-mode="):
+            type_check.configure(arg.split("=", 1)[1])
+        elif arg == "--equivalence":
+            equivalence = True
+        elif arg.startswith("--validation-batch="):
+            validation_batch = int(arg.split("=", 1)[1])
+        elif arg == "--no-validation-cache":
+            validation_cache.configure(enabled=False)
+        elif arg == "--fixed-tool-timeout":
+            process_control.configure(adaptive=False, limits=process_control.tool_limits())
+        elif arg == "--tool-limits":
+            process_control.configure(adaptive=process_control.adaptive(), limits=DEFAULT_LIMITS)
         elif arg in ["-h", "--help"]:
             print("\nOptions:")
             print("  --agents=agent1,agent2    Agents à exécuter")
             print("  --temperature=0.3         Température globale")
             print("  --no-patch                Désactiver PatchAgent")
             print("  --no-test                 Désactiver TestAgent")
+            print("  --thread-id=ID            Workflow LangGraph checkpointé (SQLite) sous cet ID")
+            print("  --resume=ID               Reprendre un workflow checkpointé interrompu")
+            print("  --checkpoint-db=PATH      Base SQLite des checkpoints")
+            print("  --hunks                   Envoyer au LLM uniquement les fonctions/classes signalées")
+            print("  --rename-ast              Renommages déterministes par réécriture AST (sans LLM)")
+            print("  --workers=N               Mode projet : nombre de workers (défaut: selon la latence LLM)")
+            print("  --output-dir=DIR          Mode projet : répertoire des fichiers refactorés")
+            print("  --resume-project          Mode projet : ignorer les fichiers déjà traités")
+            print("  --trace-dir=DIR           Exporter la trace du workflow (JSON + Chrome trace)")
+            print(f"  --keep-alive=DURÉE        Maintien du modèle en mémoire (défaut: {DEFAULT_KEEP_ALIVE}, -1 = toujours)")
+            print(f"  --mypy-mode=MODE          mypy de TestAgent : {', '.join(type_check.MYPY_MODES)} (défaut: {type_check.DEFAULT_MYPY_MODE})")
+            print("  --equivalence             Comparer le comportement refactoré / original (Python)")
+            print("  --validation-batch=N      Mode projet : valider les fichiers par lots de N (un lancement par outil)")
+            print("  --no-validation-cache     Revalider même un code identique déjà testé")
+            print(f"  --fixed-tool-timeout      Délai fixe de {process_control.DEFAULT_TIMEOUT:.0f}s par outil (défaut: p95 des durées passées)")
+            print(f"  --tool-limits             Limiter CPU/mémoire des outils lancés ({DEFAULT_LIMITS['cpu_s']}s CPU, {DEFAULT_LIMITS['memory_mb']} Mo)")
             print("  -h, --help                Afficher cette aide")
             return
     
+    # Mode projet : répertoire ou motif glob
+    if os.path.isdir(input_file) or any(c in input_file for c in "*?["):
+        run_project(
+            input_file, selected_agents, temperature, auto_patch, auto_test,
+            hunk_mode, rename_ast, workers, output_dir, resume_project, keep_alive,
+            validation_batch, trace_dir, equivalence
+        )
+        return
+    
     # Vérifier le fichier
     if not os.path.exists(input_file):
         print(f"❌ Fichier introuvable: {input_file}")
@@ -58,23 +133,20 @@ def main():
     
     # Détecter le langage
     ext = os.path.splitext(input_file)[1].lower()
-    language_map = {
-        ".py": "Python",
-        ".js": "JavaScript",
-        ".ts": "TypeScript",
-        ".java": "Java",
-        ".cpp": "C++",
-        ".c": "C",
-        ".cs": "C#",
-        ".go": "Go",
-        ".rb": "Ruby",
-    }
-    language = language_map.get(ext, "Python")
+    language = LANGUAGE_BY_EXTENSION.get(ext, "Python")
     
     # Initialiser
     print("🔄 Initialisation du système...")
-    llm_client = OllamaLLMClient(model_name="mistral:latest")
-    orchestrator = Orchestrator(llm_client)
+    llm_client = OllamaLLMClient(model_name="mistral:latest", keep_alive=keep_alive)
+    checkpointed = bool(thread_id or resume_thread_id)
+    orchestrator = Orchestrator(
+        llm_client,
+        checkpoint_path=checkpoint_db if checkpointed else None,
+        hunk_mode=hunk_mode
+    )
+    orchestrator.set_deterministic_renames(rename_ast)
+    orchestrator.set_trace_dir(trace_dir)
+    orchestrator.set_equivalence_check(equivalence)
     
     # Si pas d'agents spécifiés, utiliser tous sauf Test et Patch
     if not selected_agents:
@@ -87,48 +159,80 @@ def main():
     print(f"  Température: {temperature}")
     print(f"  Auto-patch: {auto_patch}")
     print(f"  Auto-test: {auto_test}")
+    print(f"  Mode hunk: {hunk_mode}")
+    print(f"  Renommage AST: {rename_ast}")
     
-    # Étape 1: Agents de refactoring
-    print("\n🚀 Exécution des agents de refactoring...")
-    results = []
-    
-    for agent_name in selected_agents:
-        if agent_name not in ["TestAgent", "PatchAgent", "MergeAgent"]:
-            print(f"  ⚡ {agent_name}...")
-            agent = orchestrator.agent_instances.get(agent_name)
-            if agent:
-                # Utiliser la température spécifiée ou celle par défaut
-                agent_temp = temperature
-                result = agent.apply(code, language, temperature=agent_temp)
-                results.append(result)
-                print(f"    → {len(result.get('analysis', []))} problèmes détectés")
-    
-    # Étape 2: Merge
-    print("\n🔄 Fusion des résultats...")
-    if results:
-        merged_code = orchestrator.merge_results(code, results)
+    if checkpointed:
+        # Mode LangGraph checkpointé : chaque agent est persisté et reprenable
+        if resume_thread_id:
+            print(f"\n♻️  Reprise du workflow {resume_thread_id}...")
+            workflow_result = orchestrator.resume(resume_thread_id)
+        else:
+            print("\n🚀 Exécution du workflow LangGraph checkpointé...")
+            workflow_result = orchestrator.run_workflow(
+                code=code,
+                language=language,
+                selected_agents=selected_agents,
+                auto_patch=auto_patch,
+                auto_test=auto_test,
+                temperature_override={name: temperature for name in selected_agents},
+                thread_id=thread_id
+            )
+        
+        if not workflow_result.get("success"):
+            print(f"❌ Workflow échoué: {workflow_result.get('error')}")
+            print(f"   Reprendre avec: python main.py {input_file} --resume={workflow_result.get('thread_id')}")
+            return
+        
+        results = [
+            r for r in workflow_result.get("agent_results", [])
+            if r["name"] not in ["TestAgent", "PatchAgent", "MergeAgent"]
+        ]
+        patch_result = workflow_result.get("patch_result")
+        test_result = workflow_result.get("test_result")
+        merged_code = workflow_result.get("refactored_code", code)
     else:
-        merged_code = code
-    
-    # Étape 3: Patch (optionnel)
-    patch_result = None
-    if auto_patch:
-        print("🩹 Application de PatchAgent...")
-        patch_agent = orchestrator.agent_instances.get("PatchAgent")
-        if patch_agent:
-            patch_result = patch_agent.apply(merged_code, language)
-            merged_code = patch_result["proposal"]
-            print(f"    → {len(patch_result.get('analysis', []))} problèmes corrigés")
-    
-    # Étape 4: Test (optionnel)
-    test_result = None
-    if auto_test:
-        print("🧪 Exécution de TestAgent...")
-        test_agent = orchestrator.agent_instances.get("TestAgent")
-        if test_agent:
-            test_result = test_agent.apply(merged_code, language)
-            status = test_result.get("status", "N/A")
-            print(f"    → Statut: {status}")
+        # Étape 1: Agents de refactoring
+        print("\n🚀 Exécution des agents de refactoring...")
+        results = []
+    
+        for agent_name in selected_agents:
+            if agent_name not in ["TestAgent", "PatchAgent", "MergeAgent"]:
+                print(f"  ⚡ {agent_name}...")
+                agent = orchestrator.agent_instances.get(agent_name)
+                if agent:
+                    # Utiliser la température spécifiée ou celle par défaut
+                    agent_temp = temperature
+                    result = agent.apply(code, language, temperature=agent_temp)
+                    results.append(result)
+                    print(f"    → {len(result.get('analysis', []))} problèmes détectés")
+    
+        # Étape 2: Merge
+        print("\n🔄 Fusion des résultats...")
+        if results:
+            merged_code = orchestrator.merge_results(code, results)
+        else:
+            merged_code = code
+    
+        # Étape 3: Patch (optionnel)
+        patch_result = None
+        if auto_patch:
+            print("🩹 Application de PatchAgent...")
+            patch_agent = orchestrator.agent_instances.get("PatchAgent")
+            if patch_agent:
+                patch_result = patch_agent.apply(merged_code, language)
+                merged_code = patch_result["proposal"]
+                print(f"    → {len(patch_result.get('analysis', []))} problèmes corrigés")
+    
+        # Étape 4: Test (optionnel)
+        test_result = None
+        if auto_test:
+            print("🧪 Exécution de TestAgent...")
+            test_agent = orchestrator.agent_instances.get("TestAgent")
+            if test_agent:
+                test_result = test_agent.apply(merged_code, language)
+                status = test_result.get("status", "N/A")
+                print(f"    → Statut: {status}")
     
     # Sauvegarder le résultat
     output_file = f"refactored_{os.path.basename(input_file)}"
@@ -156,11 +260,13 @@ def main():
         print(f"\n[{agent_name}] (🌡️ {temp_used})")
         if analysis:
             for i, issue in enumerate(analysis[:3], 1):  # Afficher seulement les 3 premiers
+                if isinstance(issue, dict):
+                    issue = issue.get("note", "")
                 print(f"  {i}. {issue}")
             if len(analysis) > 3:
                 print(f"  ... et {len(analysis) - 3} autres")
         else:
-            print("  Aucun problème détecté")
+            print("  Aucun problème détecté (appel LLM évité)")
     
     if patch_result:
         print("\n[PatchAgent]")
@@ -183,5 +289,48 @@ def main():
     print(f"📝 Taille originale: {len(code)} caractères")
     print(f"📝 Taille finale: {len(merged_code)} caractères")
 
+def run_project(target, selected_agents, temperature, auto_patch, auto_test,
+                hunk_mode, rename_ast, workers, output_dir, resume_project, keep_alive=DEFAULT_KEEP_ALIVE,
+                validation_batch=0, trace_dir=None, equivalence=False):
+    """Refactoring de tous les fichiers d'un répertoire ou d'un glob"""
+    print("🔄 Initialisation du système...")
+    llm_client = OllamaLLMClient(model_name="mistral:latest", keep_alive=keep_alive)
+    orchestrator = Orchestrator(llm_client, hunk_mode=hunk_mode)
+    orchestrator.set_deterministic_renames(rename_ast)
+    
+    if not selected_agents:
+        selected_agents = orchestrator.get_refactoring_agents()
+    
+    runner = ProjectRunner(
+        orchestrator,
+        selected_agents,
+        output_dir=output_dir,
+        workers=workers,
+        temperature_override={name: temperature for name in selected_agents},
+        auto_patch=auto_patch,
+        auto_test=auto_test,
+        resume=resume_project,
+        validation_batch=validation_batch,
+        trace_dir=trace_dir,
+        equivalence=equivalence
+    )
+    summary = runner.run(target)
+    
+    print("\n" + "="*60)
+    print("📊 RAPPORT PROJET")
+    print("="*60)
+    print(f"  Fichiers: {summary['files']} ({summary.get('failed_files', 0)} en échec)")
+    print(f"  Tâches: {summary['tasks']} sur {summary['workers']} workers")
+    print(f"  Durée: {summary['duration']:.1f}s")
+    if summary["files"]:
+        print(f"  Résultats: {summary['results_path']}")
+        print(f"  Code refactoré: {output_dir}/")
+    if summary.get("equivalence") is not None:
+        counts = summary["equivalence"]
+        print("  Équivalence: " + (", ".join(f"{status} {count}" for status, count in sorted(counts.items()))
+                                  or "aucun fichier Python modifié"))
+    if summary.get("trace_file"):
+        print(f"  Trace: {summary['trace_file']}")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -13,6 +13,11 @@ import time
 import json
 import csv
 import argparse
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing.connection import wait as wait_connections
 from datetime import datetime
 from pathlib import Path
 import traceback
@@ -25,25 +30,75 @@ sys.path.insert(0, parent_dir)
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils import get_column_letter
+from openpyxl.cell import WriteOnlyCell
 
-from core.ollama_llm_client import OllamaLLMClient
+from core.ollama_llm_client import DEFAULT_KEEP_ALIVE, OllamaLLMClient, ConcurrencyLimitedLLM, SupervisedPermits
 from core.langgraph_orchestrator import LangGraphOrchestrator
+from core.workflow_checkpoint import DEFAULT_CHECKPOINT_PATH
+from core.result_sink import ResultSink, code_hash, completed_keys, iter_results
+from agents import type_check, validation_cache
+from core import process_control
 
 
 class AdvancedBatchTester:
     """Testeur batch avec support LangGraph"""
     
-    def __init__(self, config_file="test_config.json"):
-        """Initialise le testeur"""
+    # Colonnes tokens / temps LLM (métriques Ollama, voir core.llm_usage)
+    USAGE_HEADERS = ['Tokens_Prompt', 'Tokens_Générés', 'Tokens_par_s', 'Prefill_Sec', 'Decode_Sec', 'Chargement_Sec']
+    
+    def __init__(self, config_file="test_config.json", checkpoint_db=None, resume_run_id=None,
+                 run_id=None, llm_semaphore=None):
+        """
+        Initialise le testeur.
+        
+        Args:
+            config_file: Fichier de configuration JSON
+            checkpoint_db: Base SQLite des checkpoints (None = pas de persistance)
+            resume_run_id: Identifiant d'un run interrompu à reprendre
+            run_id: Identifiant imposé (workers d'un run parallèle)
+            llm_semaphore: Sémaphore partagé limitant les appels LLM simultanés
+        """
+        self.config_file = config_file
         self.load_config(config_file)
         self.output_dir.mkdir(exist_ok=True)
         
-        print("🔄 Initialisation du système...")
-        self.llm_client = OllamaLLMClient(model_name=self.config.get('model', 'mistral:latest'))
-        self.orchestrator = LangGraphOrchestrator(self.llm_client)
+        # ⭐ Checkpointing : chaque test = un thread "<run_id>:<fichier>:<test_id>"
+        if resume_run_id and checkpoint_db is None:
+            checkpoint_db = DEFAULT_CHECKPOINT_PATH
+        self.resume = resume_run_id is not None
+        self.run_id = resume_run_id or run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.checkpoint_db = checkpoint_db
         
-        self.results = []
-        self.errors = []
+        print("🔄 Initialisation du système...")
+        self.llm_client = OllamaLLMClient(
+            model_name=self.config.get('model', 'mistral:latest'),
+            keep_alive=self.config.get('keep_alive', DEFAULT_KEEP_ALIVE)
+        )
+        if llm_semaphore is not None:
+            self.llm_client = ConcurrencyLimitedLLM(self.llm_client, llm_semaphore)
+        self.orchestrator = LangGraphOrchestrator(
+            self.llm_client,
+            checkpoint_path=checkpoint_db,
+            hunk_mode=self.config.get('hunk_mode', False)
+        )
+        type_check.configure(self.config.get('mypy_mode', type_check.DEFAULT_MYPY_MODE))
+        validation_cache.configure(enabled=self.config.get('validation_cache', True))
+        process_control.configure(
+            adaptive=self.config.get('adaptive_tool_timeouts', True),
+            limits=self.config.get('tool_limits')
+        )
+        self.orchestrator.set_equivalence_check(self.config.get('equivalence_check', False))
+        if self.output_options.get('save_traces', False):
+            self.orchestrator.set_trace_dir(str(self.output_dir / "traces"))
+        
+        if checkpoint_db:
+            print(f"💾 Checkpoints: {checkpoint_db} (run_id={self.run_id})")
+        
+        # ⭐ Résultats écrits au fil de l'eau (JSONL), jamais accumulés en mémoire
+        self.results_path = self.output_dir / f"results_{self.run_id}.jsonl"
+        self.sink = None
+        self.success_count = 0
+        self.failure_count = 0
         
         print(f"✅ Système initialisé avec {len(self.test_configurations)} configurations")
     
@@ -68,6 +123,12 @@ class AdvancedBatchTester:
         print(f"📁 {len(files)} fichiers trouvés")
         return files
     
+    def get_thread_id(self, file_path, test_config):
+        """Identifiant de checkpoint stable d'un test au sein d'un run"""
+        if self.orchestrator.checkpointer is None:
+            return None
+        return f"{self.run_id}:{file_path.stem}:{test_config['id']}"
+    
     def format_duration(self, seconds):
         """Formate une durée"""
         if seconds < 1:
@@ -107,17 +168,22 @@ class AdvancedBatchTester:
             
             print(f"   🌡️  Températures configurées: {temperature_override}")
             
-            # Exécuter le workflow
+            # Exécuter le workflow (ou le reprendre depuis son checkpoint)
             workflow_start = time.time()
+            thread_id = self.get_thread_id(file_path, test_config)
             
-            workflow_result = self.orchestrator.run_workflow(
-                code=code,
-                language="Python",
-                selected_agents=selected_agents,
-                auto_patch=self.output_options.get("auto_patch", True),
-                auto_test=self.output_options.get("auto_test", True),
-                temperature_override=temperature_override  # ⭐ IMPORTANT
-            )
+            if self.resume and self.orchestrator.has_checkpoint(thread_id):
+                workflow_result = self.orchestrator.resume(thread_id)
+            else:
+                workflow_result = self.orchestrator.run_workflow(
+                    code=code,
+                    language="Python",
+                    selected_agents=selected_agents,
+                    auto_patch=self.output_options.get("auto_patch", True),
+                    auto_test=self.output_options.get("auto_test", True),
+                    temperature_override=temperature_override,  # ⭐ IMPORTANT
+                    thread_id=thread_id
+                )
             
             workflow_duration = time.time() - workflow_start
 
@@ -165,7 +231,8 @@ class AdvancedBatchTester:
                     "duration_formatted": self.format_duration(agent_duration),
                     "temperature": temp_used,
                     "issues_found": issues,
-                    "status": agent_status
+                    "status": agent_status,
+                    "llm_usage": agent_result.get("llm_usage")
                 }
             
             total_test_duration = time.time() - test_start_time
@@ -203,6 +270,10 @@ class AdvancedBatchTester:
                 'reduction_percent': ((original_chars - final_chars) / original_chars * 100) if original_chars > 0 else 0,
                 'agent_details_dict': agent_details_dict,  # ⭐ Dictionnaire au lieu de liste
                 'output_file': str(output_file) if output_file else None,
+                'code_hash': code_hash(final_code),
+                'timing_breakdown': workflow_result.get('timing_breakdown'),
+                'llm_usage': workflow_result.get('metrics', {}).get('llm_usage'),
+                'equivalence': workflow_result.get('equivalence_result'),
                 'timestamp': datetime.now().isoformat()
             }
             
@@ -213,15 +284,8 @@ class AdvancedBatchTester:
             
         except Exception as e:
             total_duration = time.time() - test_start_time
-            error_result = {
-                'file': file_path.name,
-                'test_config': test_config['name'],
-                'test_id': test_config['id'],
-                'status': f'FAILED: {str(e)[:100]}',
-                'total_duration': total_duration,
-                'error_trace': traceback.format_exc(),
-                'timestamp': datetime.now().isoformat()
-            }
+            error_result = self._failed_result(file_path, test_config, str(e), total_duration)
+            error_result['error_trace'] = traceback.format_exc()
             
             if self.output_options.get('save_error_logs', True):
                 error_file = self.output_dir / f"error_{file_path.stem}_{test_config['id']}.log"
@@ -234,8 +298,17 @@ class AdvancedBatchTester:
             print(f"  ❌ Échec: {str(e)[:50]}")
             return error_result
     
-    def run_all_tests(self, file_pattern="bad_code*.py", test_ids=None):
-        """Execute tous les tests"""
+    def run_all_tests(self, file_pattern="bad_code*.py", test_ids=None, workers=1,
+                      worker_mode="process", timeout=None, max_llm_calls=None):
+        """
+        Execute tous les tests.
+        
+        Args:
+            workers: Nombre de tests exécutés en parallèle (1 = séquentiel)
+            worker_mode: "process" (isolation, timeout par kill) ou "thread"
+            timeout: Durée max d'un test en secondes (None = illimitée)
+            max_llm_calls: Appels LLM simultanés max, tous workers confondus
+        """
         files = self.get_test_files(file_pattern)
         
         if not files:
@@ -247,37 +320,287 @@ class AdvancedBatchTester:
             configs = [c for c in configs if c['id'] in test_ids]
             print(f"🔍 {len(configs)} configurations sélectionnées")
         
-        total_tests = len(files) * len(configs)
-        current_test = 0
+        # Ordre de référence (fichier × config) : les résultats y sont toujours remis
+        jobs = [
+            (index, file_path, config)
+            for index, (file_path, config) in enumerate(
+                (file_path, config) for file_path in files for config in configs
+            )
+        ]
+        total_tests = len(jobs)
+        
+        # Reprise : les tests déjà réussis dans le journal ne sont pas rejoués
+        if self.resume:
+            done = completed_keys(self.results_path, ('file', 'test_id'))
+            jobs = [job for job in jobs if (job[1].name, job[2]['id']) not in done]
+            if len(jobs) < total_tests:
+                print(f"♻️  {total_tests - len(jobs)} tests déjà réussis dans {self.results_path.name}")
         
         print(f"\n🚀 {total_tests} tests")
         print(f"   ({len(files)} fichiers × {len(configs)} configs)\n")
+        print(f"📝 Journal des résultats: {self.results_path}")
         
         start_time = time.time()
         
-        for file_path in files:
-            for config in configs:
-                current_test += 1
-                print(f"\n{'='*70}")
-                print(f"Test {current_test}/{total_tests}")
-                
-                result = self.run_test(file_path, config)
-                self.results.append(result)
-                
-                if result['status'] not in ['SUCCESS']:
-                    self.errors.append(result)
+        self.sink = ResultSink(self.results_path, append=self.resume)
+        try:
+            if workers > 1 and len(jobs) > 1:
+                self._run_parallel(jobs, workers, worker_mode, timeout, max_llm_calls)
+            else:
+                for index, file_path, config in jobs:
+                    print(f"\n{'='*70}")
+                    print(f"Test {index + 1}/{total_tests}")
+                    self._record(index, self.run_test(file_path, config))
+        finally:
+            self.sink.close()
         
         total_time = time.time() - start_time
         
         print(f"\n{'='*70}")
         print(f"✅ Terminé en {self.format_duration(total_time)}")
-        print(f"   - Succès: {len([r for r in self.results if r['status'] == 'SUCCESS'])}")
-        print(f"   - Échecs: {len(self.errors)}")
+        print(f"   - Succès: {self.success_count}")
+        print(f"   - Échecs: {self.failure_count}")
+    
+    def _record(self, index, result):
+        """Écrit un résultat dans le journal dès la fin de son test"""
+        self.sink.append(dict(result, index=index))
+        if result['status'] == 'SUCCESS':
+            self.success_count += 1
+        else:
+            self.failure_count += 1
+    
+    # ========== EXÉCUTION PARALLÈLE ==========
+    
+    def _worker_kwargs(self, llm_semaphore):
+        """Arguments d'un testeur worker : même config et même run, client LLM propre"""
+        return {
+            "config_file": self.config_file,
+            "checkpoint_db": self.checkpoint_db,
+            "resume_run_id": self.run_id if self.resume else None,
+            "run_id": self.run_id,
+            "llm_semaphore": llm_semaphore,
+        }
+    
+    def _usage_columns(self, usage):
+        """Valeurs des colonnes USAGE_HEADERS (vides si aucun appel LLM mesuré)"""
+        if not usage:
+            return [''] * len(self.USAGE_HEADERS)
+        return [
+            usage['prompt_tokens'],
+            usage['completion_tokens'],
+            round(usage['decode_tokens_per_s'], 1),
+            round(usage['prefill_s'], 2),
+            round(usage['decode_s'], 2),
+            round(usage['load_s'], 2),
+        ]
+    
+    @staticmethod
+    def _agent_prompt_tokens(details):
+        usage = details.get('llm_usage')
+        return usage['prompt_tokens'] if usage else ''
+    
+    def _failed_result(self, file_path, test_config, message, duration):
+        """Résultat d'un test qui n'a pas pu aboutir (erreur, timeout, crash du worker)"""
+        return {
+            'file': file_path.name,
+            'test_config': test_config['name'],
+            'test_id': test_config['id'],
+            'status': f'FAILED: {message[:100]}',
+            'total_duration': duration,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def _run_parallel(self, jobs, workers, worker_mode, timeout, max_llm_calls):
+        """
+        Exécute les tests sur un pool. Les résultats sont journalisés dans leur
+        ordre de fin ; les exports les remettent dans l'ordre des jobs (index).
+        """
+        max_llm_calls = max_llm_calls or self.config.get('max_concurrent_llm_calls', workers)
+        print(f"⚡ {workers} workers ({worker_mode}), {max_llm_calls} appels LLM simultanés max, "
+              f"timeout: {self.format_duration(timeout) if timeout else 'aucun'}")
+        
+        if worker_mode == "thread":
+            self._run_threads(jobs, workers, timeout, threading.BoundedSemaphore(max_llm_calls))
+        else:
+            self._run_processes(jobs, workers, timeout, multiprocessing.get_context("spawn"), max_llm_calls)
+    
+    def _run_threads(self, jobs, workers, timeout, llm_semaphore):
+        """
+        Pool de threads, un testeur (orchestrateur + client) par thread.
+        Un thread ne peut pas être interrompu : au-delà du timeout le test est
+        marqué en échec et son résultat tardif est ignoré.
+        """
+        local = threading.local()
+        kwargs = self._worker_kwargs(llm_semaphore)
+        started = {}
+        
+        def run(index, file_path, config):
+            if not hasattr(local, "tester"):
+                local.tester = AdvancedBatchTester(**kwargs)
+            started[index] = time.time()
+            return local.tester.run_test(file_path, config)
+        
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-worker")
+        futures = {pool.submit(run, *job): job for job in jobs}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, file_path, config = futures[future]
+                try:
+                    self._record(index, future.result())
+                except Exception as e:
+                    self._record(index, self._failed_result(file_path, config, str(e), 0))
+            if timeout:
+                for future in list(pending):
+                    index, file_path, config = futures[future]
+                    if index in started and time.time() - started[index] > timeout:
+                        print(f"  ⏰ [{config['id']}] {file_path.name}: timeout ({self.format_duration(timeout)})")
+                        self._record(index, self._failed_result(file_path, config, f"timeout après {timeout}s", timeout))
+                        pending.discard(future)
+        pool.shutdown(wait=False, cancel_futures=True)
+    
+    def _run_processes(self, jobs, workers, timeout, context, max_llm_calls):
+        """
+        Pool de processus supervisé : chaque worker a son orchestrateur et son
+        client LLM. Un test qui dépasse le timeout (ou fait planter son worker)
+        est marqué en échec et le worker est tué puis remplacé.
+
+        Les jetons d'appel LLM sont distribués par le superviseur (un pipe par
+        worker, voir SupervisedPermits) : ceux d'un worker tué sont récupérés.
+        """
+        kwargs = self._worker_kwargs(None)
+        permits = {"free": max_llm_calls, "waiting": deque()}
+        
+        def spawn():
+            parent_conn, child_conn = context.Pipe()
+            parent_permits, child_permits = context.Pipe()
+            process = context.Process(target=_process_worker, args=(kwargs, child_conn, child_permits), daemon=True)
+            process.start()
+            child_conn.close()
+            child_permits.close()
+            return {"process": process, "conn": parent_conn, "permits": parent_permits, "held": 0,
+                    "job": None, "deadline": None}
+        
+        def grant_waiting():
+            while permits["free"] and permits["waiting"]:
+                slot = permits["waiting"].popleft()
+                permits["free"] -= 1
+                slot["held"] += 1
+                try:
+                    slot["permits"].send("grant")
+                except (BrokenPipeError, OSError):
+                    pass  # worker mort : jeton rendu au remplacement
+        
+        def handle_permits(slot):
+            try:
+                while slot["permits"].poll():
+                    if slot["permits"].recv() == "acquire":
+                        permits["waiting"].append(slot)
+                    elif slot["held"]:
+                        slot["held"] -= 1
+                        permits["free"] += 1
+            except (EOFError, OSError):
+                pass
+            grant_waiting()
+        
+        def replace(slot):
+            slot["process"].kill()
+            slot["process"].join()
+            slot["conn"].close()
+            # Jetons détenus ou demandés par le worker tué : récupérés
+            permits["free"] += slot["held"]
+            permits["waiting"] = deque(waiting for waiting in permits["waiting"] if waiting is not slot)
+            slot["permits"].close()
+            slot.update(spawn())
+            grant_waiting()
+        
+        pending = deque(jobs)
+        finished = 0
+        slots = [spawn() for _ in range(min(workers, len(jobs)))]
+        
+        while pending or any(slot["job"] is not None for slot in slots):
+            for slot in slots:
+                if slot["job"] is None and pending:
+                    slot["job"] = pending.popleft()
+                    index, file_path, config = slot["job"]
+                    slot["conn"].send((index, str(file_path), config))
+                    slot["deadline"] = None
+            
+            busy = [slot for slot in slots if slot["job"] is not None]
+            deadlines = [slot["deadline"] for slot in busy if slot["deadline"] is not None]
+            wait_time = max(0.0, min(deadlines) - time.time()) if deadlines else None
+            permit_conns = {slot["permits"]: slot for slot in slots}
+            ready = wait_connections([slot["conn"] for slot in busy] + list(permit_conns), timeout=wait_time)
+            for conn in ready:
+                if conn in permit_conns:
+                    handle_permits(permit_conns[conn])
+            
+            for slot in busy:
+                index, file_path, config = slot["job"]
+                if slot["conn"] in ready:
+                    try:
+                        message = slot["conn"].recv()
+                    except (EOFError, OSError):
+                        print(f"  💥 [{config['id']}] {file_path.name}: worker arrêté, remplacé")
+                        self._record(index, self._failed_result(file_path, config, "worker crashed", 0))
+                        finished += 1
+                        replace(slot)
+                        continue
+                    if message[0] == "started":
+                        # Le timeout court à partir du début réel du test
+                        slot["deadline"] = time.time() + timeout if timeout else None
+                    else:
+                        self._record(index, message[2])
+                        finished += 1
+                        slot["job"] = None
+                        print(f"  ✔️  [{config['id']}] {file_path.name}: {message[2]['status']} "
+                              f"({finished}/{len(jobs)})")
+                elif slot["deadline"] is not None and time.time() >= slot["deadline"]:
+                    print(f"  ⏰ [{config['id']}] {file_path.name}: timeout ({self.format_duration(timeout)}), worker tué")
+                    self._record(index, self._failed_result(file_path, config, f"timeout après {timeout}s", timeout))
+                    finished += 1
+                    replace(slot)
+        
+        for slot in slots:
+            try:
+                slot["conn"].send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for slot in slots:
+            slot["process"].join(timeout=10)
+            if slot["process"].is_alive():
+                slot["process"].kill()
+    
+    # ========== EXPORTS (STREAMING DEPUIS LE JOURNAL) ==========
+    
+    def iter_results(self):
+        """Résultats du journal, un par test, dans l'ordre (fichier × config)"""
+        return iter_results(self.results_path, ('file', 'test_id'))
+    
+    def _scan_results(self):
+        """Premier passage : agents rencontrés et statistiques, sans garder les résultats"""
+        all_agents = set()
+        stats = {'total': 0, 'successful': 0, 'failed': 0, 'total_duration': 0, 'issues': 0,
+                 'prompt_tokens': 0, 'completion_tokens': 0, 'load_stalls': 0}
+        for result in self.iter_results():
+            all_agents.update(result.get('agent_details_dict', {}).keys())
+            stats['total'] += 1
+            stats['total_duration'] += result.get('total_duration', 0)
+            usage = result.get('llm_usage') or {}
+            for key in ('prompt_tokens', 'completion_tokens', 'load_stalls'):
+                stats[key] += usage.get(key, 0)
+            if result['status'] == 'SUCCESS':
+                stats['successful'] += 1
+                stats['issues'] += result.get('total_issues', 0)
+            elif result['status'] == 'FAILED':
+                stats['failed'] += 1
+        return sorted(all_agents), stats  # Ordre alphabétique
     
     def export_to_excel(self, filename=None):
-        """Export Excel avec colonnes dynamiques par agent"""
+        """Export Excel avec colonnes dynamiques par agent (classeur write-only, en streaming)"""
         
-        if not self.results:
+        if not self.results_path.exists():
             print("❌ Aucun résultat")
             return
         
@@ -287,27 +610,21 @@ class AdvancedBatchTester:
         
         print(f"\n📊 Export Excel: {filename}")
         
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Résultats"
-        
         # ========== TROUVER TOUS LES AGENTS UTILISÉS ==========
-        all_agents = set()
-        for result in self.results:
-            if 'agent_details_dict' in result:
-                all_agents.update(result['agent_details_dict'].keys())
-        
-        all_agents = sorted(list(all_agents))  # Ordre alphabétique
+        all_agents, totals = self._scan_results()
         
         print(f"   📋 Agents détectés: {', '.join(all_agents)}")
         
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Résultats")
+        
         # ========== CONSTRUIRE LES EN-TÊTES DYNAMIQUES ==========
         headers_base = [
             'Fichier', 'Configuration', 'Test_ID', 'Statut_Test',
             'Durée_Totale', 'Durée_Workflow', 'Nb_Agents',
             'Problèmes_Totaux', 'Lignes_Avant', 'Lignes_Après', 
             'Δ_Lignes', '% Réduction'
-        ]
+        ] + self.USAGE_HEADERS
         
         # Ajouter des colonnes pour chaque agent
         headers_agents = []
@@ -316,22 +633,28 @@ class AdvancedBatchTester:
                 f'Durée_{agent}',
                 f'Temp_{agent}',
                 f'Problèmes_{agent}',
-                f'Statut_{agent}'
+                f'Statut_{agent}',
+                f'Tokens_Prompt_{agent}'
             ])
         
         headers = headers_base + headers_agents + ['Timestamp']
         
-        ws.append(headers)
+        # Ajuster largeurs (à fixer avant les lignes en mode write-only)
+        for col in range(1, len(headers) + 1):
+            ws.column_dimensions[get_column_letter(col)].width = 15
         
         # Formater en-tête
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_num)
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
             cell.font = Font(bold=True, color='FFFFFF')
             cell.fill = PatternFill(start_color='1E3A8A', end_color='1E3A8A', fill_type='solid')
             cell.alignment = Alignment(horizontal='center')
+            header_cells.append(cell)
+        ws.append(header_cells)
         
         # ========== AJOUTER LES DONNÉES (UNE LIGNE PAR TEST) ==========
-        for result in self.results:
+        for result in self.iter_results():
             if 'agent_details_dict' in result:
                 # Données de base
                 row = [
@@ -347,7 +670,7 @@ class AdvancedBatchTester:
                     result.get('final_lines', 0),
                     result.get('lines_changed', 0),
                     f"{result.get('reduction_percent', 0):.1f}%"
-                ]
+                ] + self._usage_columns(result.get('llm_usage'))
                 
                 # ⭐ Ajouter les données de chaque agent
                 agent_details = result.get('agent_details_dict', {})
@@ -358,11 +681,12 @@ class AdvancedBatchTester:
                             details['duration_formatted'],  # Durée formatée
                             details['temperature'] if details['temperature'] is not None else 'N/A',
                             details['issues_found'],
-                            details['status']
+                            details['status'],
+                            self._agent_prompt_tokens(details)
                         ])
                     else:
                         # Agent pas utilisé dans ce test
-                        row.extend(['', '', '', ''])
+                        row.extend(['', '', '', '', ''])
                 
                 row.append(result.get('timestamp', ''))
                 ws.append(row)
@@ -373,53 +697,47 @@ class AdvancedBatchTester:
                     result['status'], self.format_duration(result.get('total_duration', 0)),
                     '', '', '', '', '', '', ''
                 ]
+                row.extend([''] * len(self.USAGE_HEADERS))
                 # Remplir colonnes agents vides
                 row.extend([''] * len(headers_agents))
                 row.append(result.get('timestamp', ''))
                 ws.append(row)
         
-        # Ajuster largeurs
-        for col in range(1, len(headers) + 1):
-            ws.column_dimensions[get_column_letter(col)].width = 15
-        
         # Feuille Statistiques
         ws_stats = wb.create_sheet("Statistiques")
+        ws_stats.column_dimensions['A'].width = 30
+        ws_stats.column_dimensions['B'].width = 20
         
-        successful = [r for r in self.results if r['status'] == 'SUCCESS']
-        failed = [r for r in self.results if r['status'] == 'FAILED']
-        total = len(self.results)
+        total = totals['total']
+        successful = totals['successful']
         
         stats = [
             ['Métrique', 'Valeur'],
             ['Tests Totaux', total],
-            ['Réussis', len(successful)],
-            ['Échoués', len(failed)],
-            ['Taux Réussite', f"{(len(successful)/total*100):.1f}%" if total > 0 else "0%"],
+            ['Réussis', successful],
+            ['Échoués', totals['failed']],
+            ['Taux Réussite', f"{(successful/total*100):.1f}%" if total > 0 else "0%"],
+            [''],
+            ['Durée Totale', self.format_duration(totals['total_duration'])],
+            ['Durée Moyenne', self.format_duration(totals['total_duration']/total) if total > 0 else "0s"],
             [''],
-            ['Durée Totale', self.format_duration(sum([r.get('total_duration', 0) for r in self.results]))],
-            ['Durée Moyenne', self.format_duration(sum([r.get('total_duration', 0) for r in self.results])/total) if total > 0 else "0s"],
+            ['Problèmes Totaux', totals['issues']],
+            ['Problèmes Moyens', f"{totals['issues']/successful:.1f}" if successful else "0"],
             [''],
-            ['Problèmes Totaux', sum([r.get('total_issues', 0) for r in successful])],
-            ['Problèmes Moyens', f"{sum([r.get('total_issues', 0) for r in successful])/len(successful):.1f}" if successful else "0"],
+            ['Tokens Prompt', totals['prompt_tokens']],
+            ['Tokens Générés', totals['completion_tokens']],
+            ['Rechargements Modèle', totals['load_stalls']],
         ]
         
-        for row in stats:
-            ws_stats.append(row)
-        
-        for row in range(1, len(stats) + 1):
-            cell_a = ws_stats.cell(row=row, column=1)
-            cell_b = ws_stats.cell(row=row, column=2)
-            
-            if row == 1:
-                cell_a.font = Font(bold=True, color='FFFFFF')
-                cell_b.font = Font(bold=True, color='FFFFFF')
-                cell_a.fill = PatternFill(start_color='DC2626', end_color='DC2626', fill_type='solid')
-                cell_b.fill = PatternFill(start_color='DC2626', end_color='DC2626', fill_type='solid')
-            else:
-                cell_a.font = Font(bold=True)
-        
-        ws_stats.column_dimensions['A'].width = 30
-        ws_stats.column_dimensions['B'].width = 20
+        for row_num, row in enumerate(stats, 1):
+            cells = [WriteOnlyCell(ws_stats, value=value) for value in row]
+            if row_num == 1:
+                for cell in cells:
+                    cell.font = Font(bold=True, color='FFFFFF')
+                    cell.fill = PatternFill(start_color='DC2626', end_color='DC2626', fill_type='solid')
+            elif cells:
+                cells[0].font = Font(bold=True)
+            ws_stats.append(cells)
         
         output_path = self.output_dir / filename
         wb.save(output_path)
@@ -430,8 +748,8 @@ class AdvancedBatchTester:
         return output_path
     
     def export_to_csv(self, filename=None):
-        """Export CSV avec colonnes dynamiques"""
-        if not self.results:
+        """Export CSV avec colonnes dynamiques (en streaming depuis le journal)"""
+        if not self.results_path.exists():
             print("❌ Aucun résultat")
             return
         
@@ -444,12 +762,7 @@ class AdvancedBatchTester:
         print(f"\n📊 Export CSV: {filename}")
         
         # Trouver tous les agents
-        all_agents = set()
-        for result in self.results:
-            if 'agent_details_dict' in result:
-                all_agents.update(result['agent_details_dict'].keys())
-        
-        all_agents = sorted(list(all_agents))
+        all_agents, _ = self._scan_results()
         
         # Construire les en-têtes
         headers = [
@@ -458,7 +771,7 @@ class AdvancedBatchTester:
             'Durée_Workflow_Sec', 'Durée_Workflow',
             'Problèmes_Totaux', 'Lignes_Avant', 'Lignes_Après', 
             'Lignes_Changées', 'Réduction_%'
-        ]
+        ] + self.USAGE_HEADERS
         
         # Ajouter colonnes par agent
         for agent in all_agents:
@@ -467,7 +780,8 @@ class AdvancedBatchTester:
                 f'Durée_{agent}',
                 f'Temp_{agent}',
                 f'Problèmes_{agent}',
-                f'Statut_{agent}'
+                f'Statut_{agent}',
+                f'Tokens_Prompt_{agent}'
             ])
         
         headers.append('Timestamp')
@@ -477,7 +791,7 @@ class AdvancedBatchTester:
             writer = csv.DictWriter(csvfile, fieldnames=headers)
             writer.writeheader()
             
-            for result in self.results:
+            for result in self.iter_results():
                 if 'agent_details_dict' in result:
                     row = {
                         'Fichier': result['file'],
@@ -495,6 +809,7 @@ class AdvancedBatchTester:
                         'Réduction_%': f"{result.get('reduction_percent', 0):.2f}",
                         'Timestamp': result.get('timestamp', '')
                     }
+                    row.update(zip(self.USAGE_HEADERS, self._usage_columns(result.get('llm_usage'))))
                     
                     # Ajouter données agents
                     agent_details = result.get('agent_details_dict', {})
@@ -506,12 +821,14 @@ class AdvancedBatchTester:
                             row[f'Temp_{agent}'] = details['temperature'] if details['temperature'] is not None else 'N/A'
                             row[f'Problèmes_{agent}'] = details['issues_found']
                             row[f'Statut_{agent}'] = details['status']
+                            row[f'Tokens_Prompt_{agent}'] = self._agent_prompt_tokens(details)
                         else:
                             row[f'Durée_{agent}_Sec'] = ''
                             row[f'Durée_{agent}'] = ''
                             row[f'Temp_{agent}'] = ''
                             row[f'Problèmes_{agent}'] = ''
                             row[f'Statut_{agent}'] = ''
+                            row[f'Tokens_Prompt_{agent}'] = ''
                     
                     writer.writerow(row)
         
@@ -520,6 +837,19 @@ class AdvancedBatchTester:
         return output_path
 
 
+def _process_worker(tester_kwargs, conn, permits_conn):
+    """Processus worker : son propre testeur (orchestrateur + client LLM), tests reçus par pipe"""
+    tester = AdvancedBatchTester(**{**tester_kwargs, "llm_semaphore": SupervisedPermits(permits_conn)})
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        index, file_path, test_config = job
+        conn.send(("started", index))
+        conn.send(("done", index, tester.run_test(Path(file_path), test_config)))
+    conn.close()
+
+
 def main():
     """Fonction principale"""
     
@@ -529,11 +859,29 @@ def main():
     parser.add_argument('--tests', nargs='+', help='IDs des tests')
     parser.add_argument('--excel', default=None, help='Nom Excel')
     parser.add_argument('--csv', default=None, help='Nom CSV')
+    parser.add_argument('--checkpoint-db', default=None, help='Base SQLite des checkpoints (active la reprise)')
+    parser.add_argument('--resume', default=None, metavar='RUN_ID', help='Reprendre un run interrompu')
+    parser.add_argument('--workers', type=int, default=1, help='Tests exécutés en parallèle')
+    parser.add_argument('--worker-mode', choices=['process', 'thread'], default='process',
+                        help='Isolation des workers (process = timeout par kill)')
+    parser.add_argument('--timeout', type=float, default=None, help='Durée max d\'un test (secondes)')
+    parser.add_argument('--max-llm-calls', type=int, default=None, help='Appels LLM simultanés max')
     
     args = parser.parse_args()
     
-    tester = AdvancedBatchTester(config_file=args.config)
-    tester.run_all_tests(file_pattern=args.pattern, test_ids=args.tests)
+    tester = AdvancedBatchTester(
+        config_file=args.config,
+        checkpoint_db=args.checkpoint_db,
+        resume_run_id=args.resume
+    )
+    tester.run_all_tests(
+        file_pattern=args.pattern,
+        test_ids=args.tests,
+        workers=args.workers,
+        worker_mode=args.worker_mode,
+        timeout=args.timeout or tester.config.get('test_timeout'),
+        max_llm_calls=args.max_llm_calls
+    )
     
     if tester.output_options.get('generate_excel_report', True):
         tester.export_to_excel(filename=args.excel)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Vérification de non-régression de core.code_extractor sur des formes de
+réponse LLM courantes : concaténation des blocs imports + fonctions, mais
+jamais d'un exemple d'utilisation ni d'un bloc shell sans langage.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.code_extractor import extract_code
+
+
+CODE = "def add(a, b):\n    return a + b"
+
+CASES = [
+    (
+        "exemple d'utilisation après le code",
+        f"Here is the code:\n```python\n{CODE}\n```\n\nExample usage:\n```python\nprint(add(1, 2))\n```\n",
+        CODE,
+    ),
+    (
+        "bloc shell sans langage",
+        f"```\npip install requests\n```\n\nThen:\n```python\n{CODE}\n```\n",
+        CODE,
+    ),
+    (
+        "appel au niveau module sans phrase d'exemple",
+        f"```python\n{CODE}\n```\n```python\nadd(1, 2)\n```\n",
+        CODE,
+    ),
+    (
+        "imports puis fonctions",
+        f"Imports:\n```python\nimport os\n```\nFunctions:\n```python\n{CODE}\n```\n",
+        f"import os\n\n{CODE}",
+    ),
+    (
+        "deux versions de la même fonction",
+        f"Before:\n```python\ndef add(a,b): return a+b\n```\nAfter:\n```python\n{CODE}\n```\n",
+        CODE,
+    ),
+]
+
+
+def main():
+    failures = []
+    for name, response, expected in CASES:
+        code = extract_code(response, "python")
+        ok = code == expected
+        print(f"{'✅' if ok else '❌'} {name}")
+        if not ok:
+            print(f"   obtenu : {code!r}\n   attendu: {expected!r}")
+            failures.append(name)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
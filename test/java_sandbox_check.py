@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Vérification de non-régression de la validation Java de TestAgent :
+un source qui ne compile pas doit donner un rapport FAILED, un source
+valide un rapport SUCCESS (espace Maven du pool, src/main/java).
+
+Ignorée (code de sortie 0) si Maven n'est pas installé.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.test_agent import TestAgent
+from core import tool_discovery
+
+
+BROKEN = """package demo;
+
+public class Broken {
+    public static int twice(int x) {
+        return x * 2
+    }
+}
+"""
+
+VALID = """package demo;
+
+public class Valid {
+    public static int twice(int x) {
+        return x * 2;
+    }
+}
+"""
+
+
+def main():
+    if not tool_discovery.is_available("mvn"):
+        print("⏭️  Maven non installé : vérification Java ignorée")
+        return 0
+
+    agent = TestAgent(None)
+    failures = []
+    for name, code, expected in [("source invalide", BROKEN, "FAILED"), ("source valide", VALID, "SUCCESS")]:
+        # Sans cache : on veut exécuter Maven réellement
+        status = agent._analyze_uncached(code, "Java")["status"]
+        print(f"{'✅' if status == expected else '❌'} {name}: {status} (attendu {expected})")
+        if status != expected:
+            failures.append(name)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
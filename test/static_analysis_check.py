@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Vérification de non-régression des mesures d'imbrication de
+core.static_analysis (complexité et fonctions longues) : une chaîne
+if/elif/else reste un seul niveau.
+"""
+
+import ast
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.static_analysis import function_metrics, long_function_findings, nesting_depths
+
+
+ELIF_CHAIN = """
+def grade(score):
+    if score > 90:
+        return "A"
+    elif score > 80:
+        return "B"
+    elif score > 70:
+        return "C"
+    else:
+        return "D"
+"""
+
+NESTED_IN_ELIF = """
+def pick(a, b):
+    if a:
+        return 1
+    elif b:
+        if a is None:
+            return 2
+    return 3
+"""
+
+
+def _function(code):
+    return ast.parse(code).body[0]
+
+
+CASES = [
+    ("chaîne if/elif/else : nesting_depths", lambda: nesting_depths(_function(ELIF_CHAIN))["block"], 1),
+    ("if dans un elif : nesting_depths", lambda: nesting_depths(_function(NESTED_IN_ELIF))["block"], 2),
+    ("chaîne if/elif/else : function_metrics", lambda: function_metrics(ast.parse(ELIF_CHAIN))[0]["depth"], 1),
+    ("if dans un elif : function_metrics", lambda: function_metrics(ast.parse(NESTED_IN_ELIF))[0]["depth"], 2),
+    ("chaîne if/elif/else : long_function_findings", lambda: len(long_function_findings(ELIF_CHAIN, max_depth=2)), 0),
+]
+
+
+def main():
+    failures = []
+    for name, measure, expected in CASES:
+        value = measure()
+        ok = value == expected
+        print(f"{'✅' if ok else '❌'} {name}: {value} (attendu {expected})")
+        if not ok:
+            failures.append(name)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())